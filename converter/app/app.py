@@ -1,23 +1,41 @@
 import os
-from collections import deque
+import threading
+from concurrent.futures import Future
+from functools import cached_property
 
 from converter.core.currency_pair import CurrencyPair
 
-from converter.core.double_conversion import CurrencyConverterDoubleConversion
 from converter.core.exceptions import *
-from converter.handlers.main_handler import MainHandler
 from converter.app.menu import Menu
 
 
 class App:
     """
+    Actions of the main menu.
 
+    Subsystems are created on their first use, so the menu appears without importing
+    the HTTP client or opening the database. The state of the server is checked in the background
+    by start_checking_server_state and waited for only by actions which need the API.
     """
 
     def __init__(self):
-        self.converter = CurrencyConverterDoubleConversion()
-        self.menu = Menu()
-        self.handler = MainHandler()
+        self.__server_state = None
+
+    @cached_property
+    def converter(self):
+        from converter.core.double_conversion import CurrencyConverterDoubleConversion
+
+        return CurrencyConverterDoubleConversion()
+
+    @cached_property
+    def menu(self) -> Menu:
+        return Menu()
+
+    @cached_property
+    def handler(self):
+        from converter.handlers.main_handler import MainHandler
+
+        return MainHandler()
 
     def exchange(self):
         """
@@ -25,8 +43,7 @@ class App:
         """
 
         if self.__input_is_ready_to_exchange():
-            if self.converter.rates_are_from_db:
-                self.__check_db_and_update_if_needed()
+            self.__check_source_of_rates()
             self.converter.exchange()
             self.menu.print_exchange_result(self.converter.currency_pair)
             self.converter.currency_pair = None
@@ -77,8 +94,7 @@ class App:
         """
 
         if self.__input_is_ready_to_double_conv():
-            if self.converter.rates_are_from_db:
-                self.__check_db_and_update_if_needed()
+            self.__check_source_of_rates()
             self.converter.double_conversion()
             self.menu.print_double_conversion_result(self.converter.currency_pair)
             self.converter.currency_pair = None
@@ -128,35 +144,42 @@ class App:
 
     def show_saved_currencies(self):
         """
-        Requests records from CurrencyConverter.show_saved_currencies method to process them.
-        While processing all pairs, shows progress bar from Utilities.progress_bar method.
-        Outputs the results using App.menu method.
+        Requests records of saved pairs from the database and quotes them all at once with
+        CurrencyConverter.quote_many, which downloads the rates of every owned currency only once.
+        While processing, shows progress bar from Menu.progress_bar method.
+        Outputs the results using App.menu method, an error for every pair without a known rate.
         """
         try:
             data = self.handler.db.get_saved_currencies()
 
-            if self.converter.rates_are_from_db:
-                self.__check_db_and_update_if_needed()
-
-            queue = deque([])
+            self.__check_source_of_rates()
 
-            progress = 0
-            total = len(data)
-            for from_currency, to_currency, amount in data:
-                currency_pair = self.converter.exchange(
+            currency_pairs = self.converter.quote_many(
+                (
                     CurrencyPair(from_currency, to_currency, amount)
-                )
-                queue.appendleft(currency_pair)
-
-                progress += 1
-                self.menu.progress_bar(progress, total)
-
-            while queue:
-                self.menu.print_exchange_result(queue.pop())
+                    for from_currency, to_currency, amount in data
+                ),
+                progress=self.menu.progress_bar
+            )
+
+            for currency_pair in currency_pairs:
+                if currency_pair.result is None:
+                    self.menu.print_exception(NoSuchCurrencyException(
+                        f'Can\'t find the rate of {currency_pair.from_currency} '
+                        f'to {currency_pair.to_currency}.'
+                    ))
+                else:
+                    self.menu.print_exchange_result(currency_pair)
         except EmptySavedPairsTableException as e:
             self.menu.print_exception(e)
             return
 
+    def __check_source_of_rates(self):
+        if self.converter.rates_are_from_db:
+            self.__check_db_and_update_if_needed()
+        else:
+            self.wait_for_server_state()
+
     def __check_db_and_update_if_needed(self):
         try:
             self.handler.db.prepared_currencies_exist_and_complete()
@@ -165,7 +188,7 @@ class App:
 
     def __update_rates_or_switch_rate_source(self):
         if self.__user_wants_to_update_db_now():
-            self.handler.update_rates()
+            self.update_rates()
         else:
             self.switch_rate_source()
 
@@ -174,6 +197,7 @@ class App:
         return self.menu.user_accepted()
 
     def update_rates(self):
+        self.wait_for_server_state()
         self.handler.update_rates()
 
     def switch_rate_source(self):
@@ -217,11 +241,42 @@ class App:
             self.handler.db.delete_all_from_saved_currencies()
             self.menu.print_smth_successfully('Deleted all pairs')
 
-    def set_up_directories_and_check_server_state(self):
-        self.handler.api.check_server_state()
-
+    def set_up_directories(self):
         if 'converter' not in os.listdir():
             os.chdir('../..')
 
         if not os.path.exists('data'):
             os.mkdir('data')
+
+    def start_checking_server_state(self):
+        """
+        Checks the state of the server in a daemon thread, see wait_for_server_state.
+        """
+
+        future = self.__server_state = Future()
+
+        def check():
+            try:
+                from converter.handlers.API import APIHandler
+
+                APIHandler().check_server_state()
+            except BaseException as error:
+                future.set_exception(error)
+            else:
+                future.set_result(None)
+
+        threading.Thread(target=check, daemon=True).start()
+
+    def wait_for_server_state(self):
+        """
+        Waits for the check started by start_checking_server_state and raises its error, if any.
+        Without a started check the server is checked now.
+        """
+
+        if self.__server_state is None:
+            self.start_checking_server_state()
+        self.__server_state.result()
+
+    def set_up_directories_and_check_server_state(self):
+        self.set_up_directories()
+        self.wait_for_server_state()
@@ -0,0 +1,271 @@
+"""
+Non-interactive commands of the application:
+
+    python main.py convert [input] [--output FILE] [--format csv|jsonl] [--source api|db]
+    python main.py serve [--host HOST] [--port PORT] [--source api|db] [--refresh-interval SECONDS]
+    python main.py refresh [--direct-quotes] [--incremental] [--async] [--max-workers N] [--db PATH]
+
+convert reads rows of amount, from, to and an optional card_type, writes them back with a result column.
+Rows without a card type are exchanges (result is amount of `to` for amount of `from`),
+rows with one are payments (result is amount of `from` paid for amount of `to`, see double_conversion).
+Rows are converted in chunks, so memory use doesn't depend on the size of the input.
+serve runs the HTTP service of converter.app.server.
+refresh updates the database of rates as '4. Refresh your database' of the menu does, in the modes of MainHandler.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from itertools import islice
+from typing import Iterable, Iterator, TextIO
+
+import requests
+
+from converter.core.double_conversion import CurrencyConverterDoubleConversion
+from converter.core.exceptions import ExchangeError
+from converter.core.payment_table import CARD_TYPES
+from converter.core.rate_snapshot import RateSnapshot
+from converter.core.trie import get_currency_resolver
+
+FORMATS = ('csv', 'jsonl')
+SOURCES = ('api', 'db')
+FIELDS = ('amount', 'from', 'to', 'card_type')
+CHUNK_SIZE = 10_000
+PATH_TO_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data', 'rates.db')
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='plutus', description='PLUTUS currency converter')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    convert = commands.add_parser('convert', help='convert a file of pairs of currencies')
+    convert.add_argument('input', nargs='?', default='-', help='CSV or JSONL file, stdin by default')
+    convert.add_argument('-o', '--output', default='-', help='file for the results, stdout by default')
+    convert.add_argument('-f', '--format', choices=FORMATS, help='format of the input and the output, '
+                                                                 'by the extension of the input or csv by default')
+    convert.add_argument('-s', '--source', choices=SOURCES, default='api', help='source of rates, api by default')
+    convert.add_argument('--db', default=PATH_TO_DB, help='path to the database of rates for --source db')
+    convert.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='rows converted at once')
+
+    serve = commands.add_parser('serve', help='serve quotes over HTTP')
+    serve.add_argument('--host', default='127.0.0.1', help='address to listen on, 127.0.0.1 by default')
+    serve.add_argument('--port', type=int, default=8000, help='port to listen on, 8000 by default')
+    serve.add_argument('-s', '--source', choices=SOURCES, default='api', help='source of rates, api by default')
+    serve.add_argument('--db', default=PATH_TO_DB, help='path to the database of rates for --source db')
+    serve.add_argument('--refresh-interval', type=float, default=600, help='seconds between refreshes of rates')
+
+    refresh = commands.add_parser('refresh', help='refresh the database of rates')
+    refresh.add_argument('--direct-quotes', action='store_true', help='store rates of every pair as quoted by the API')
+    refresh.add_argument('--incremental', action='store_true', help='download only stale bases and write only '
+                                                                   'changed rates, implies --direct-quotes')
+    refresh.add_argument('--async', dest='use_asyncio', action='store_true', help='download in one event loop')
+    refresh.add_argument('--max-workers', type=int, default=8, help='concurrent downloads, 8 by default')
+    refresh.add_argument('--db', default=PATH_TO_DB, help='path to the database of rates')
+    return parser
+
+
+def main(argv: list[str] = None) -> int:
+    """
+    Runs a command, returns the exit status: 0 on success, 1 if any row was rejected or rates are unavailable.
+    """
+
+    args = build_parser().parse_args(argv)
+    if args.command == 'refresh':
+        return refresh(args)
+
+    converter = CurrencyConverterDoubleConversion()
+    converter.path_to_db = args.db
+    if args.source == 'db':
+        converter.switch_rate_source()
+
+    try:
+        snapshot = converter.get_payment_table().snapshot
+    except (ExchangeError, requests.RequestException) as e:
+        print(f'plutus: can\'t get rates: {e}', file=sys.stderr)
+        return 1
+
+    if args.command == 'serve':
+        return serve(converter, args)
+    return convert(converter, snapshot, args)
+
+
+def serve(converter: CurrencyConverterDoubleConversion, args: argparse.Namespace) -> int:
+    from converter.app.server import ConversionService, make_server
+
+    service = ConversionService(converter, args.refresh_interval)
+    service.start_refreshing()
+    server = make_server(service, args.host, args.port)
+    print(f'plutus: serving on http://{args.host}:{server.server_address[1]}', file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop_refreshing()
+        server.server_close()
+    return 0
+
+
+def refresh(args: argparse.Namespace) -> int:
+    if args.max_workers < 1:
+        build_parser().error('--max-workers must be positive')
+
+    # the refresh isn't needed by the other commands, keep it out of their start
+    from converter.handlers.main_handler import MainHandler
+
+    # the backup of the rates is written to data/ of the working directory, as the menu does
+    os.makedirs('data', exist_ok=True)
+    handler = MainHandler(
+        direct_quotes=args.direct_quotes or args.incremental,
+        max_workers=args.max_workers,
+        use_asyncio=args.use_asyncio,
+        incremental=args.incremental,
+        path_to_db=args.db
+    )
+    try:
+        report = handler.update_rates()
+    except (ExchangeError, requests.RequestException) as e:
+        print(f'plutus: can\'t refresh rates: {e}', file=sys.stderr)
+        return 1
+    finally:
+        handler.db.close()
+
+    print(
+        f'plutus: downloaded {report.fetched_bases} bases, skipped {report.skipped_bases} fresh bases, '
+        f'wrote {report.touched_rows} rates',
+        file=sys.stderr
+    )
+    return 0
+
+
+def convert(converter: CurrencyConverterDoubleConversion, snapshot: RateSnapshot, args: argparse.Namespace) -> int:
+    if args.chunk_size < 1:
+        build_parser().error('--chunk-size must be positive')
+    file_format = args.format or get_format(args.input)
+
+    with open_text(args.input, 'r') as input_file, open_text(args.output, 'w') as output_file:
+        rows = read_rows(input_file, file_format)
+        results = convert_rows(converter, snapshot, rows, args.chunk_size)
+        rejected = write_rows(output_file, results, file_format)
+    return 1 if rejected else 0
+
+
+def get_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    return 'jsonl' if extension in ('jsonl', 'ndjson', 'json') else 'csv'
+
+
+def open_text(path: str, mode: str) -> TextIO:
+    if path == '-':
+        stream = sys.stdin if mode == 'r' else sys.stdout
+        # closing the returned file must not close the standard stream
+        return open(stream.fileno(), mode, encoding=stream.encoding, newline='', closefd=False)
+    return open(path, mode, encoding='utf-8', newline='')
+
+
+def read_rows(file: TextIO, file_format: str) -> Iterator[dict | str]:
+    """
+    Yields rows of the file as dicts, or an error message for a JSON line that can't be read,
+    so the other rows are still converted.
+    """
+
+    if file_format == 'csv':
+        yield from csv.DictReader(file)
+    else:
+        for line in file:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield f'invalid JSON: {e}'
+
+
+def convert_rows(
+        converter: CurrencyConverterDoubleConversion,
+        snapshot: RateSnapshot,
+        rows: Iterable[dict],
+        chunk_size: int = CHUNK_SIZE
+) -> Iterator[dict | str]:
+    """
+    Yields every row with a result, or an error message for a row that can't be converted, in input order.
+    Rows may be error messages of read_rows already, they are passed on as rejected.
+    Currencies are resolved by the trie as in the interactive menu.
+    """
+
+    rows = iter(rows)
+    number = 0
+    while chunk := list(islice(rows, chunk_size)):
+        parsed = []
+        for row in chunk:
+            number += 1
+            if isinstance(row, str):
+                parsed.append(f'row {number}: {row}')
+                continue
+            try:
+                parsed.append(parse_row(row, snapshot))
+            except (ValueError, TypeError, AttributeError) as e:
+                parsed.append(f'row {number}: {e}')
+
+        exchanges = [i for i, row in enumerate(parsed) if isinstance(row, dict) and not row['card_type']]
+        payments = [i for i, row in enumerate(parsed) if isinstance(row, dict) and row['card_type']]
+        if exchanges:
+            results = converter.convert_many(
+                [parsed[i]['amount'] for i in exchanges],
+                [parsed[i]['from'] for i in exchanges],
+                [parsed[i]['to'] for i in exchanges],
+                snapshot=snapshot,
+                rounding='exact'
+            )
+            for i, result in zip(exchanges, results.tolist()):
+                parsed[i]['result'] = result
+        if payments:
+            results = converter.double_conversion_many(
+                [parsed[i]['from'] for i in payments],
+                [parsed[i]['amount'] for i in payments],
+                [parsed[i]['to'] for i in payments],
+                [parsed[i]['card_type'] for i in payments],
+                snapshot=snapshot
+            )
+            for i, result in zip(payments, results.tolist()):
+                parsed[i]['result'] = result
+        yield from parsed
+
+
+def parse_row(row: dict, snapshot: RateSnapshot) -> dict:
+    missing = [field for field in FIELDS[:3] if row.get(field) in (None, '')]
+    if missing:
+        raise ValueError(f'missing {", ".join(missing)}')
+
+    resolver = get_currency_resolver()
+    parsed = {'amount': float(row['amount'])}
+    for field in ('from', 'to'):
+        code = resolver.get_code(str(row[field]).strip())
+        if not code or code not in snapshot:
+            raise ValueError(f'unknown currency {row[field]!r}')
+        parsed[field] = code
+    parsed['card_type'] = (row.get('card_type') or '').strip().upper()
+    if parsed['card_type'] and parsed['card_type'] not in CARD_TYPES:
+        raise ValueError(f'unknown card type {row["card_type"]!r}, expected one of {", ".join(CARD_TYPES)}')
+    return parsed
+
+
+def write_rows(file: TextIO, rows: Iterable[dict | str], file_format: str) -> int:
+    """
+    Writes converted rows to file and error messages to stderr, returns the number of rejected rows.
+    """
+
+    rejected = 0
+    writer = csv.DictWriter(file, FIELDS + ('result',)) if file_format == 'csv' else None
+    if writer:
+        writer.writeheader()
+    for row in rows:
+        if isinstance(row, str):
+            rejected += 1
+            print(f'plutus: {row}', file=sys.stderr)
+        elif writer:
+            writer.writerow(row)
+        else:
+            file.write(json.dumps(row) + '\n')
+    return rejected
@@ -1,7 +1,7 @@
 import colorama
 from datetime import datetime
 
-from converter.core.currency_converter import CurrencyPair
+from converter.core.currency_pair import CurrencyPair
 
 
 class Menu:
@@ -75,7 +75,7 @@ class Menu:
 
     def ask_accepting_for_creating_db_now(self):
         print('\nIt seems, that you haven\'t got needed database yet.\n'
-              'Do you want to create one now? It will take approx. 3-5 minutes.\n'
+              'Do you want to create one now? It will take a few seconds.\n'
               'If not, you may continue by switching the mode to actual rate further.\n')
 
     def ask_accepting_to_delete_all_pairs(self):
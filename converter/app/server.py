@@ -0,0 +1,153 @@
+"""
+Local HTTP service of quotes, keeps rates in memory and refreshes them in the background.
+
+    GET  /convert?amount=100&from=USD&to=EUR
+    GET  /pay?amount=100&from=USD&to=EUR&card_type=VISA
+    POST /convert/batch    [{"amount": 100, "from": "USD", "to": "EUR", "card_type": "VISA"}, ...]
+
+Currencies are written as in the menu. Responses are JSON, errors are {"error": message} with status 400.
+"""
+
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+
+from converter.app import cli
+from converter.core.currency_converter import quote_exchange
+from converter.core.currency_pair import CurrencyPair
+from converter.core.double_conversion import CurrencyConverterDoubleConversion, quote_payment
+from converter.core.exceptions import ExchangeError
+from converter.core.rate_snapshot import RateSnapshot
+from converter.core.trie import get_currency_resolver
+
+REFRESH_INTERVAL = 600
+MAX_BATCH_SIZE = 100_000
+
+
+class ConversionService:
+    """
+    Quotes against the latest snapshot of rates of a converter.
+    The snapshot and its payment table are built by refresh, never by a request,
+    and are replaced at once, so requests being served keep the snapshot they started with.
+
+    Methods
+    -------
+    refresh()
+        Takes the current rates of the converter
+    start_refreshing()
+        Refreshes every refresh_interval seconds in a daemon thread until stop_refreshing
+    convert(amount, from_currency, to_currency), pay(amount, from_currency, to_currency, card_type)
+        Return a new CurrencyPair with the result
+    convert_batch(rows)
+        Returns the rows with results or errors, see cli.convert_rows
+    """
+
+    def __init__(self, converter: CurrencyConverterDoubleConversion = None, refresh_interval: float = REFRESH_INTERVAL):
+        self.converter = converter or CurrencyConverterDoubleConversion()
+        self.refresh_interval = refresh_interval
+        self.snapshot: RateSnapshot = None
+        self.__stopped = threading.Event()
+
+    def refresh(self):
+        table = self.converter.get_payment_table()
+        self.snapshot = table.snapshot
+
+    def start_refreshing(self):
+        self.refresh()
+        get_currency_resolver()
+        self.__stopped.clear()
+        threading.Thread(target=self.__refresh_periodically, daemon=True).start()
+
+    def stop_refreshing(self):
+        self.__stopped.set()
+
+    def __refresh_periodically(self):
+        while not self.__stopped.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except (ExchangeError, requests.RequestException) as e:
+                # keep serving the previous rates until the source is back
+                print(f'plutus: can\'t refresh rates: {e}', file=sys.stderr)
+
+    def convert(self, amount: float, from_currency: str, to_currency: str) -> CurrencyPair:
+        return quote_exchange(self.snapshot, self.__get_pair(amount, from_currency, to_currency))
+
+    def pay(self, amount: float, from_currency: str, to_currency: str, card_type: str) -> CurrencyPair:
+        if not card_type:
+            raise ValueError('missing card_type')
+        return quote_payment(self.snapshot, self.__get_pair(amount, from_currency, to_currency, card_type))
+
+    def convert_batch(self, rows: list[dict]) -> list[dict]:
+        return [
+            {'error': row} if isinstance(row, str) else row
+            for row in cli.convert_rows(self.converter, self.snapshot, rows)
+        ]
+
+    def __get_pair(self, amount, from_currency: str, to_currency: str, card_type: str = None) -> CurrencyPair:
+        row = cli.parse_row(
+            {'amount': amount, 'from': from_currency, 'to': to_currency, 'card_type': card_type},
+            self.snapshot
+        )
+        return CurrencyPair(row['from'], row['to'], row['amount'], row['card_type'] or None)
+
+
+def make_server(service: ConversionService, host: str = '127.0.0.1', port: int = 8000) -> ThreadingHTTPServer:
+    """
+    Returns a server of the service, port 0 takes any free port (see server.server_address).
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            query = dict(parse_qsl(url.query))
+            try:
+                if url.path == '/convert':
+                    pair = service.convert(query.get('amount', 1), query.get('from'), query.get('to'))
+                elif url.path == '/pay':
+                    pair = service.pay(query.get('amount'), query.get('from'), query.get('to'), query.get('card_type'))
+                else:
+                    return self.send_json(404, {'error': f'unknown path {url.path}'})
+            except (ValueError, TypeError) as e:
+                return self.send_json(400, {'error': str(e)})
+            self.send_json(200, {
+                'amount': pair.amount,
+                'from': pair.from_currency,
+                'to': pair.to_currency,
+                **({'card_type': pair.card_type} if pair.card_type else {}),
+                'result': pair.result
+            })
+
+        def do_POST(self):
+            if urlsplit(self.path).path != '/convert/batch':
+                return self.send_json(404, {'error': f'unknown path {self.path}'})
+            try:
+                rows = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                if not isinstance(rows, list):
+                    raise ValueError('expected a list of rows')
+                if len(rows) > MAX_BATCH_SIZE:
+                    raise ValueError(f'more than {MAX_BATCH_SIZE} rows')
+            except ValueError as e:
+                return self.send_json(400, {'error': str(e)})
+            self.send_json(200, {'results': service.convert_batch(rows)})
+
+        def send_json(self, status: int, payload: dict):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,113 @@
+"""
+Vectorized helpers of CurrencyConverter.convert_many.
+"""
+
+from decimal import ROUND_HALF_EVEN, Decimal
+
+import numpy as np
+
+from converter.core.exceptions import NoSuchCurrencyException
+from converter.core.payment_table import CARD_TYPES
+from converter.core.rate_snapshot import RateSnapshot
+
+ROUNDING_MODES = ('fast', 'exact', 'decimal')
+COLUMNS = ('amount', 'from_currency', 'to_currency')
+PAYMENT_COLUMNS = ('from_currency', 'amount', 'to_currency', 'card_type')
+
+
+def get_columns(table, columns: tuple[str, ...] = COLUMNS) -> list[np.ndarray]:
+    """
+    Returns the columns of a pandas DataFrame or a pyarrow Table as NumPy arrays.
+    """
+
+    if hasattr(table, 'column_names'):
+        return [table.column(name).to_numpy() for name in columns]
+    return [table[name].to_numpy() for name in columns]
+
+
+def is_table(data) -> bool:
+    return hasattr(data, 'column_names') or hasattr(data, 'columns')
+
+
+def codes_to_indices(snapshot: RateSnapshot, codes) -> np.ndarray:
+    """
+    Maps alphabetic codes to positions in the snapshot.
+
+    Three-letter codes of capital letters are looked up in a table indexed by the letters,
+    other codes go through a binary search over the sorted codes of the snapshot.
+    """
+
+    codes = np.asarray(codes, dtype=str)
+    if codes.dtype == np.dtype('<U3') and codes.size:
+        letters = codes.reshape(-1).view(np.uint32).reshape(-1, 3).astype(np.intp) - ord('A')
+        if letters.min() >= 0 and letters.max() < 26:
+            table = np.full(26 ** 3, -1, dtype=np.intp)
+            for code, index in snapshot.indices.items():
+                if len(code) == 3 and code.isascii() and code.isupper():
+                    table[(ord(code[0]) - 65) * 676 + (ord(code[1]) - 65) * 26 + ord(code[2]) - 65] = index
+            indices = table[letters[:, 0] * 676 + letters[:, 1] * 26 + letters[:, 2]].reshape(codes.shape)
+            if (indices >= 0).all():
+                return indices
+
+    sorted_codes = np.array(sorted(snapshot.codes))
+    positions = np.array([snapshot.indices[code] for code in sorted_codes], dtype=np.intp)
+
+    found = np.minimum(np.searchsorted(sorted_codes, codes), len(sorted_codes) - 1)
+    unknown = sorted_codes[found] != codes
+    if unknown.any():
+        raise NoSuchCurrencyException('Unknown currencies: ' + ', '.join(np.unique(codes[unknown])))
+    return positions[found]
+
+
+def get_rates(snapshot: RateSnapshot, from_indices: np.ndarray, to_indices: np.ndarray) -> np.ndarray:
+    return snapshot.matrix()[from_indices, to_indices]
+
+
+def round_results(amounts, rates: np.ndarray, rounding: str, decimals: int) -> np.ndarray:
+    """
+    Multiplies amounts by rates and rounds the results.
+
+    Parameters
+    ----------
+    rounding : str
+        'fast' - NumPy rounding, may differ from round() in the last digit of a float;
+        'exact' - round() of every result, the same as CurrencyPair.set_result;
+        'decimal' - Decimal results computed from the exact values of amounts and rates, rounded half to even
+    """
+
+    amounts = np.asarray(amounts, dtype=np.float64)
+    if rounding == 'fast':
+        return np.round(amounts * rates, decimals)
+    if rounding == 'exact':
+        results = (amounts * rates).tolist()
+        return np.fromiter((round(result, decimals) for result in results), dtype=np.float64, count=len(results))
+    if rounding == 'decimal':
+        quantum = Decimal(1).scaleb(-decimals)
+        results = [
+            (Decimal(amount) * Decimal(rate)).quantize(quantum, rounding=ROUND_HALF_EVEN)
+            for amount, rate in zip(amounts.tolist(), rates.tolist())
+        ]
+        return np.array(results, dtype=object)
+    raise ValueError(f'Unknown rounding {rounding}, expected one of {ROUNDING_MODES}')
+
+
+def double_conversion(
+        snapshot: RateSnapshot,
+        from_indices: np.ndarray,
+        amounts,
+        to_indices: np.ndarray,
+        card_types
+) -> np.ndarray:
+    """
+    Vectorized CurrencyConverterDoubleConversion.double_conversion.
+    Multipliers of the payments are gathered from the PaymentTable of the snapshot.
+    """
+
+    card_types = np.asarray(card_types, dtype=str)
+    card_indices = (card_types == CARD_TYPES[1]).astype(np.intp)
+    unknown = (card_indices == 0) & (card_types != CARD_TYPES[0])
+    if unknown.any():
+        raise ValueError(f'Unknown card types {", ".join(np.unique(card_types[unknown]))}, expected one of {CARD_TYPES}')
+
+    multipliers = snapshot.payment_table().matrices()[card_indices, from_indices, to_indices]
+    return np.asarray(amounts, dtype=np.float64) * multipliers
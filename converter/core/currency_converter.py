@@ -1,36 +1,255 @@
-import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Iterable
 
 from converter.core.currency_pair import CurrencyPair
 from converter.core.exceptions import *
+from converter.core.rate_history import RateHistory
+from converter.core.rate_snapshot import RateSnapshot
+from converter.db.db import DBHandler
+from converter.handlers.API import APIHandler
+
+DB_BACKENDS = ('sqlite', 'mmap')
+# seconds between checks whether a refresh has replaced the file of the mmap backend
+MATRIX_CHECK_INTERVAL = 1
+
+
+def quote_exchange(snapshot: RateSnapshot, currency_pair: CurrencyPair) -> CurrencyPair:
+    """
+    Returns a new pair with the result of the exchange at the rates of the snapshot.
+    """
+
+    return currency_pair.with_rate(
+        snapshot.get_rate(currency_pair.from_currency, currency_pair.to_currency)
+    )
 
 
 class CurrencyConverter:
     """
     Get user's request and compute results.
+    Quotes don't change the converter or the requested pair, so one converter may serve many threads,
+    every thread reads the database through its own handler.
+
+    Rates from the database are read from SQLite with db_backend = 'sqlite' (the default),
+    with 'mmap' they are read from the matrix file written by every refresh, see converter.db.rate_matrix.
 
     Methods
     -------
+    quote
+        Returns a new pair with the result for the requested pair, source of the rate depends on state of the switch.
     exchange
-        Returns rate for requested pair of currencies, source of the rate depends on state of the switch at that moment.
+        Sets the result of currency_pair, kept for the interactive app.
+    quote_many
+        Returns new pairs with the results for many requested pairs, rates of every base are fetched once.
+    get_history
+        Returns stored snapshots of past refreshes, used for quotes as_of a moment.
+    convert_many
+        Converts arrays of amounts between arrays of currencies at once.
     """
 
     def __init__(self):
         self.rates_are_from_db = False
         self.currency_pair = None
+        self.api = APIHandler()
+        self.path_to_db = ''
+        self.db_backend = 'sqlite'
+        self.__db_handlers = threading.local()
+        self.__rate_matrix = None
+        self.__rate_matrix_checked_at = 0
+        self.__rate_matrix_lock = threading.Lock()
+        self.__api_snapshot = None
+        self.__history = None
+
+    @property
+    def db(self) -> DBHandler:
+        """
+        Database handler of the current thread, created on the first use so conversions with the API
+        never open the database.
+        """
+
+        handler = getattr(self.__db_handlers, 'handler', None)
+        if handler is None:
+            handler = self.__db_handlers.handler = DBHandler(self.path_to_db)
+        return handler
+
+    def get_history(self) -> RateHistory:
+        if self.__history is None or self.__history.path_to_db != self.path_to_db:
+            self.__history = RateHistory(self.path_to_db)
+        return self.__history
 
-    def exchange(self, currency_pair: CurrencyPair = None) -> CurrencyPair:
+    def quote(
+            self,
+            currency_pair: CurrencyPair,
+            snapshot: RateSnapshot = None,
+            as_of: float | datetime = None
+    ) -> CurrencyPair:
         """
-        Sets rate of a CurrencyPair object from api or db.
+        Returns a new CurrencyPair with the result of the exchange, currency_pair is not changed.
+        With a snapshot the rate is taken from it, with as_of (unix time or datetime) from the last snapshot
+        stored at or before that moment, otherwise from api or db.
+        """
+
+        if as_of is not None:
+            snapshot = self.get_history().snapshot_as_of(as_of)
+        if snapshot is not None:
+            return quote_exchange(snapshot, currency_pair)
+
+        if self.rates_are_from_db and self.db_backend == 'mmap':
+            rate = self.get_rate_matrix().get_rate(currency_pair.from_currency, currency_pair.to_currency)
+        elif self.rates_are_from_db:
+            rate = self.db.get_rate_from_db(
+                (currency_pair.from_currency, currency_pair.to_currency)
+            )
+        else:
+            rate = self.api.get_rate_from_API(
+                currency_pair.from_currency,
+                currency_pair.to_currency
+            )
+        return currency_pair.with_rate(rate)
+
+    def exchange(self, currency_pair: CurrencyPair = None, as_of: float | datetime = None) -> CurrencyPair:
+        """
+        Sets rate of a CurrencyPair object from api or db, or from the history of rates as_of a moment.
         """
 
         if currency_pair is None:
             currency_pair = self.currency_pair
 
-        if self.rates_are_from_db:
-            currency_pair.set_result_from_db()
-        else:
-            currency_pair.set_result_from_api()
+        currency_pair.result = self.quote(currency_pair, as_of=as_of).result
         return currency_pair
 
+    def quote_many(
+            self,
+            currency_pairs: Iterable[CurrencyPair],
+            max_workers: int = 8,
+            progress: Callable[[int, int], None] = None
+    ) -> list[CurrencyPair]:
+        """
+        Returns new pairs with the results of quote for every pair, in order.
+        From the API and the matrix file of the mmap backend the pairs are grouped by from_currency
+        and the rates of every distinct base are loaded once, downloads run up to max_workers bases at a time,
+        progress(done, total) is called after every base. From SQLite all pairs are resolved
+        by DBHandler.get_rates_from_db in one statement and progress is called once.
+        A pair whose rate is unknown is returned with the result None, so one such pair
+        doesn't prevent the quotes of the others.
+        """
+
+        currency_pairs = list(currency_pairs)
+        bases = list(dict.fromkeys(currency_pair.from_currency for currency_pair in currency_pairs))
+        if self.rates_are_from_db and self.db_backend != 'mmap':
+            rates = self.db.get_rates_from_db(
+                (currency_pair.from_currency, currency_pair.to_currency) for currency_pair in currency_pairs
+            )
+            if progress is not None and bases:
+                progress(len(bases), len(bases))
+        else:
+            rates_of_bases = {}
+            if self.rates_are_from_db:
+                matrix = self.get_rate_matrix()
+                for base in bases:
+                    rates_of_bases[base] = matrix.get_rates(base)
+                    if progress is not None:
+                        progress(len(rates_of_bases), len(bases))
+            elif bases:
+                with ThreadPoolExecutor(max_workers=min(max_workers, len(bases))) as executor:
+                    for base, rates_of_base in zip(bases, executor.map(self.api.get_cached_rates_from_API, bases)):
+                        rates_of_bases[base] = rates_of_base
+                        if progress is not None:
+                            progress(len(rates_of_bases), len(bases))
+            rates = [
+                rates_of_bases[currency_pair.from_currency].get(currency_pair.to_currency)
+                for currency_pair in currency_pairs
+            ]
+
+        return [
+            currency_pair.with_result(None) if rate is None else currency_pair.with_rate(rate)
+            for currency_pair, rate in zip(currency_pairs, rates)
+        ]
+
+    def get_rate_matrix(self):
+        """
+        Returns the RateMatrix of the database, opened again when a refresh has replaced its file.
+        """
+
+        if self.db_backend not in DB_BACKENDS:
+            raise ValueError(f'Unknown database backend {self.db_backend}, expected one of {DB_BACKENDS}')
+
+        matrix = self.__rate_matrix
+        now = time.monotonic()
+        if matrix is not None and now - self.__rate_matrix_checked_at < MATRIX_CHECK_INTERVAL:
+            return matrix
+
+        with self.__rate_matrix_lock:
+            # NumPy is only needed for this backend, keep it out of the import of the module
+            from converter.db.rate_matrix import RateMatrix, get_path_to_rate_matrix
+
+            path = get_path_to_rate_matrix(self.db.get_path_to_db())
+            matrix = self.__rate_matrix
+            if matrix is None or matrix.path != path or matrix.is_stale():
+                matrix = self.__rate_matrix = RateMatrix(path)
+            self.__rate_matrix_checked_at = now
+        return matrix
+
+    def get_rate_snapshot(self) -> RateSnapshot:
+        """
+        Returns rates of all currencies from the current source of rates, read from the matrix file
+        with the mmap backend. The snapshot of the API is kept for as long as the API handler serves the same cached rates.
+        """
+
+        if self.rates_are_from_db and self.db_backend == 'mmap':
+            return self.get_rate_matrix().get_rate_snapshot()
+        if self.rates_are_from_db:
+            return self.db.get_rate_snapshot()
+        rates = self.api.get_cached_rates_from_API('USD')
+        if self.__api_snapshot is None or self.__api_snapshot[0] is not rates:
+            self.__api_snapshot = (rates, RateSnapshot(rates))
+        return self.__api_snapshot[1]
+
+    def convert_many(
+            self,
+            amounts,
+            from_codes=None,
+            to_codes=None,
+            *,
+            snapshot: RateSnapshot = None,
+            rounding: str = 'fast',
+            decimals: int = 5
+    ):
+        """
+        Converts every amounts[i] from from_codes[i] to to_codes[i], returns a NumPy array of results.
+        Codes are mapped to indices once and the rates are gathered from the matrix of the snapshot.
+
+        Parameters
+        ----------
+        amounts
+            sequence of amounts, or a pandas DataFrame / pyarrow Table with columns
+            amount, from_currency, to_currency (from_codes and to_codes are omitted then)
+        from_codes, to_codes
+            sequences of alphabetic codes
+        snapshot : RateSnapshot
+            rates to use, taken from the current source of rates by default
+        rounding : str
+            'fast', 'exact' (the same results as exchange) or 'decimal', see batch.round_results
+        decimals : int
+            number of decimal places of results
+        """
+
+        # NumPy is only needed for batch work, keep it out of the import of the module
+        from converter.core import batch
+
+        if batch.is_table(amounts):
+            amounts, from_codes, to_codes = batch.get_columns(amounts)
+        if snapshot is None:
+            snapshot = self.get_rate_snapshot()
+
+        rates = batch.get_rates(
+            snapshot,
+            batch.codes_to_indices(snapshot, from_codes),
+            batch.codes_to_indices(snapshot, to_codes)
+        )
+        return batch.round_results(amounts, rates, rounding, decimals)
+
     def switch_rate_source(self):
         self.rates_are_from_db = not self.rates_are_from_db
@@ -1,52 +1,50 @@
-from dataclasses import dataclass
+import copy
+from dataclasses import dataclass, field
 
-from converter.core.trie import prepare_and_get_word_searcher
-from converter.db.db import DBHandler
-from converter.handlers.API import APIHandler
+from converter.core.trie import get_currency_resolver
 
 
-@dataclass
-class CurrencyPair(DBHandler, APIHandler):
+@dataclass(slots=True)
+class CurrencyPair:
+    """
+    Plain value of a requested exchange. Inputted currencies are resolved to alphabetic codes on creation,
+    the result is set by CurrencyConverter or returned in a new pair by its quotes.
+    """
+
     from_currency: str
     to_currency: str
     amount: float = 1
     card_type: str = None
+    result: float = field(default=None, compare=False)
 
     def __post_init__(self):
-        self.__result: float = None
-        self.__word_searcher = prepare_and_get_word_searcher()
         self.__set_from_and_to_currency()
-        super().__init__()
 
-    @property
-    def result(self) -> float:
-        return self.__result
+    def set_result(self, rate: float):
+        result = rate * self.amount
+        self.result = round(result, 5)
 
-    @result.setter
-    def result(self, result: float):
-        self.__result = result
+    def with_rate(self, rate: float) -> 'CurrencyPair':
+        """
+        Returns a new pair with the result of exchanging amount at rate, the pair itself is not changed.
+        """
 
-    def set_result_from_api(self):
-        rate = self.get_rate_from_API(
-            self.from_currency,
-            self.to_currency
-        )
+        return self.with_result(round(rate * self.amount, 5))
 
-        result = rate * self.amount
-        self.__result = round(result, 5)
+    def with_result(self, result: float) -> 'CurrencyPair':
+        """
+        Returns a copy of the pair with the result. The codes are copied as they are,
+        dataclasses.replace would resolve them again in __post_init__.
+        """
 
-    def set_result_from_db(self):
-        currencies_to_insert = (
-            self.from_currency,
-            self.to_currency
-        )
-        rate = self.get_rate_from_db(currencies_to_insert)
-        result = rate * self.amount
-        self.__result = round(result, 5)
+        currency_pair = copy.copy(self)
+        currency_pair.result = result
+        return currency_pair
 
     def __set_from_and_to_currency(self):
-        self.from_currency = self.__word_searcher.get_code(self.from_currency)
-        self.to_currency = self.__word_searcher.get_code(self.to_currency)
+        resolver = get_currency_resolver()
+        self.from_currency = resolver.get_code(self.from_currency)
+        self.to_currency = resolver.get_code(self.to_currency)
 
     def currencies_filled_out(self):
         if not self.from_currency or not self.to_currency:
@@ -58,4 +56,4 @@ class CurrencyPair(DBHandler, APIHandler):
             self.from_currency,
             self.to_currency,
             self.amount
-        )
\ No newline at end of file
+        )
@@ -1,137 +1,101 @@
 from .currency_converter import CurrencyConverter
 
-from converter.core.trie import EUROPE_CURRENCIES
+from converter.core.currency_pair import CurrencyPair
+from converter.core.payment_table import PaymentTable
+from converter.core.rate_snapshot import RateSnapshot
+
+
+def quote_payment(snapshot: RateSnapshot, currency_pair: CurrencyPair) -> CurrencyPair:
+    """
+    Returns a new pair with the amount of from_currency paid for amount of to_currency with card_type,
+    at the rates of the snapshot.
+    """
+
+    return currency_pair.with_result(
+        snapshot.payment_table().quote(
+            currency_pair.from_currency,
+            currency_pair.to_currency,
+            currency_pair.amount,
+            currency_pair.card_type
+        )
+    )
 
 
 class CurrencyConverterDoubleConversion(CurrencyConverter):
     def __init__(self):
         super().__init__()
+        self.__payment_table = None
 
     def double_conversion(self) -> float:
         """
         Returns amount of an owned currency needed to pay for amount of a target currency.
-        Result depends on a card system, which may have a consequence of double/triple conversion.
-        Uses CurrencyConverter.exchange method as a base method for exchanging currencies.
+        Result depends on a card system, which may have a consequence of double/triple conversion,
+        all of which are resolved in advance in the PaymentTable of the current rates.
+        Sets the result of currency_pair, see quote_payment for a quote that changes nothing.
         """
 
-        if self.__is_card_type_MC() and not self.__is_target_currency_european():
-            result = self.__buy_non_european_with_european()
-
-        elif self.__is_card_type_MC():
-            result = self.__buy_european_with_european()
-
-        elif not self.__is_card_type_MC() and self.__is_target_currency_european():
-            result = self.__buy_european_with_non_european()
-
-        elif not self.__is_card_type_MC():
-            result = self.__buy_non_european_with_non_european()
+        self.currency_pair.result = self.quote_payment(self.currency_pair).result
+        return self.currency_pair.result
 
-        self.currency_pair.result = result
+    def quote_payment(self, currency_pair: CurrencyPair, snapshot: RateSnapshot = None) -> CurrencyPair:
+        """
+        Returns a new CurrencyPair with the result of double_conversion, currency_pair is not changed.
+        Rates are taken from the snapshot, or from the current source of rates by default.
+        """
 
-    def __is_card_type_MC(self):
-        return self.currency_pair.card_type == 'MC'
+        if snapshot is None:
+            snapshot = self.get_payment_table().snapshot
+        return quote_payment(snapshot, currency_pair)
 
-    def __is_target_currency_european(self):
-        return self.currency_pair.to_currency in EUROPE_CURRENCIES['AlphabeticCode'].unique()
+    def get_payment_table(self) -> PaymentTable:
+        """
+        Returns the PaymentTable of the current source of rates, built again only when the rates change.
+        """
 
-    def __buy_non_european_with_european(self):
-        if self.__is_currency_EUR(is_currency_target=False):
-            dc_from_EUR = self.currency_pair.amount
-        else:
-            dc_from_EUR = self.__divide_and_add_fee(
-                self.currency_pair.amount,
-                self.__exchange(from_currency='EUR')
-            )
-        return self.__divide_and_add_fee(
-            dc_from_EUR,
-            self.__exchange(to_currency='EUR')
-        )
+        snapshot = self.get_rate_snapshot()
+        table = self.__payment_table
+        if table is None or (
+                table.snapshot is not snapshot and
+                (table.snapshot.codes != snapshot.codes or table.snapshot.rates != snapshot.rates)
+        ):
+            table = self.__payment_table = snapshot.payment_table()
+        return table
+
+    def double_conversion_many(
+            self,
+            from_codes,
+            amounts=None,
+            to_codes=None,
+            card_types=None,
+            *,
+            snapshot: RateSnapshot = None
+    ):
+        """
+        Batch version of double_conversion for columns of payments, returns a NumPy array of results
+        equal to the results of double_conversion with the same rates, taken from the same PaymentTable.
+
+        Parameters
+        ----------
+        from_codes, amounts, to_codes, card_types
+            sequences of owned currencies, amounts of target currencies, target currencies and card systems,
+            or a pandas DataFrame / pyarrow Table with columns from_currency, amount, to_currency, card_type
+            passed as from_codes
+        snapshot : RateSnapshot
+            rates to use, taken from the current source of rates by default
+        """
 
-    def __buy_european_with_european(self):
-        rate = self.__exchange()
-        return self.__divide_and_add_fee(
-            self.currency_pair.amount,
-            rate
-        )
+        # NumPy is only needed for batch work, keep it out of the import of the module
+        from converter.core import batch
 
-    def __buy_european_with_non_european(self):
-        if not self.__is_currency_EUR(is_currency_target=True):
-            dc_from_EUR = self.__divide_and_add_fee(
-                self.currency_pair.amount,
-                self.__exchange(from_currency='EUR')
-            )
-        else:
-            dc_from_EUR = self.currency_pair.amount
-
-        dc_from_USD = self.__divide_and_add_fee(
-            dc_from_EUR,
-            self.__exchange(from_currency='USD', to_currency='EUR')
-        )
+        if batch.is_table(from_codes):
+            from_codes, amounts, to_codes, card_types = batch.get_columns(from_codes, batch.PAYMENT_COLUMNS)
+        if snapshot is None:
+            snapshot = self.get_payment_table().snapshot
 
-        if not self.__is_currency_USD(is_currency_target=False):
-            result = self.__divide_and_add_fee(
-                dc_from_USD,
-                self.__exchange(to_currency='USD')
-            )
-        else:
-            result = dc_from_USD
-        return result
-
-    def __is_currency_EUR(self, *, is_currency_target: bool):
-        currency = self.__get_currency(is_currency_target)
-        return currency == 'EUR'
-
-    def __buy_non_european_with_non_european(self):
-        if not self.__is_currency_USD(is_currency_target=True):
-            dc_from_USD = self.__divide_and_add_fee(
-                self.currency_pair.amount,
-                self.__exchange(from_currency='USD')
-            )
-        else:
-            dc_from_USD = self.currency_pair.amount
-
-        if not self.__is_currency_USD(is_currency_target=False):
-            result = self.__divide_and_add_fee(
-                dc_from_USD,
-                self.__exchange(to_currency='USD')
-            )
-        else:
-            result = dc_from_USD
-
-        return result
-
-    def __is_currency_USD(self, *, is_currency_target: bool):
-        currency = self.__get_currency(is_currency_target)
-        return currency == 'USD'
-
-    def __get_currency(self, is_currency_target: bool):
-        return (
-            self.currency_pair.to_currency if
-            is_currency_target else
-            self.currency_pair.from_currency
+        return batch.double_conversion(
+            snapshot,
+            batch.codes_to_indices(snapshot, from_codes),
+            amounts,
+            batch.codes_to_indices(snapshot, to_codes),
+            card_types
         )
-
-    def __divide_and_add_fee(self, divisor, dividend):
-        fee = 1.03 if self.currency_pair.card_type == 'VISA' else 1.02
-        return (divisor / dividend) * fee
-
-    def __exchange(self, *, from_currency: str = '', to_currency: str = ''):
-        if from_currency:
-            original_from = self.currency_pair.from_currency
-            self.currency_pair.from_currency = from_currency
-        if to_currency:
-            original_to = self.currency_pair.to_currency
-            self.currency_pair.to_currency = to_currency
-        original_amount = self.currency_pair.amount
-        self.currency_pair.amount = 1
-
-        self.exchange()
-        result = self.currency_pair.result
-
-        if from_currency:
-            self.currency_pair.from_currency = original_from
-        if to_currency:
-            self.currency_pair.to_currency = original_to
-        self.currency_pair.amount = original_amount
-
-        return result
@@ -52,3 +52,20 @@ class NoSuchPairException(DatabaseException):
     '''Can't find provided pair in saved pairs table'''
 
     pass
+
+
+class NoSuchCurrencyException(ExchangeError):
+    '''Currency code isn't supported'''
+
+    pass
+
+
+class NoHistoricalRatesException(DatabaseException):
+    '''No snapshot of rates was stored before the requested time'''
+
+    def __init__(self, message='', *args):
+        super().__init__(message)
+
+    def get_default_message(self):
+        return ('There are no saved rates for this time.\n'
+               'History starts with the first refresh of your database.')
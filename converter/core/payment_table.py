@@ -0,0 +1,108 @@
+"""
+Effective multipliers of card payments, computed once per RateSnapshot.
+"""
+
+from types import MappingProxyType
+
+from converter.core.rate_snapshot import RateSnapshot
+from converter.core.trie import get_europe_currencies
+
+CARD_TYPES = ('MC', 'VISA')
+FEES = MappingProxyType({'MC': 1.02, 'VISA': 1.03})
+DECIMALS = 5
+
+
+class PaymentTable:
+    """
+    Amount of an owned currency needed to pay for 1 unit of a target currency with a card,
+    for every (from_currency, to_currency, card_type) of a snapshot.
+    The route of a payment (conversions through EUR or USD), the rates of every hop and the card fees
+    are resolved when the table is built, so a payment is one lookup and one multiplication.
+
+    Methods
+    -------
+    get_multiplier(from_currency, to_currency, card_type)
+        Returns the amount of from_currency paid for 1 unit of to_currency,
+        raises ValueError for a card type outside CARD_TYPES
+    quote(from_currency, to_currency, amount, card_type)
+        Returns the amount of from_currency paid for amount of to_currency
+    matrices()
+        Returns the multipliers as a NumPy array of shape (len(CARD_TYPES), n, n)
+    """
+
+    __slots__ = ('snapshot', 'multipliers', '__matrices')
+
+    def __init__(self, snapshot: RateSnapshot):
+        self.snapshot = snapshot
+        self.multipliers = MappingProxyType(self.__build())
+        self.__matrices = None
+
+    def get_multiplier(self, from_currency: str, to_currency: str, card_type: str) -> float:
+        try:
+            return self.multipliers[from_currency, to_currency, card_type]
+        except KeyError:
+            if card_type not in CARD_TYPES:
+                raise ValueError(f'Unknown card type {card_type}, expected one of {CARD_TYPES}') from None
+            raise
+
+    def quote(self, from_currency: str, to_currency: str, amount: float, card_type: str) -> float:
+        return amount * self.get_multiplier(from_currency, to_currency, card_type)
+
+    def matrices(self):
+        """
+        Returns a read-only array with array[card, i, j] = multiplier of codes[i], codes[j] and CARD_TYPES[card],
+        computed once per table.
+        """
+
+        if self.__matrices is None:
+            # NumPy is only needed for batch work, keep it out of the import of the module
+            import numpy as np
+
+            n = len(self.snapshot)
+            self.__matrices = np.fromiter(
+                self.multipliers.values(), dtype=np.float64, count=len(self.multipliers)
+            ).reshape(len(CARD_TYPES), n, n)
+            self.__matrices.setflags(write=False)
+        return self.__matrices
+
+    def __build(self) -> dict[tuple[str, str, str], float]:
+        """
+        Follows CurrencyConverterDoubleConversion routes for an amount of 1:
+        MC pays for European currencies from EUR and for the others through EUR,
+        VISA pays for European currencies through EUR and USD and for the others through USD.
+        Every hop rate is rounded as CurrencyPair.set_result rounds an exchanged rate.
+        Keys are ordered by card type, owned currency and target currency.
+        """
+
+        codes, indices, rates = self.snapshot.codes, self.snapshot.indices, self.snapshot.rates
+        europe_currencies = get_europe_currencies()
+
+        def hop(from_currency: str, to_currency: str) -> float:
+            return round(rates[indices[to_currency]] / rates[indices[from_currency]], DECIMALS)
+
+        from_eur = {code: hop('EUR', code) for code in codes}
+        to_eur = {code: hop(code, 'EUR') for code in codes}
+        from_usd = {code: hop('USD', code) for code in codes}
+        to_usd = {code: hop(code, 'USD') for code in codes}
+        usd_to_eur = hop('USD', 'EUR')
+
+        multipliers = {}
+        for card_type in CARD_TYPES:
+            fee = FEES[card_type]
+            for from_currency in codes:
+                for to_currency in codes:
+                    european = to_currency in europe_currencies
+                    if card_type == 'MC' and not european:
+                        dc_from_eur = 1 if from_currency == 'EUR' else (1 / from_eur[to_currency]) * fee
+                        multiplier = (dc_from_eur / to_eur[from_currency]) * fee
+                    elif card_type == 'MC':
+                        multiplier = (1 / hop(from_currency, to_currency)) * fee
+                    elif european:
+                        dc_from_eur = 1 if to_currency == 'EUR' else (1 / from_eur[to_currency]) * fee
+                        dc_from_usd = (dc_from_eur / usd_to_eur) * fee
+                        multiplier = dc_from_usd if from_currency == 'USD' else (dc_from_usd / to_usd[from_currency]) * fee
+                    else:
+                        dc_from_usd = 1 if to_currency == 'USD' else (1 / from_usd[to_currency]) * fee
+                        multiplier = dc_from_usd if from_currency == 'USD' else (dc_from_usd / to_usd[from_currency]) * fee
+                    multipliers[from_currency, to_currency, card_type] = multiplier
+        return multipliers
@@ -0,0 +1,65 @@
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import datetime
+
+from converter.core.exceptions import NoHistoricalRatesException
+from converter.core.rate_snapshot import RateSnapshot
+from converter.db.db import DBHandler
+
+
+class RateHistory:
+    """
+    Point-in-time rates from the rate_history table, every refresh of the database appends one snapshot.
+
+    Timestamps of stored snapshots are kept in memory, sorted, and a snapshot as of a moment
+    is found by a binary search over them. The index only reloads newer rows of the table when asked
+    about a moment after its last snapshot, and up to cache_size decoded snapshots are kept.
+
+    Methods
+    -------
+    snapshot_as_of(moment)
+        Returns the last snapshot taken at or before the moment
+    append(snapshot)
+        Stores a snapshot of a refresh
+    """
+
+    def __init__(self, path_to_db: str = '', cache_size: int = 8):
+        self.path_to_db = path_to_db
+        self.cache_size = cache_size
+        self.timestamps = []
+        self.snapshot_ids = []
+        self.__snapshots = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def snapshot_as_of(self, moment: float | datetime) -> RateSnapshot:
+        if isinstance(moment, datetime):
+            moment = moment.timestamp()
+
+        with self.__lock:
+            if not self.timestamps or moment >= self.timestamps[-1]:
+                self.__load_newer_timestamps()
+            position = bisect_right(self.timestamps, moment)
+            if position == 0:
+                raise NoHistoricalRatesException
+            return self.__get_snapshot(self.snapshot_ids[position - 1])
+
+    def append(self, snapshot: RateSnapshot) -> bool:
+        return DBHandler(self.path_to_db).append_snapshot_to_history(snapshot)
+
+    def __load_newer_timestamps(self):
+        after = self.timestamps[-1] if self.timestamps else float('-inf')
+        for snapshot_id, timestamp in DBHandler(self.path_to_db).get_history_timestamps(after):
+            self.snapshot_ids.append(snapshot_id)
+            self.timestamps.append(timestamp)
+
+    def __get_snapshot(self, snapshot_id: int) -> RateSnapshot:
+        snapshot = self.__snapshots.get(snapshot_id)
+        if snapshot is None:
+            snapshot = DBHandler(self.path_to_db).get_snapshot_from_history(snapshot_id)
+            self.__snapshots[snapshot_id] = snapshot
+            if len(self.__snapshots) > self.cache_size:
+                self.__snapshots.popitem(last=False)
+        else:
+            self.__snapshots.move_to_end(snapshot_id)
+        return snapshot
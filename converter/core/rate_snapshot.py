@@ -0,0 +1,89 @@
+from types import MappingProxyType
+from typing import Iterator
+
+
+class RateSnapshot:
+    """
+    Rates of all currencies against one base currency, taken at one moment.
+    Every cross rate is derived from this single vector as rate[to] / rate[from],
+    so one table of 162 rates replaces 26,082 stored pairs.
+
+    Methods
+    -------
+    get_rate(from_currency, to_currency)
+        Returns the cross rate for a pair of currencies
+    get_rates(from_currency)
+        Returns rates of all currencies against from_currency, in the format of the API
+    iter_pairs()
+        Yields (from_currency, to_currency, rate) for every pair of different currencies
+    matrix()
+        Returns a dense NumPy matrix of all cross rates, matrix[from, to]
+    payment_table()
+        Returns multipliers of card payments for every pair of currencies
+    """
+
+    __slots__ = ('base_currency', 'timestamp', 'codes', 'indices', 'rates', '__matrix', '__payment_table')
+
+    def __init__(self, rates: dict[str, float], base_currency: str = 'USD', timestamp: float = 0):
+        self.base_currency = base_currency
+        self.timestamp = timestamp
+        self.codes = tuple(rates)
+        self.indices = MappingProxyType({code: i for i, code in enumerate(self.codes)})
+        self.rates = tuple(float(rate) for rate in rates.values())
+        self.__matrix = None
+        self.__payment_table = None
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __contains__(self, currency_code: str) -> bool:
+        return currency_code in self.indices
+
+    def get_rate(self, from_currency: str, to_currency: str) -> float:
+        return self.rates[self.indices[to_currency]] / self.rates[self.indices[from_currency]]
+
+    def get_rates(self, from_currency: str) -> dict[str, float]:
+        """
+        Returns {currency code : rate} against from_currency, with from_currency first as the API does.
+        """
+
+        from_rate = self.rates[self.indices[from_currency]]
+        rates = {from_currency: 1.0}
+        for code, rate in zip(self.codes, self.rates):
+            if code != from_currency:
+                rates[code] = rate / from_rate
+        return rates
+
+    def iter_pairs(self) -> Iterator[tuple[str, str, float]]:
+        for from_currency, from_rate in zip(self.codes, self.rates):
+            for to_currency, to_rate in zip(self.codes, self.rates):
+                if from_currency != to_currency:
+                    yield from_currency, to_currency, to_rate / from_rate
+
+    def matrix(self):
+        """
+        Returns a read-only matrix of shape (n, n) with matrix[i, j] = rate of codes[j] for 1 unit of codes[i].
+        Rows and columns follow self.codes, use self.indices to map codes to positions.
+        The matrix is computed once per snapshot.
+        """
+
+        if self.__matrix is None:
+            # NumPy is only needed for batch work, keep it out of the import of the module
+            import numpy as np
+
+            vector = np.asarray(self.rates, dtype=np.float64)
+            matrix = vector[np.newaxis, :] / vector[:, np.newaxis]
+            matrix.setflags(write=False)
+            self.__matrix = matrix
+        return self.__matrix
+
+    def payment_table(self):
+        """
+        Returns the PaymentTable of the snapshot, built on the first call.
+        """
+
+        if self.__payment_table is None:
+            from converter.core.payment_table import PaymentTable
+
+            self.__payment_table = PaymentTable(self)
+        return self.__payment_table
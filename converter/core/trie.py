@@ -1,25 +1,62 @@
-import pandas as pd
+import csv
+import os
+from functools import cache
+from types import MappingProxyType
 
 
-url_currencies_short = 'https://drive.google.com/uc?id=1LFQO13AVf4U0LXOzKEycRYL0gKx3tv1m'
-CURRENCIES_SHORT = pd.read_csv(url_currencies_short)
+PATH_TO_CURRENCIES_SHORT = os.path.join(os.path.dirname(__file__), 'data', 'currencies.csv')
+PATH_TO_EUROPE_CURRENCIES = os.path.join(os.path.dirname(__file__), 'data', 'europe_currencies.csv')
 
-url_europe_currencies = 'https://drive.google.com/uc?id=1JRSbtOFZ54PPCo55qwA4FfPKjw31NRY5'
-EUROPE_CURRENCIES = pd.read_csv(url_europe_currencies)
+
+@cache
+def get_currencies_short() -> dict[str, tuple[str, ...]]:
+    """
+    Returns the bundled table of supported currencies as columns {'Country': (...), 'AlphabeticCode': (...)}.
+    The file is read on the first call only.
+    """
+
+    return read_columns(PATH_TO_CURRENCIES_SHORT)
+
+
+@cache
+def get_europe_currencies() -> frozenset[str]:
+    """
+    Returns alphabetic codes of European currencies. The file is read on the first call only.
+    """
+
+    return frozenset(read_columns(PATH_TO_EUROPE_CURRENCIES)['AlphabeticCode'])
+
+
+def read_columns(path: str) -> dict[str, tuple[str, ...]]:
+    with open(path, newline='', encoding='utf-8') as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        columns = zip(*reader)
+        return dict(zip(header, columns))
 
 
 def prepare_and_get_word_searcher():
+    currencies_short = get_currencies_short()
     word_searcher = Trie()
-    for country in CURRENCIES_SHORT['Country']:
+    for country in currencies_short['Country']:
         word_searcher.add_word(country.lower())
-    for code in CURRENCIES_SHORT['AlphabeticCode']:
+    for code in currencies_short['AlphabeticCode']:
         word_searcher.add_word(code)
-    for country, code in zip(CURRENCIES_SHORT['Country'], CURRENCIES_SHORT['AlphabeticCode']):
+    for country, code in zip(currencies_short['Country'], currencies_short['AlphabeticCode']):
         word_searcher.currencies_dict[country.lower()] = code
 
     return word_searcher
 
 
+@cache
+def get_currency_resolver() -> 'CurrencyResolver':
+    """
+    Returns the process-wide CurrencyResolver, building it on the first call only.
+    """
+
+    return CurrencyResolver(prepare_and_get_word_searcher())
+
+
 class TrieNode:
     """
     Node of the trie, used to store one letter of processed words.
@@ -105,4 +142,49 @@ class Trie:
         return answer
 
     def __get_code_with_country_name(self, country_name: str) -> str:
-        return self.currencies_dict.get(country_name)
\ No newline at end of file
+        return self.currencies_dict.get(country_name)
+
+
+class CurrencyResolver:
+    """
+    Immutable resolver of inputted currencies, shared by all CurrencyPair objects.
+    Built once from a filled Trie: every prefix of every stored word is resolved with the trie in advance,
+    so resolving a code is a dictionary lookup instead of a walk through the tree.
+
+    Methods
+    -------
+    get_code(prefix)
+        Returns an alphabetic currency code for a code, a country's name or a prefix of them
+    """
+
+    __slots__ = ('__codes', '__prefixes')
+
+    def __init__(self, word_searcher: Trie):
+        codes = {}
+        prefixes = {}
+        for word in self.__get_words(word_searcher.root):
+            if word.isupper():
+                codes[word] = word
+            for i in range(len(word) + 1):
+                prefix = word[:i]
+                if prefix not in prefixes:
+                    prefixes[prefix] = word_searcher.get_code(prefix)
+
+        self.__codes = MappingProxyType(codes)
+        self.__prefixes = MappingProxyType(prefixes)
+
+    def get_code(self, prefix: str) -> str:
+        code = self.__codes.get(prefix)
+        if code is not None:
+            return code
+        return self.__prefixes.get(prefix, '')
+
+    @staticmethod
+    def __get_words(root: TrieNode):
+        stack = [('', root)]
+        while stack:
+            word, node = stack.pop()
+            if node.end:
+                yield word
+            for ch, child in node.children.items():
+                stack.append((word + ch, child))
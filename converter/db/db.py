@@ -1,49 +1,284 @@
+import json
 import os
 import sqlite3 as sql
+import sys
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from typing import Iterable
 
 from converter.core.exceptions import (
     DatabaseNotExistError,
     EmptySavedPairsTableException,
     NoSuchPairException
 )
+from converter.core.rate_snapshot import RateSnapshot
 from converter.db import queries
 
 
+JOURNAL_MODES = ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF')
+SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+CACHED_STATEMENTS = 256
+# most pairs resolved by one statement of get_rates_from_db, fewer when the limit of variables of SQLite is lower
+PAIRS_PER_STATEMENT = 5000
+# variables of one pair in GET_RATES_OF_PAIRS: position, from_currency, to_currency
+VARIABLES_PER_PAIR = 3
+# limit of variables of SQLite before 3.32, used when the connection can't tell its own
+DEFAULT_VARIABLE_LIMIT = 999
+
+# Every migration moves a database of the previous PRAGMA user_version to the next one,
+# databases created before versioning have user_version 0.
+MIGRATIONS = (
+    (
+        # prepared_currencies keyed by the pair in a WITHOUT ROWID table, a lookup is one probe of its b-tree
+        queries.DROP_TABLE_PREPARED_CURRENCIES_MIGRATED,
+        queries.CREATE_TABLE_PREPARED_CURRENCIES_MIGRATED,
+        queries.COPY_PREPARED_CURRENCIES_TO_MIGRATED,
+        queries.DROP_TABLE_PREPARED_CURRENCIES,
+        queries.RENAME_PREPARED_CURRENCIES_MIGRATED
+    ),
+    (
+        queries.CREATE_TABLE_TABLE_METADATA,
+    ),
+)
+SCHEMA_VERSION = len(MIGRATIONS)
+
+_connections = threading.local()
+
+
+def get_connection(path_to_db: str) -> sql.Connection:
+    """
+    Returns the connection of the current thread to the database, opens it on the first call
+    or when the cached one was closed.
+    All DBHandler objects of a thread share it together with its cache of prepared statements.
+    The connection may be handed over to another thread, as the refresh does with its writer thread.
+    """
+
+    connections = _connections.__dict__.setdefault('by_path', {})
+    connect = connections.get(path_to_db)
+    if connect is not None:
+        try:
+            connect.total_changes
+        except sql.ProgrammingError:
+            # closed directly instead of by DBHandler.close, a new connection replaces it
+            connect = None
+    if connect is None:
+        connect = sql.connect(path_to_db, check_same_thread=False, cached_statements=CACHED_STATEMENTS)
+        connections[path_to_db] = connect
+    return connect
+
+
+def close_connection(path_to_db: str):
+    connect = _connections.__dict__.get('by_path', {}).pop(path_to_db, None)
+    if connect is not None:
+        connect.close()
+
+
 class DBHandler:
+    """
+    Access to the rates database. Handlers of one thread share one connection, see get_connection.
+    """
 
-    def __init__(self):
+    def __init__(self, path_to_db: str = ''):
+        self.path_to_db = path_to_db
         self.connect, self.c = self.__connect_to_db()
 
     def __connect_to_db(self) -> sql.Connection | sql.Cursor:
-        connect = sql.connect(self.get_path_to_db())
+        connect = get_connection(self.get_path_to_db())
         c = connect.cursor()
         return (connect, c)
 
+    def close(self):
+        close_connection(self.get_path_to_db())
+
     def get_path_to_db(self) -> str:
-        return os.path.abspath('data\\rates.db')
+        return self.path_to_db or os.path.abspath(os.path.join('data', 'rates.db'))
 
     def prepared_currencies_exist_and_complete(self) -> bool:
         self.db_file_exists()
-        if self.get_last_pair_id() == 26082:
-            return True
+        try:
+            # brings databases of older versions up to date, tables they miss are created empty
+            self.create_tables()
+            if self.get_count_of_base_rates() or self.__get_metadata_of_prepared_currencies()[1]:
+                return True
+        except sql.OperationalError:
+            raise DatabaseNotExistError
         return False
 
-    def get_last_pair_id(self):
+    def get_count_of_base_rates(self) -> int:
         self.c.execute(
-            queries.GET_LAST_PAIR_FROM_PREPARED_CURRENCIES
+            queries.GET_COUNT_OF_BASE_RATES
         )
         return self.c.fetchone()[0]
 
+    def get_count_of_prepared_currencies(self) -> int:
+        """
+        Returns the number of stored direct quotes as recorded by the last write of prepared_currencies.
+        """
+
+        return self.__get_metadata_of_prepared_currencies()[0]
+
+    def __get_metadata_of_prepared_currencies(self) -> tuple[int, bool]:
+        row = self.c.execute(queries.GET_METADATA_OF_TABLE, ('prepared_currencies',)).fetchone()
+        if row is None:
+            return 0, False
+        return row[0], bool(row[1])
+
+    def update_metadata_of_prepared_currencies(self):
+        """
+        Records the number of rows of prepared_currencies and whether every stored currency
+        is quoted against every other one, writers of the table do it in their transactions.
+        """
+
+        with self.connect:
+            self.__refresh_metadata_of_prepared_currencies()
+
+    def __refresh_metadata_of_prepared_currencies(self):
+        self.c.execute(
+            queries.REFRESH_METADATA_OF_PREPARED_CURRENCIES,
+            (time.time(),)
+        )
+
     def db_file_exists(self):
-        if not 'rates.db' in os.listdir('data'):
+        if not os.path.exists(self.get_path_to_db()):
             raise DatabaseNotExistError
 
     def get_rate_from_db(self, currencies: tuple) -> float:
+        """
+        Returns a direct quote of the pair if it was stored, otherwise derives the rate from the base rates.
+        """
+
         self.c.execute(
             queries.GET_RATE,
             currencies
         )
-        return self.c.fetchone()[0]
+        rate = self.c.fetchone()
+        if rate is None:
+            self.c.execute(
+                queries.GET_CROSS_RATE,
+                currencies
+            )
+            rate = self.c.fetchone()
+        return rate[0]
+
+    def get_rates_from_db(self, pairs: Iterable[tuple[str, str]]) -> list[float | None]:
+        """
+        Returns rates of many pairs (from_currency, to_currency) in input order, resolved as get_rate_from_db does.
+        The pairs are joined with prepared_currencies and base_rates in one statement per get_pairs_per_statement()
+        pairs, a rate is None for a pair the database can't resolve.
+        """
+
+        pairs = list(pairs)
+        pairs_per_statement = self.get_pairs_per_statement()
+        rates = []
+        for start in range(0, len(pairs), pairs_per_statement):
+            chunk = pairs[start:start + pairs_per_statement]
+            parameters = [
+                value
+                for position, (from_currency, to_currency) in enumerate(chunk)
+                for value in (position, from_currency, to_currency)
+            ]
+            self.c.execute(
+                queries.GET_RATES_OF_PAIRS.format(', '.join(['(?, ?, ?)'] * len(chunk))),
+                parameters
+            )
+            rates.extend(rate for rate, in self.c.fetchall())
+        return rates
+
+    def get_pairs_per_statement(self) -> int:
+        """
+        Returns the number of pairs get_rates_from_db binds in one statement,
+        up to PAIRS_PER_STATEMENT and within the limit of variables of the connection.
+        """
+
+        # Connection.getlimit is new in Python 3.11
+        if hasattr(self.connect, 'getlimit'):
+            variable_limit = self.connect.getlimit(sql.SQLITE_LIMIT_VARIABLE_NUMBER)
+        else:
+            variable_limit = DEFAULT_VARIABLE_LIMIT
+        return max(1, min(PAIRS_PER_STATEMENT, variable_limit // VARIABLES_PER_PAIR))
+
+    def get_rates_of_base_from_db(self, from_currency: str) -> dict[str, float]:
+        """
+        Returns {currency code : rate} of every currency against from_currency in one query,
+        direct quotes where they are stored, otherwise derived from the base rates.
+        """
+
+        self.c.execute(
+            queries.GET_RATES_OF_BASE,
+            {'from_currency': from_currency}
+        )
+        return dict(self.c.fetchall())
+
+    def get_rate_snapshot(self) -> RateSnapshot:
+        """
+        Returns the base rates as a RateSnapshot. A database without base rates, as written by
+        refreshes of older versions, gives the direct quotes against USD instead.
+        """
+
+        try:
+            rates = (
+                self.c.execute(queries.GET_BASE_RATES).fetchall()
+                or self.c.execute(queries.GET_BASE_RATES_FROM_PREPARED_CURRENCIES).fetchall()
+            )
+        except sql.OperationalError:
+            raise DatabaseNotExistError
+        if not rates:
+            raise DatabaseNotExistError
+        return RateSnapshot(dict(rates))
+
+    def append_snapshot_to_history(self, snapshot: RateSnapshot) -> bool:
+        """
+        Appends the snapshot to rate_history as one block: codes joined by commas
+        and rates packed as a little-endian float64 vector. A snapshot with a stored timestamp is skipped.
+        Returns True if the snapshot was appended.
+        """
+
+        rates = array('d', snapshot.rates)
+        if sys.byteorder != 'little':
+            rates.byteswap()
+        with self.connect:
+            self.c.execute(
+                queries.INSERT_SNAPSHOT_IN_RATE_HISTORY,
+                (snapshot.timestamp, snapshot.base_currency, ','.join(snapshot.codes), rates.tobytes())
+            )
+        return self.c.rowcount == 1
+
+    def get_history_timestamps(self, after: float = float('-inf')) -> list[tuple[int, float]]:
+        """
+        Returns (snapshot id, timestamp) of stored snapshots newer than after, ordered by timestamp.
+        """
+
+        try:
+            return self.c.execute(queries.GET_TIMESTAMPS_FROM_RATE_HISTORY, (after,)).fetchall()
+        except sql.OperationalError:
+            raise DatabaseNotExistError
+
+    def get_snapshot_from_history(self, snapshot_id: int) -> RateSnapshot:
+        row = self.c.execute(queries.GET_SNAPSHOT_FROM_RATE_HISTORY, (snapshot_id,)).fetchone()
+        if row is None:
+            raise DatabaseNotExistError
+        timestamp, base_currency, codes, blob = row
+        rates = array('d')
+        rates.frombytes(blob)
+        if sys.byteorder != 'little':
+            rates.byteswap()
+        return RateSnapshot(dict(zip(codes.split(','), rates)), base_currency, timestamp)
+
+    def replace_base_rates(self, rates: dict):
+        """
+        Replaces the stored base rates with rates {currency code : rate} in one transaction.
+        """
+
+        with self.connect:
+            self.c.execute(
+                queries.DELETE_ALL_FROM_BASE_RATES
+            )
+            self.c.executemany(
+                queries.INSERT_BASE_RATE,
+                rates.items()
+            )
 
     def get_saved_currencies(self) -> list:
         pairs = self.c.execute(queries.GET_SAVED_CURRENCIES).fetchall()
@@ -57,8 +292,177 @@ class DBHandler:
             queries.INSERT_PAIR_IN_PREPARED_CURRENCIES,
             tuple_to_insert
         )
+        self.__refresh_metadata_of_prepared_currencies()
         self.connect.commit()
 
+    def insert_pairs_in_prepared_currencies(self, tuples_to_insert: Iterable[tuple]) -> int:
+        """
+        Inserts rows (from_currency, to_currency, rate) in one transaction.
+        Returns the number of inserted rows.
+        """
+
+        with self.connect:
+            self.c.executemany(
+                queries.INSERT_PAIR_IN_PREPARED_CURRENCIES,
+                tuples_to_insert
+            )
+            inserted_rows = self.c.rowcount
+            self.__refresh_metadata_of_prepared_currencies()
+        return inserted_rows
+
+    def upsert_rates_of_base(
+            self,
+            from_currency: str,
+            rates: Iterable[tuple[str, float]],
+            time_last_update: float | None,
+            time_next_update: float | None,
+            fetched_at: float
+    ) -> int:
+        """
+        Writes rates (to_currency, rate) of from_currency to prepared_currencies and the times of the provider
+        to fetched_bases in one transaction. Only new pairs and pairs with a changed rate are written.
+        Returns the number of written pairs.
+        """
+
+        rows = (
+            (from_currency, to_currency, rate)
+            for to_currency, rate in rates
+            if to_currency != from_currency
+        )
+        with self.connect:
+            self.c.executemany(
+                queries.UPSERT_PAIR_IN_PREPARED_CURRENCIES,
+                rows
+            )
+            touched_rows = max(self.c.rowcount, 0)
+            self.c.execute(
+                queries.UPSERT_FETCHED_BASE,
+                (from_currency, time_last_update, time_next_update, fetched_at)
+            )
+        return touched_rows
+
+    def get_fetched_bases(self) -> dict[str, tuple[float | None, float | None]]:
+        """
+        Returns {currency code : (time_last_update, time_next_update)} of the provider for every fetched base.
+        """
+
+        rows = self.c.execute(queries.GET_FETCHED_BASES).fetchall()
+        return {currency: (time_last_update, time_next_update) for currency, time_last_update, time_next_update in rows}
+
+    def delete_currencies_not_listed(self, list_of_currencies: Iterable[str]) -> int:
+        """
+        Deletes pairs of prepared_currencies and fetched bases of currencies missing in list_of_currencies,
+        as when the provider stops quoting a currency, in one transaction. Returns the number of deleted pairs.
+        """
+
+        currencies = {'currencies': json.dumps(list(list_of_currencies))}
+        with self.connect:
+            self.c.execute(
+                queries.DELETE_PAIRS_OF_UNLISTED_CURRENCIES,
+                currencies
+            )
+            deleted_rows = self.c.rowcount
+            self.c.execute(
+                queries.DELETE_UNLISTED_FETCHED_BASES,
+                currencies
+            )
+        return deleted_rows
+
+    def delete_all_from_fetched_bases(self):
+        self.c.execute(
+            queries.DELETE_ALL_FROM_FETCHED_BASES
+        )
+        self.connect.commit()
+
+    def create_staging_prepared_currencies(self):
+        """
+        Creates an empty staging copy of prepared_currencies, a new refresh is loaded into it
+        while readers still use the previous table.
+        """
+
+        with self.connect:
+            self.c.execute(
+                queries.DROP_TABLE_PREPARED_CURRENCIES_STAGING
+            )
+            self.c.execute(
+                queries.CREATE_TABLE_PREPARED_CURRENCIES_STAGING
+            )
+
+    def insert_pairs_in_staging_prepared_currencies(self, tuples_to_insert: Iterable[tuple]) -> int:
+        with self.connect:
+            self.c.executemany(
+                queries.INSERT_PAIR_IN_PREPARED_CURRENCIES_STAGING,
+                tuples_to_insert
+            )
+        return self.c.rowcount
+
+    def swap_in_staging_prepared_currencies(self, base_rates: dict):
+        """
+        Replaces prepared_currencies with the loaded staging table and the base rates with base_rates
+        in one transaction, so readers see either the previous or the new rates, never a part of them.
+        """
+
+        self.connect.commit()
+        self.c.execute(queries.BEGIN_IMMEDIATE)
+        try:
+            self.c.execute(
+                queries.DELETE_ALL_FROM_BASE_RATES
+            )
+            self.c.executemany(
+                queries.INSERT_BASE_RATE,
+                base_rates.items()
+            )
+            self.c.execute(
+                queries.DROP_TABLE_PREPARED_CURRENCIES
+            )
+            self.c.execute(
+                queries.RENAME_PREPARED_CURRENCIES_STAGING
+            )
+            self.__refresh_metadata_of_prepared_currencies()
+        except sql.Error:
+            self.connect.rollback()
+            raise
+        self.connect.commit()
+
+    def enable_write_ahead_log(self):
+        """
+        Switches the database to WAL journal mode, so readers don't block on a refresh and vice versa.
+        The mode is stored in the database file.
+        """
+
+        self.connect.commit()
+        self.c.execute(queries.SET_JOURNAL_MODE.format('WAL'))
+
+    @contextmanager
+    def bulk_load(self, journal_mode: str = 'WAL', synchronous: str = 'NORMAL'):
+        """
+        Switches journal and synchronous modes of the database for the time of a bulk load,
+        restores the previous modes afterwards.
+
+        Parameters
+        ----------
+        journal_mode : str
+            one of JOURNAL_MODES
+        synchronous : str
+            one of SYNCHRONOUS_MODES
+        """
+
+        journal_mode, synchronous = journal_mode.upper(), synchronous.upper()
+        if journal_mode not in JOURNAL_MODES or synchronous not in SYNCHRONOUS_MODES:
+            raise ValueError(f'Unknown journal mode {journal_mode} or synchronous mode {synchronous}')
+
+        self.connect.commit()
+        previous_journal_mode = self.c.execute(queries.GET_JOURNAL_MODE).fetchone()[0]
+        previous_synchronous = self.c.execute(queries.GET_SYNCHRONOUS).fetchone()[0]
+        self.c.execute(queries.SET_JOURNAL_MODE.format(journal_mode))
+        self.c.execute(queries.SET_SYNCHRONOUS.format(synchronous))
+        try:
+            yield self
+        finally:
+            self.connect.commit()
+            self.c.execute(queries.SET_SYNCHRONOUS.format(previous_synchronous))
+            self.c.execute(queries.SET_JOURNAL_MODE.format(previous_journal_mode))
+
     def insert_new_pair_in_saved_currencies(self, currencies_with_amount: tuple):
         self.c.execute(
             queries.INSERT_NEW_PAIR_IN_SAVED_CURRENCIES,
@@ -66,6 +470,39 @@ class DBHandler:
         )
         self.connect.commit()
 
+    def create_tables(self):
+        self.create_table_saved_currencies()
+        self.create_table_prepared_currencies()
+        self.create_table_base_rates()
+        self.create_table_fetched_bases()
+        self.create_table_rate_history()
+        self.create_table_table_metadata()
+        self.migrate()
+
+    def migrate(self):
+        """
+        Applies MIGRATIONS the database hasn't got yet, every one in its own transaction
+        together with the new PRAGMA user_version.
+        """
+
+        self.connect.commit()
+        if self.c.execute(queries.GET_USER_VERSION).fetchone()[0] >= SCHEMA_VERSION:
+            return
+
+        self.c.execute(queries.BEGIN_IMMEDIATE)
+        try:
+            # another connection may have migrated the database meanwhile
+            version = self.c.execute(queries.GET_USER_VERSION).fetchone()[0]
+            for version, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+                for statement in statements:
+                    self.c.execute(statement)
+                self.c.execute(queries.SET_USER_VERSION.format(version))
+            self.__refresh_metadata_of_prepared_currencies()
+        except sql.Error:
+            self.connect.rollback()
+            raise
+        self.connect.commit()
+
     def create_table_saved_currencies(self):
         self.c.execute(
             queries.CREATE_TABLE_SAVED_CURRENCIES
@@ -77,6 +514,30 @@ class DBHandler:
         )
         self.connect.commit()
 
+    def create_table_base_rates(self):
+        self.c.execute(
+            queries.CREATE_TABLE_BASE_RATES
+        )
+        self.connect.commit()
+
+    def create_table_fetched_bases(self):
+        self.c.execute(
+            queries.CREATE_TABLE_FETCHED_BASES
+        )
+        self.connect.commit()
+
+    def create_table_table_metadata(self):
+        self.c.execute(
+            queries.CREATE_TABLE_TABLE_METADATA
+        )
+        self.connect.commit()
+
+    def create_table_rate_history(self):
+        self.c.execute(
+            queries.CREATE_TABLE_RATE_HISTORY
+        )
+        self.connect.commit()
+
     def try_delete_saved_pair(self, currencies: tuple):
         self.get_pair_from_saved_currencies(currencies)
         self.c.execute(
@@ -99,8 +560,12 @@ class DBHandler:
         self.c.execute(
             queries.DELETE_ALL_FROM_PREPARED_CURRENCIES
         )
+        self.__refresh_metadata_of_prepared_currencies()
         self.connect.commit()
 
+    def vacuum(self):
+        self.c.execute('VACUUM')
+
     def delete_all_from_saved_currencies(self):
         self.c.execute(
             queries.DELETE_ALL_FROM_SAVED_CURRENCIES
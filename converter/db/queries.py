@@ -1,11 +1,92 @@
 CREATE_TABLE_PREPARED_CURRENCIES = '''
     CREATE TABLE IF NOT EXISTS prepared_currencies (
-    id INTEGER PRIMARY KEY,
-    from_currency STRING,
-    to_currency STRING,
+    from_currency TEXT NOT NULL,
+    to_currency TEXT NOT NULL,
     rate REAL,
-    UNIQUE(from_currency, to_currency)
-    )
+    PRIMARY KEY (from_currency, to_currency)
+    ) WITHOUT ROWID
+'''
+
+CREATE_TABLE_PREPARED_CURRENCIES_STAGING = '''
+    CREATE TABLE prepared_currencies_staging (
+    from_currency TEXT NOT NULL,
+    to_currency TEXT NOT NULL,
+    rate REAL,
+    PRIMARY KEY (from_currency, to_currency)
+    ) WITHOUT ROWID
+'''
+
+CREATE_TABLE_TABLE_METADATA = '''
+    CREATE TABLE IF NOT EXISTS table_metadata (
+    table_name TEXT PRIMARY KEY,
+    row_count INTEGER,
+    complete INTEGER,
+    updated_at REAL
+    ) WITHOUT ROWID
+'''
+
+REFRESH_METADATA_OF_PREPARED_CURRENCIES = '''
+    INSERT INTO
+    table_metadata (table_name, row_count, complete, updated_at)
+    SELECT 'prepared_currencies', count(*),
+    count(*) > 0 AND count(*) = count(DISTINCT from_currency) * (count(DISTINCT from_currency) - 1),
+    (?)
+    FROM prepared_currencies
+    WHERE true
+    ON CONFLICT (table_name) DO UPDATE
+    SET row_count = excluded.row_count,
+    complete = excluded.complete,
+    updated_at = excluded.updated_at
+'''
+
+GET_METADATA_OF_TABLE = '''
+    SELECT row_count, complete FROM table_metadata
+    WHERE table_name = (?)
+'''
+
+GET_USER_VERSION = '''
+    PRAGMA user_version
+'''
+
+SET_USER_VERSION = '''
+    PRAGMA user_version = {:d}
+'''
+
+DROP_TABLE_PREPARED_CURRENCIES_MIGRATED = '''
+    DROP TABLE IF EXISTS prepared_currencies_migrated
+'''
+
+CREATE_TABLE_PREPARED_CURRENCIES_MIGRATED = '''
+    CREATE TABLE prepared_currencies_migrated (
+    from_currency TEXT NOT NULL,
+    to_currency TEXT NOT NULL,
+    rate REAL,
+    PRIMARY KEY (from_currency, to_currency)
+    ) WITHOUT ROWID
+'''
+
+COPY_PREPARED_CURRENCIES_TO_MIGRATED = '''
+    INSERT OR IGNORE INTO
+    prepared_currencies_migrated (from_currency, to_currency, rate)
+    SELECT from_currency, to_currency, rate FROM prepared_currencies
+    WHERE from_currency IS NOT NULL
+    AND to_currency IS NOT NULL
+'''
+
+RENAME_PREPARED_CURRENCIES_MIGRATED = '''
+    ALTER TABLE prepared_currencies_migrated RENAME TO prepared_currencies
+'''
+
+DROP_TABLE_PREPARED_CURRENCIES_STAGING = '''
+    DROP TABLE IF EXISTS prepared_currencies_staging
+'''
+
+DROP_TABLE_PREPARED_CURRENCIES = '''
+    DROP TABLE IF EXISTS prepared_currencies
+'''
+
+RENAME_PREPARED_CURRENCIES_STAGING = '''
+    ALTER TABLE prepared_currencies_staging RENAME TO prepared_currencies
 '''
 
 CREATE_TABLE_SAVED_CURRENCIES = '''
@@ -18,14 +99,115 @@ CREATE_TABLE_SAVED_CURRENCIES = '''
     )
 '''
 
+CREATE_TABLE_BASE_RATES = '''
+    CREATE TABLE IF NOT EXISTS base_rates (
+    currency STRING PRIMARY KEY,
+    rate REAL
+    )
+'''
+
+CREATE_TABLE_FETCHED_BASES = '''
+    CREATE TABLE IF NOT EXISTS fetched_bases (
+    currency STRING PRIMARY KEY,
+    time_last_update REAL,
+    time_next_update REAL,
+    fetched_at REAL
+    )
+'''
+
+CREATE_TABLE_RATE_HISTORY = '''
+    CREATE TABLE IF NOT EXISTS rate_history (
+    snapshot_id INTEGER PRIMARY KEY,
+    timestamp REAL UNIQUE,
+    base_currency STRING,
+    codes STRING,
+    rates BLOB
+    )
+'''
+
 GET_RATE = '''
     SELECT rate FROM prepared_currencies 
     WHERE from_currency = (?) 
     AND to_currency = (?)
 '''
 
-GET_LAST_PAIR_FROM_PREPARED_CURRENCIES = '''
-    SELECT max(id) from prepared_currencies
+GET_CROSS_RATE = '''
+    SELECT to_base.rate / from_base.rate
+    FROM base_rates AS from_base, base_rates AS to_base
+    WHERE from_base.currency = (?)
+    AND to_base.currency = (?)
+'''
+
+GET_RATES_OF_PAIRS = '''
+    WITH requested (position, from_currency, to_currency) AS (
+    VALUES {}
+    )
+    SELECT coalesce(prepared.rate, to_base.rate / from_base.rate)
+    FROM requested
+    LEFT JOIN prepared_currencies AS prepared
+    ON prepared.from_currency = requested.from_currency
+    AND prepared.to_currency = requested.to_currency
+    LEFT JOIN base_rates AS from_base
+    ON from_base.currency = requested.from_currency
+    LEFT JOIN base_rates AS to_base
+    ON to_base.currency = requested.to_currency
+    ORDER BY requested.position
+'''
+
+GET_RATES_OF_BASE = '''
+    SELECT to_currency, rate FROM prepared_currencies
+    WHERE from_currency = :from_currency
+    UNION ALL
+    SELECT to_base.currency, to_base.rate / from_base.rate
+    FROM base_rates AS from_base, base_rates AS to_base
+    WHERE from_base.currency = :from_currency
+    AND NOT EXISTS (
+    SELECT 1 FROM prepared_currencies
+    WHERE from_currency = :from_currency
+    AND to_currency = to_base.currency
+    )
+'''
+
+GET_BASE_RATES = '''
+    SELECT currency, rate FROM base_rates
+'''
+
+GET_BASE_RATES_FROM_PREPARED_CURRENCIES = '''
+    SELECT 'USD', 1.0
+    WHERE EXISTS (SELECT 1 FROM prepared_currencies WHERE from_currency = 'USD')
+    UNION ALL
+    SELECT to_currency, rate FROM prepared_currencies
+    WHERE from_currency = 'USD' AND to_currency != 'USD'
+'''
+
+GET_COUNT_OF_BASE_RATES = '''
+    SELECT count(*) FROM base_rates
+'''
+
+INSERT_SNAPSHOT_IN_RATE_HISTORY = '''
+    INSERT OR IGNORE INTO
+    rate_history (timestamp, base_currency, codes, rates)
+    VALUES (?, ?, ?, ?)
+'''
+
+GET_TIMESTAMPS_FROM_RATE_HISTORY = '''
+    SELECT snapshot_id, timestamp FROM rate_history
+    WHERE timestamp > (?)
+    ORDER BY timestamp
+'''
+
+GET_SNAPSHOT_FROM_RATE_HISTORY = '''
+    SELECT timestamp, base_currency, codes, rates FROM rate_history
+    WHERE snapshot_id = (?)
+'''
+
+INSERT_BASE_RATE = '''
+    INSERT INTO base_rates (currency, rate)
+    VALUES (?, ?)
+'''
+
+DELETE_ALL_FROM_BASE_RATES = '''
+    DELETE FROM base_rates
 '''
 
 INSERT_PAIR_IN_PREPARED_CURRENCIES = '''
@@ -34,6 +216,51 @@ INSERT_PAIR_IN_PREPARED_CURRENCIES = '''
     VALUES (?, ?, ?)
 '''
 
+UPSERT_PAIR_IN_PREPARED_CURRENCIES = '''
+    INSERT INTO
+    prepared_currencies (from_currency, to_currency, rate)
+    VALUES (?, ?, ?)
+    ON CONFLICT (from_currency, to_currency) DO UPDATE
+    SET rate = excluded.rate
+    WHERE rate IS NOT excluded.rate
+'''
+
+GET_FETCHED_BASES = '''
+    SELECT currency, time_last_update, time_next_update
+    FROM fetched_bases
+'''
+
+UPSERT_FETCHED_BASE = '''
+    INSERT INTO
+    fetched_bases (currency, time_last_update, time_next_update, fetched_at)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT (currency) DO UPDATE
+    SET time_last_update = excluded.time_last_update,
+    time_next_update = excluded.time_next_update,
+    fetched_at = excluded.fetched_at
+'''
+
+DELETE_ALL_FROM_FETCHED_BASES = '''
+    DELETE FROM fetched_bases
+'''
+
+DELETE_PAIRS_OF_UNLISTED_CURRENCIES = '''
+    DELETE FROM prepared_currencies
+    WHERE from_currency NOT IN (SELECT value FROM json_each(:currencies))
+    OR to_currency NOT IN (SELECT value FROM json_each(:currencies))
+'''
+
+DELETE_UNLISTED_FETCHED_BASES = '''
+    DELETE FROM fetched_bases
+    WHERE currency NOT IN (SELECT value FROM json_each(:currencies))
+'''
+
+INSERT_PAIR_IN_PREPARED_CURRENCIES_STAGING = '''
+    INSERT INTO 
+    prepared_currencies_staging (from_currency, to_currency, rate)
+    VALUES (?, ?, ?)
+'''
+
 INSERT_NEW_PAIR_IN_SAVED_CURRENCIES = '''
     INSERT OR IGNORE INTO 
     saved_currencies (from_currency, to_currency, amount)
@@ -66,4 +293,22 @@ DELETE_ALL_FROM_PREPARED_CURRENCIES = '''
     DELETE FROM prepared_currencies
 '''
 
+BEGIN_IMMEDIATE = '''
+    BEGIN IMMEDIATE
+'''
+
+GET_JOURNAL_MODE = '''
+    PRAGMA journal_mode
+'''
 
+SET_JOURNAL_MODE = '''
+    PRAGMA journal_mode = {}
+'''
+
+GET_SYNCHRONOUS = '''
+    PRAGMA synchronous
+'''
+
+SET_SYNCHRONOUS = '''
+    PRAGMA synchronous = {}
+'''
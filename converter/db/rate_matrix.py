@@ -0,0 +1,175 @@
+"""
+Binary file of all rates of the database for read-heavy use, an alternative to lookups in SQLite.
+
+Layout, little-endian:
+    header   32 bytes: magic b'PLRM', version (uint16), size of a code (uint16), number of codes n (uint32),
+             timestamp of the rates (float64), zero padding
+    codes    n * CODE_SIZE bytes: ASCII codes padded with zero bytes, the position of a code is its index
+    matrix   n * n float64: matrix[i, j] = rate of codes[j] for 1 unit of codes[i], NaN for unknown pairs
+
+The file is opened with mmap and viewed as a NumPy array without copying, so processes reading one file
+share its pages in the page cache. A refresh writes a new file and replaces the old one atomically,
+readers keep the mapping of the previous file until they reopen it.
+"""
+
+import mmap
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+from converter.core.exceptions import DatabaseNotExistError
+from converter.core.rate_snapshot import RateSnapshot
+from converter.db.db import DBHandler
+
+MAGIC = b'PLRM'
+VERSION = 1
+CODE_SIZE = 8
+HEADER = struct.Struct('<4sHHId')
+HEADER_SIZE = 32
+
+
+def get_path_to_rate_matrix(path_to_db: str) -> str:
+    """
+    Returns the path of the matrix file of a database, next to it with the extension .matrix.
+    """
+
+    return os.path.splitext(path_to_db)[0] + '.matrix'
+
+
+def write_rate_matrix(path: str, codes: tuple[str, ...], matrix: np.ndarray, timestamp: float = 0):
+    matrix = np.ascontiguousarray(matrix, dtype='<f8')
+    if matrix.shape != (len(codes), len(codes)):
+        raise ValueError(f'Matrix of shape {matrix.shape} for {len(codes)} codes')
+
+    for code in codes:
+        if not code.isascii() or len(code) > CODE_SIZE:
+            raise ValueError(f'Code {code!r} is not an ASCII code of up to {CODE_SIZE} characters')
+
+    header = HEADER.pack(MAGIC, VERSION, CODE_SIZE, len(codes), timestamp).ljust(HEADER_SIZE, b'\0')
+    code_table = b''.join(code.encode('ascii').ljust(CODE_SIZE, b'\0') for code in codes)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    file_descriptor, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(file_descriptor, 'wb') as file:
+            file.write(header)
+            file.write(code_table)
+            file.write(matrix.tobytes())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def export_rate_matrix(db: DBHandler, path: str = None, timestamp: float = 0) -> str:
+    """
+    Writes rates of every pair of the database to the matrix file of the database, resolved as
+    DBHandler.get_rate_from_db does: direct quotes where they are stored, otherwise cross rates.
+    Returns the path of the file.
+    """
+
+    if path is None:
+        path = get_path_to_rate_matrix(db.get_path_to_db())
+
+    codes = db.get_rate_snapshot().codes
+    indices = {code: i for i, code in enumerate(codes)}
+    matrix = np.full((len(codes), len(codes)), np.nan)
+    for i, from_currency in enumerate(codes):
+        for to_currency, rate in db.get_rates_of_base_from_db(from_currency).items():
+            if to_currency in indices and rate is not None:
+                matrix[i, indices[to_currency]] = rate
+
+    write_rate_matrix(path, codes, matrix, timestamp)
+    return path
+
+
+class RateMatrix:
+    """
+    Read-only view of a matrix file, see the layout in the docstring of the module.
+
+    Methods
+    -------
+    get_rate(from_currency, to_currency)
+        Returns the rate of the pair, None if the pair is unknown
+    get_rates(from_currency)
+        Returns {currency code : rate} of all known rates against from_currency
+    get_rate_snapshot()
+        Returns the rates against USD as a RateSnapshot, built once per file
+    close()
+        Unmaps the file
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            with open(path, 'rb') as file:
+                stat = os.fstat(file.fileno())
+                self.__mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            # ValueError: an empty file can't be mapped
+            raise DatabaseNotExistError
+
+        self.file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        header = self.__mmap[:HEADER_SIZE].ljust(HEADER_SIZE, b'\0')
+        magic, version, code_size, count, self.timestamp = HEADER.unpack_from(header)
+        matrix_offset = HEADER_SIZE + count * code_size
+        if magic != MAGIC or version != VERSION or len(self.__mmap) != matrix_offset + count * count * 8:
+            self.__mmap.close()
+            raise DatabaseNotExistError(f'{path} is not a rate matrix of version {VERSION}')
+
+        self.codes = tuple(
+            self.__mmap[HEADER_SIZE + i * code_size:HEADER_SIZE + (i + 1) * code_size].rstrip(b'\0').decode('ascii')
+            for i in range(count)
+        )
+        self.indices = {code: i for i, code in enumerate(self.codes)}
+        self.matrix = np.frombuffer(self.__mmap, dtype='<f8', count=count * count, offset=matrix_offset)
+        self.matrix = self.matrix.reshape(count, count)
+        self.__snapshot = None
+
+    def get_rate(self, from_currency: str, to_currency: str) -> float | None:
+        from_index = self.indices.get(from_currency)
+        to_index = self.indices.get(to_currency)
+        if from_index is None or to_index is None:
+            return None
+        rate = float(self.matrix[from_index, to_index])
+        return None if rate != rate else rate
+
+    def get_rates(self, from_currency: str) -> dict[str, float]:
+        from_index = self.indices.get(from_currency)
+        if from_index is None:
+            return {}
+        return {
+            code: rate
+            for code, rate in zip(self.codes, self.matrix[from_index].tolist())
+            if rate == rate
+        }
+
+    def get_rate_snapshot(self) -> RateSnapshot:
+        """
+        Returns the row of USD as a RateSnapshot, the base rates DBHandler.get_rate_snapshot reads from SQLite.
+        """
+
+        if self.__snapshot is None:
+            rates = self.get_rates('USD')
+            if not rates:
+                raise DatabaseNotExistError
+            self.__snapshot = RateSnapshot(rates, timestamp=self.timestamp)
+        return self.__snapshot
+
+    def is_stale(self) -> bool:
+        """
+        Checks whether the file was replaced since it was opened.
+        """
+
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return True
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size) != self.file_id
+
+    def close(self):
+        # the array must release the buffer before the map can be closed
+        del self.matrix
+        self.__mmap.close()
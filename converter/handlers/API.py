@@ -1,36 +1,160 @@
+import os
+from functools import cache
+from typing import Iterator, Mapping
+
 import requests
+from requests.adapters import HTTPAdapter
+
+from converter.core.exceptions import ServerError
+from converter.handlers.http_cache import DiskResponseCache
+from converter.handlers.rate_cache import RateCache
+from converter.handlers.rates_stream import CHUNK_SIZE, iter_rates
+
+# environment variable with another address of the server, e.g. of a mirror or a stub in benchmarks
+API_URL_VARIABLE = 'PLUTUS_API_URL'
+
+
+@cache
+def get_rate_cache() -> RateCache:
+    """
+    Returns the process-wide cache of rates downloaded by APIHandler.get_rate_from_API.
+    """
+
+    return RateCache()
+
 
 class APIHandler:
-    __API_URL = 'https://api.exchangerate-api.com/v4/latest/'
+    """
+    Client of the exchangerate-api v4 server.
+
+    Responses are stored in response_cache and reused until the provider's next update,
+    set response_cache to None to always ask the server.
+    The address of the server is read from the environment variable PLUTUS_API_URL when it's set.
+    """
+
+    api_url = os.environ.get(API_URL_VARIABLE, 'https://api.exchangerate-api.com/v4/latest/')
+    timeout = 10
+    pool_size = 10
+    response_cache = DiskResponseCache()
 
     def check_server_state(self):
+        """
+        Checks that the server answers, skipped while a cached response of the server is fresh.
+        """
+
+        if self.response_cache is not None:
+            link = self.__get_link_to_API()
+            if self.response_cache.is_fresh(self.response_cache.get('USD', link)):
+                return
+
         response = self.__go_to_API()
         self.__check_response(response)
 
     def __check_response(self, response):
         if response.status_code != 200:
             raise ServerError
+
     def get_rate_from_API(self, from_currency: str, to_currency: str) -> float:
-        rates = self.get_rates_from_API(from_currency)
+        rates = self.get_cached_rates_from_API(from_currency)
         return rates.get(to_currency)
 
+    def get_cached_rates_from_API(self, currency_code: str = 'USD') -> Mapping[str, float]:
+        """
+        Returns rates of the currency from the shared RateCache, downloads them on a miss.
+        """
+
+        return get_rate_cache().get(
+            self.__get_link_to_API(currency_code),
+            lambda: self.get_rates_from_API(currency_code)
+        )
+
     def get_rates_from_API(self, currency_code: str = 'USD') -> dict:
-        response = self.__go_to_API(currency_code).json()
-        return response.get('rates')
+        return self.get_payload_from_API(currency_code).get('rates')
+
+    def iter_rates_from_API(self, currency_code: str = 'USD') -> Iterator[tuple[str, float]]:
+        """
+        Yields (currency code, rate) against currency_code, the response is parsed while it's read from the connection.
+        A fresh cached response is used without a request, a downloaded one is written to response_cache
+        as it's read, see get_payload_from_API.
+        """
+
+        link = self.__get_link_to_API(currency_code)
+        entry = None
+        if self.response_cache is not None:
+            entry = self.response_cache.get(currency_code, link)
+            if self.response_cache.is_fresh(entry):
+                yield from entry['payload']['rates'].items()
+                return
+
+        self.set_session()
+        headers = self.response_cache.get_validators(entry) if self.response_cache is not None else None
+        with self.session.get(link, headers=headers, timeout=self.timeout, stream=True) as response:
+            if response.status_code == 304 and entry is not None:
+                self.response_cache.revalidate(currency_code, entry)
+                yield from entry['payload']['rates'].items()
+                return
+
+            self.__check_response(response)
+            chunks = response.iter_content(CHUNK_SIZE)
+            if self.response_cache is None:
+                yield from iter_rates(chunks)
+                return
+
+            with self.response_cache.open_entry(currency_code, link, response.headers) as entry_writer:
+                chunks = entry_writer.tee(chunks)
+                yield from iter_rates(chunks)
+                # the rest of the payload completes the stored entry
+                for _ in chunks:
+                    pass
 
     def get_list_of_currencies(self) -> list[str]:
-        response = self.__go_to_API().json()
-        return list(response.get('rates').keys())
+        return list(self.get_rates_from_API().keys())
 
-    def __go_to_API(self, currency_code: str = 'USD') -> requests.Response:
+    def get_payload_from_API(self, currency_code: str = 'USD') -> dict:
+        """
+        Returns the whole response of the server for the currency.
+        A fresh cached response is returned without a request, a stale one is revalidated.
+        """
+
+        if self.response_cache is None:
+            response = self.__go_to_API(currency_code)
+            self.__check_response(response)
+            return response.json()
+
+        link = self.__get_link_to_API(currency_code)
+        entry = self.response_cache.get(currency_code, link)
+        if self.response_cache.is_fresh(entry):
+            return entry['payload']
+
+        response = self.__go_to_API(currency_code, self.response_cache.get_validators(entry))
+        if response.status_code == 304 and entry is not None:
+            self.response_cache.revalidate(currency_code, entry)
+            return entry['payload']
+
+        self.__check_response(response)
+        payload = response.json()
+        self.response_cache.put(currency_code, link, payload, response.headers)
+        return payload
+
+    def __go_to_API(self, currency_code: str = 'USD', headers: dict = None) -> requests.Response:
         self.set_session()
         return self.session.get(
-            self.__get_link_to_API(currency_code)
+            self.__get_link_to_API(currency_code),
+            headers=headers,
+            timeout=self.timeout
         )
 
     def set_session(self):
+        """
+        Creates one session per handler, its connections are kept alive and shared by threads using the handler.
+        """
+
         if not hasattr(self, 'session'):
-            setattr(self, 'session', requests.Session())
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=self.pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            setattr(self, 'session', session)
 
     def __get_link_to_API(self, currency_code: str = 'USD') -> str:
-        return self.__API_URL + currency_code.upper()
\ No newline at end of file
+        return self.api_url + currency_code.upper()
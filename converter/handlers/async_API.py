@@ -0,0 +1,259 @@
+import asyncio
+import random
+from itertools import islice
+from typing import AsyncIterator, Awaitable, Callable, Iterable
+
+import aiohttp
+
+from converter.core.exceptions import ServerError
+from converter.handlers.API import APIHandler
+from converter.handlers.fetcher import RateLimiter
+from converter.handlers.rates_stream import CHUNK_SIZE, RatesParser
+
+
+class AsyncAPIHandler:
+    """
+    asyncio client of the exchangerate-api v4 server with the methods of APIHandler as coroutines.
+
+    One aiohttp.ClientSession per handler keeps up to pool_size connections alive,
+    no more than pool_size requests are in flight at once and every request is limited by timeout seconds.
+    Responses are stored in the same response_cache as APIHandler uses,
+    its files are read and written in worker threads, so they don't block the event loop.
+    The session is opened by the first request, close the handler with close() or use it in `async with`.
+    """
+
+    api_url = APIHandler.api_url
+    timeout = 10
+    pool_size = 10
+    response_cache = APIHandler.response_cache
+
+    async def __aenter__(self) -> 'AsyncAPIHandler':
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        if hasattr(self, 'session'):
+            await self.session.close()
+            del self.session
+
+    async def check_server_state(self):
+        """
+        Checks that the server answers, skipped while a cached response of the server is fresh.
+        """
+
+        if self.response_cache is not None:
+            entry = await asyncio.to_thread(self.response_cache.get, 'USD', self.__get_link_to_API())
+            if self.response_cache.is_fresh(entry):
+                return
+
+        status, _, _ = await self.__go_to_API()
+        self.__check_response(status)
+
+    def __check_response(self, status: int):
+        if status != 200:
+            raise ServerError
+
+    async def get_rate_from_API(self, from_currency: str, to_currency: str) -> float:
+        rates = await self.get_rates_from_API(from_currency)
+        return rates.get(to_currency)
+
+    async def get_rates_from_API(self, currency_code: str = 'USD') -> dict:
+        payload = await self.get_payload_from_API(currency_code)
+        return payload.get('rates')
+
+    async def iter_rates_from_API(self, currency_code: str = 'USD') -> AsyncIterator[tuple[str, float]]:
+        """
+        Yields (currency code, rate) against currency_code, see APIHandler.iter_rates_from_API.
+        """
+
+        link = self.__get_link_to_API(currency_code)
+        entry = None
+        if self.response_cache is not None:
+            entry = await asyncio.to_thread(self.response_cache.get, currency_code, link)
+            if self.response_cache.is_fresh(entry):
+                for rate in entry['payload']['rates'].items():
+                    yield rate
+                return
+
+        self.set_session()
+        headers = self.response_cache.get_validators(entry) if self.response_cache is not None else None
+        async with self.__in_flight:
+            async with self.session.get(link, headers=headers) as response:
+                if response.status == 304 and entry is not None:
+                    await asyncio.to_thread(self.response_cache.revalidate, currency_code, entry)
+                    for rate in entry['payload']['rates'].items():
+                        yield rate
+                    return
+
+                self.__check_response(response.status)
+                entry_writer = None
+                if self.response_cache is not None:
+                    entry_writer = await asyncio.to_thread(
+                        self.response_cache.open_entry, currency_code, link, response.headers
+                    )
+                try:
+                    parser = RatesParser()
+                    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                        if entry_writer is not None:
+                            await asyncio.to_thread(entry_writer.write, chunk)
+                        for rate in parser.feed(chunk):
+                            yield rate
+                        # without a cache the rest of the payload isn't needed
+                        if parser.done and entry_writer is None:
+                            return
+                    parser.close()
+                except BaseException:
+                    if entry_writer is not None:
+                        await asyncio.to_thread(entry_writer.discard)
+                    raise
+                if entry_writer is not None:
+                    await asyncio.to_thread(entry_writer.commit)
+
+    async def get_list_of_currencies(self) -> list[str]:
+        rates = await self.get_rates_from_API()
+        return list(rates.keys())
+
+    async def get_payload_from_API(self, currency_code: str = 'USD') -> dict:
+        """
+        Returns the whole response of the server for the currency, see APIHandler.get_payload_from_API.
+        """
+
+        if self.response_cache is None:
+            status, _, payload = await self.__go_to_API(currency_code)
+            self.__check_response(status)
+            return payload
+
+        link = self.__get_link_to_API(currency_code)
+        entry = await asyncio.to_thread(self.response_cache.get, currency_code, link)
+        if self.response_cache.is_fresh(entry):
+            return entry['payload']
+
+        status, headers, payload = await self.__go_to_API(currency_code, self.response_cache.get_validators(entry))
+        if status == 304 and entry is not None:
+            await asyncio.to_thread(self.response_cache.revalidate, currency_code, entry)
+            return entry['payload']
+
+        self.__check_response(status)
+        await asyncio.to_thread(self.response_cache.put, currency_code, link, payload, headers)
+        return payload
+
+    async def __go_to_API(self, currency_code: str = 'USD', headers: dict = None) -> tuple[int, dict, dict | None]:
+        self.set_session()
+        async with self.__in_flight:
+            async with self.session.get(self.__get_link_to_API(currency_code), headers=headers) as response:
+                payload = await response.json(content_type=None) if response.status == 200 else None
+                return response.status, response.headers, payload
+
+    def set_session(self):
+        """
+        Creates the session of the handler, must be called in its event loop.
+        """
+
+        if not hasattr(self, 'session'):
+            connector = aiohttp.TCPConnector(limit=self.pool_size)
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+            self.__in_flight = asyncio.Semaphore(self.pool_size)
+
+    def __get_link_to_API(self, currency_code: str = 'USD') -> str:
+        return self.api_url + currency_code.upper()
+
+
+class AsyncRateFetcher:
+    """
+    Downloads rates of many currencies in one event loop, see RateFetcher for the parameters.
+    max_in_flight requests are sent at once over the pooled connections of one AsyncAPIHandler.
+
+    Methods
+    -------
+    fetch(currencies)
+        Yields (currency code, rates) for every currency as soon as its rates are downloaded
+    fetch_payloads(currencies)
+        The same with whole responses of the server
+    """
+
+    def __init__(
+            self,
+            api: AsyncAPIHandler = None,
+            max_in_flight: int = 32,
+            timeout: float = 10,
+            retries: int = 3,
+            backoff: float = 0.5,
+            requests_per_second: float = None
+    ):
+        self.api = api if api is not None else AsyncAPIHandler()
+        self.retries = retries
+        self.backoff = backoff
+        self.rate_limiter = RateLimiter(requests_per_second)
+
+        self.api.timeout = timeout
+        self.api.pool_size = max_in_flight
+
+    async def __aenter__(self) -> 'AsyncRateFetcher':
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.api.close()
+
+    async def fetch(self, currencies: Iterable[str]) -> AsyncIterator[tuple[str, dict]]:
+        """
+        No more than max_in_flight currencies are downloaded or waiting to be yielded at once,
+        so memory doesn't depend on the number of currencies.
+        """
+
+        async for currency, rates in self.__fetch(currencies, self.fetch_one):
+            yield currency, rates
+
+    async def fetch_payloads(self, currencies: Iterable[str]) -> AsyncIterator[tuple[str, dict]]:
+        async for currency, payload in self.__fetch(currencies, self.fetch_one_payload):
+            yield currency, payload
+
+    async def __fetch(
+            self,
+            currencies: Iterable[str],
+            fetch_one: Callable[[str], Awaitable[dict]]
+    ) -> AsyncIterator[tuple[str, dict]]:
+        currencies = iter(currencies)
+        pending = {
+            asyncio.create_task(fetch_one(currency)): currency
+            for currency in islice(currencies, self.api.pool_size)
+        }
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    currency = pending.pop(task)
+                    for next_currency in islice(currencies, 1):
+                        pending[asyncio.create_task(fetch_one(next_currency))] = next_currency
+                    yield currency, task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def fetch_one(self, currency: str) -> dict:
+        return await self.__with_retries(
+            lambda: self.__collect_rates(currency)
+        )
+
+    async def fetch_one_payload(self, currency: str) -> dict:
+        return await self.__with_retries(
+            lambda: self.api.get_payload_from_API(currency)
+        )
+
+    async def __collect_rates(self, currency: str) -> dict:
+        return {code: rate async for code, rate in self.api.iter_rates_from_API(currency)}
+
+    async def __with_retries(self, load: Callable[[], Awaitable[dict]]) -> dict:
+        for attempt in range(self.retries + 1):
+            await asyncio.sleep(self.rate_limiter.reserve())
+            try:
+                return await load()
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, ServerError):
+                if attempt == self.retries:
+                    raise ServerError
+            await asyncio.sleep(random.uniform(0, self.backoff * 2 ** attempt))
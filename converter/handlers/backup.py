@@ -2,10 +2,13 @@ import os
 import json
 from datetime import datetime
 
+PATH_TO_BACKUP = os.path.join('data', 'backup.json')
+
+
 class BackupJSONFileHandler:
     def get_timestamp_from_backup(self):
         try:
-            with open('data\\backup.json') as file:
+            with open(PATH_TO_BACKUP) as file:
                 data = json.load(file)
                 return data.get('timestamp', 0)
         except json.decoder.JSONDecodeError:
@@ -14,7 +17,7 @@ class BackupJSONFileHandler:
     def rewrite_backup(self, backup_data: dict):
         backup_data_with_timestamp = self.__add_timestamp_to_backup(backup_data)
 
-        with open('data\\backup.json', 'wt') as file:
+        with open(PATH_TO_BACKUP, 'wt') as file:
             file.flush()
             json.dump(backup_data_with_timestamp, file)
 
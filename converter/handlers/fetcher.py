@@ -0,0 +1,138 @@
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Callable, Iterable, Iterator
+
+import requests
+
+from converter.core.exceptions import ServerError
+from converter.handlers.API import APIHandler
+
+
+class RateLimiter:
+    """
+    Spaces calls of wait() so that no more than requests_per_second of them pass in a second.
+    Safe to share between threads.
+    """
+
+    def __init__(self, requests_per_second: float = None):
+        self.interval = 1 / requests_per_second if requests_per_second else 0
+        self.__next_time = 0.0
+        self.__lock = threading.Lock()
+
+    def wait(self):
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+    def reserve(self) -> float:
+        """
+        Takes the next free slot, returns seconds to wait for it without waiting.
+        """
+
+        if not self.interval:
+            return 0
+        with self.__lock:
+            now = time.monotonic()
+            wait_until = max(self.__next_time, now)
+            self.__next_time = wait_until + self.interval
+        return wait_until - now
+
+
+class RateFetcher:
+    """
+    Downloads rates of many currencies concurrently.
+    Workers of a bounded thread pool share one APIHandler and its pooled requests.Session.
+
+    Parameters
+    ----------
+    api : APIHandler
+        handler used for requests, a new one by default
+    max_workers : int
+        number of concurrent requests
+    timeout : float
+        timeout of one request in seconds
+    retries : int
+        how many times a failed request is repeated before ServerError is raised
+    backoff : float
+        base delay in seconds before a retry, doubled with every attempt and jittered
+    requests_per_second : float
+        limit of requests sent to the provider, unlimited by default
+
+    Methods
+    -------
+    fetch(currencies)
+        Yields (currency code, rates) for every currency as soon as its rates are downloaded
+    fetch_payloads(currencies)
+        The same with whole responses of the server, which carry times of the provider's updates
+    """
+
+    def __init__(
+            self,
+            api: APIHandler = None,
+            max_workers: int = 8,
+            timeout: float = 10,
+            retries: int = 3,
+            backoff: float = 0.5,
+            requests_per_second: float = None
+    ):
+        self.api = api if api is not None else APIHandler()
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.rate_limiter = RateLimiter(requests_per_second)
+
+        self.api.timeout = timeout
+        self.api.pool_size = max(max_workers, self.api.pool_size)
+        self.api.set_session()
+
+    def fetch(self, currencies: Iterable[str]) -> Iterator[tuple[str, dict]]:
+        """
+        No more than 2 * max_workers currencies are downloaded or waiting to be yielded at once,
+        so memory doesn't depend on the number of currencies.
+        """
+
+        return self.__fetch(currencies, self.fetch_one)
+
+    def fetch_payloads(self, currencies: Iterable[str]) -> Iterator[tuple[str, dict]]:
+        return self.__fetch(currencies, self.fetch_one_payload)
+
+    def __fetch(self, currencies: Iterable[str], fetch_one: Callable[[str], dict]) -> Iterator[tuple[str, dict]]:
+        currencies = iter(currencies)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {
+                executor.submit(fetch_one, currency): currency
+                for currency in islice(currencies, 2 * self.max_workers)
+            }
+            try:
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        currency = pending.pop(future)
+                        for next_currency in islice(currencies, 1):
+                            pending[executor.submit(fetch_one, next_currency)] = next_currency
+                        yield currency, future.result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def fetch_one(self, currency: str) -> dict:
+        return self.__with_retries(lambda: dict(self.api.iter_rates_from_API(currency)))
+
+    def fetch_one_payload(self, currency: str) -> dict:
+        return self.__with_retries(lambda: self.api.get_payload_from_API(currency))
+
+    def __with_retries(self, load: Callable[[], dict]) -> dict:
+        for attempt in range(self.retries + 1):
+            self.rate_limiter.wait()
+            try:
+                return load()
+            except (requests.RequestException, ValueError, ServerError):
+                if attempt == self.retries:
+                    raise ServerError
+            time.sleep(self.__get_delay(attempt))
+
+    def __get_delay(self, attempt: int) -> float:
+        return random.uniform(0, self.backoff * 2 ** attempt)
@@ -0,0 +1,192 @@
+import json
+import os
+import re
+import threading
+import time
+from typing import Callable, Iterable, Iterator
+
+PATH_TO_HTTP_CACHE = os.path.join('data', 'http_cache')
+ONE_DAY = 24 * 60 * 60
+TIME_FIELD = re.compile(
+    rb'"(time_next_update_unix|time_next_update|time_last_update_unix|time_last_updated)"'
+    rb'\s*:\s*(\d+(?:\.\d+)?)\s*[,}]'
+)
+# longest time field with its value, kept between chunks in case a field is split between them
+MAX_TIME_FIELD_LENGTH = 64
+
+
+def get_time_last_update(payload: dict) -> float | None:
+    """
+    Returns the unix time of the provider's last update of the rates of the payload, None if it isn't sent.
+    """
+
+    last_update = payload.get('time_last_update_unix', payload.get('time_last_updated'))
+    return last_update if isinstance(last_update, (int, float)) else None
+
+
+def get_time_next_update(payload: dict) -> float | None:
+    """
+    Returns the unix time of the provider's next update of the rates of the payload,
+    a day after the last update when the provider doesn't send it, None if neither is sent.
+    """
+
+    next_update = payload.get('time_next_update_unix', payload.get('time_next_update'))
+    if isinstance(next_update, (int, float)):
+        return next_update
+
+    last_update = get_time_last_update(payload)
+    return last_update + ONE_DAY if last_update is not None else None
+
+
+class DiskResponseCache:
+    """
+    On-disk cache of API responses, one JSON file per base currency in data/http_cache.
+
+    A response is fresh until the provider's next update (time_next_update of the payload,
+    or a day after time_last_updated when the provider doesn't send it).
+    A stale response keeps its ETag and Last-Modified validators for a conditional request,
+    after a 304 answer it's reused for revalidate_after seconds more.
+
+    Methods
+    -------
+    get(currency_code, url)
+        Returns the stored entry {'url', 'payload', 'etag', 'last_modified', 'next_update'} or None
+    is_fresh(entry)
+        Checks if the entry may be used without asking the provider
+    get_validators(entry)
+        Returns headers for a conditional request
+    put(currency_code, url, payload, headers)
+        Stores a new response
+    open_entry(currency_code, url, headers)
+        Returns a CacheEntryWriter which stores a new response written in chunks
+    revalidate(currency_code, entry)
+        Extends freshness of the entry after a 304 response
+    """
+
+    def __init__(
+            self,
+            directory: str = PATH_TO_HTTP_CACHE,
+            revalidate_after: float = 600,
+            clock: Callable[[], float] = time.time
+    ):
+        self.directory = directory
+        self.revalidate_after = revalidate_after
+        self.__clock = clock
+
+    def get(self, currency_code: str, url: str) -> dict | None:
+        try:
+            with open(self.__get_path(currency_code)) as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if entry.get('url') != url:
+            return None
+        return entry
+
+    def is_fresh(self, entry: dict | None) -> bool:
+        return entry is not None and entry['next_update'] > self.__clock()
+
+    def get_validators(self, entry: dict | None) -> dict:
+        headers = {}
+        if entry is not None and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry is not None and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def put(self, currency_code: str, url: str, payload: dict, headers: dict):
+        entry = {
+            'url': url,
+            'payload': payload,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'next_update': self.__get_next_update(payload)
+        }
+        self.__write(currency_code, entry)
+
+    def open_entry(self, currency_code: str, url: str, headers: dict) -> 'CacheEntryWriter':
+        os.makedirs(self.directory, exist_ok=True)
+        return CacheEntryWriter(self.__get_path(currency_code), url, headers, self.__get_next_update)
+
+    def revalidate(self, currency_code: str, entry: dict):
+        entry['next_update'] = self.__clock() + self.revalidate_after
+        self.__write(currency_code, entry)
+
+    def __get_next_update(self, payload: dict) -> float:
+        next_update = get_time_next_update(payload)
+        return next_update if next_update is not None else self.__clock() + self.revalidate_after
+
+    def __write(self, currency_code: str, entry: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.__get_path(currency_code)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wt') as file:
+            json.dump(entry, file)
+        os.replace(tmp_path, path)
+
+    def __get_path(self, currency_code: str) -> str:
+        return os.path.join(self.directory, currency_code.upper() + '.json')
+
+
+class CacheEntryWriter:
+    """
+    Writes an entry of DiskResponseCache from the body of a response read in chunks,
+    the body is written to the file as it is, so it's never kept in memory as a whole.
+    Only the time fields of the payload are collected for the freshness of the entry.
+
+    Used as a context manager: the entry replaces the stored one when the block ends,
+    an unfinished entry is removed if the block raises.
+
+    Methods
+    -------
+    write(chunk)
+        Appends bytes of the body
+    tee(chunks)
+        Yields the chunks after writing each of them
+    commit()
+        Replaces the stored entry with the written one
+    discard()
+        Removes the unfinished entry
+    """
+
+    def __init__(self, path: str, url: str, headers: dict, get_next_update: Callable[[dict], float]):
+        self.__path = path
+        self.__tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        self.__get_next_update = get_next_update
+        self.__time_fields = {}
+        self.__tail = b''
+        self.__file = open(self.__tmp_path, 'wb')
+
+        head = json.dumps({'url': url, 'etag': headers.get('ETag'), 'last_modified': headers.get('Last-Modified')})
+        self.__file.write(head[:-1].encode() + b', "payload": ')
+
+    def __enter__(self) -> 'CacheEntryWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+
+    def write(self, chunk: bytes):
+        self.__file.write(chunk)
+        text = self.__tail + chunk
+        for match in TIME_FIELD.finditer(text):
+            self.__time_fields[match.group(1).decode()] = float(match.group(2))
+        self.__tail = text[-MAX_TIME_FIELD_LENGTH:]
+
+    def tee(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        for chunk in chunks:
+            self.write(chunk)
+            yield chunk
+
+    def commit(self):
+        next_update = self.__get_next_update(self.__time_fields)
+        self.__file.write(b', "next_update": ' + json.dumps(next_update).encode() + b'}')
+        self.__file.close()
+        os.replace(self.__tmp_path, self.__path)
+
+    def discard(self):
+        self.__file.close()
+        os.unlink(self.__tmp_path)
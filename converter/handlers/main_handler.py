@@ -1,71 +1,224 @@
-import threading
+import asyncio
+import time
 from concurrent.futures import ThreadPoolExecutor
-from queue import Queue
+from dataclasses import dataclass
 
 from converter.app.menu import Menu
+from converter.core.rate_snapshot import RateSnapshot
 from converter.handlers.API import APIHandler
 from converter.handlers.backup import BackupJSONFileHandler
+from converter.handlers.fetcher import RateFetcher
+from converter.handlers.http_cache import get_time_last_update, get_time_next_update
+from converter.handlers.pipeline import RatePipeline
 from converter.db.db import DBHandler
 
 
+@dataclass
+class RefreshReport:
+    """
+    Result of a refresh: bases whose rates were downloaded, bases skipped as still fresh
+    and pairs of prepared_currencies written to or deleted from the database.
+    """
+
+    fetched_bases: int = 0
+    skipped_bases: int = 0
+    touched_rows: int = 0
+
+
 class MainHandler:
-    def __init__(self):
+    """
+    Refreshes rates in the internal database.
+
+    By default a refresh downloads one table of rates against USD and stores it as base rates,
+    every cross rate is derived from them. With direct_quotes=True the refresh also downloads
+    rates of every currency and stores all pairs as quoted by the API,
+    they are downloaded by max_workers concurrent requests (see RateFetcher for the other options)
+    and written to the database by batch_size currencies at once.
+    With use_asyncio=True they are downloaded in one event loop by AsyncRateFetcher instead,
+    max_workers is the number of requests in flight then.
+
+    With incremental=True a refresh of direct quotes keeps the table in place instead:
+    bases still fresh by the provider's time_next_update aren't downloaded,
+    bases whose time_last_update hasn't changed aren't written,
+    and only new pairs and pairs with a changed rate are upserted.
+    Pairs of currencies the provider no longer lists are deleted.
+
+    The menu refreshes with the defaults, the other modes are run by `python main.py refresh`, see converter.app.cli.
+    The database is data/rates.db unless path_to_db is given.
+    """
+
+    def __init__(
+            self,
+            direct_quotes: bool = False,
+            max_workers: int = 8,
+            batch_size: int = 4,
+            use_asyncio: bool = False,
+            incremental: bool = False,
+            path_to_db: str = '',
+            **fetcher_options
+    ):
         self.backup = BackupJSONFileHandler()
         self.api = APIHandler()
-        self.db = DBHandler()
+        self.db = DBHandler(path_to_db)
         self.menu = Menu()
-
-    def update_rates(self):
+        self.direct_quotes = direct_quotes
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.use_asyncio = use_asyncio
+        self.incremental = incremental
+        self.fetcher_options = fetcher_options
+        self.fetcher = RateFetcher(self.api, max_workers=max_workers, **fetcher_options)
+
+    def update_rates(self) -> RefreshReport:
         """
         Updates rates for all predefined pairs of currencies
         """
 
-        backup_data = self.api.get_rates_from_API()
-        self.backup.rewrite_backup(backup_data)
-
-        list_of_currencies = self.api.get_list_of_currencies()
-        self.__setup_multi_threading(list_of_currencies)
-
-        self.__update_pairs_in_prepared_currencies()
+        payload = self.api.get_payload_from_API()
+        base_rates = payload['rates']
+        self.backup.rewrite_backup(dict(base_rates))
+        self.db.create_tables()
+        self.db.enable_write_ahead_log()
+        self.db.append_snapshot_to_history(RateSnapshot(base_rates, timestamp=time.time()))
+
+        if self.direct_quotes and self.incremental:
+            report = self.__update_stale_bases(list(base_rates), payload)
+            report.touched_rows += self.db.delete_currencies_not_listed(base_rates)
+            self.db.update_metadata_of_prepared_currencies()
+            self.db.replace_base_rates(base_rates)
+        elif self.direct_quotes:
+            self.__setup_multi_threading(list(base_rates))
+            self.__update_pairs_in_prepared_currencies()
+            self.db.swap_in_staging_prepared_currencies(base_rates)
+            self.db.delete_all_from_fetched_bases()
+            report = RefreshReport(fetched_bases=len(base_rates), touched_rows=self.done_records)
+        else:
+            self.db.replace_base_rates(base_rates)
+            self.__delete_direct_quotes()
+            self.db.delete_all_from_fetched_bases()
+            report = RefreshReport(fetched_bases=1, touched_rows=len(base_rates))
+        self.__export_rate_matrix()
+        self.menu.print_smth_successfully(f'Updated {report.touched_rows} rates in database')
+        return report
+
+    def __export_rate_matrix(self):
+        # NumPy is only needed to write the file of the mmap backend, keep it out of the start of the app
+        from converter.db.rate_matrix import export_rate_matrix
+
+        export_rate_matrix(self.db, timestamp=time.time())
+
+    def __update_stale_bases(self, list_of_currencies: list[str], payload_of_usd: dict) -> RefreshReport:
+        fetched_bases = self.db.get_fetched_bases()
+        now = time.time()
+        stale_bases = [
+            currency for currency in list_of_currencies
+            if currency not in fetched_bases
+            or fetched_bases[currency][1] is None
+            or fetched_bases[currency][1] <= now
+        ]
+        report = RefreshReport(skipped_bases=len(list_of_currencies) - len(stale_bases))
+
+        # rates against USD came with the list of currencies, they aren't downloaded again
+        if 'USD' in stale_bases:
+            stale_bases.remove('USD')
+            self.__upsert_payload('USD', payload_of_usd, fetched_bases, report)
+
+        if self.use_asyncio:
+            asyncio.run(self.__update_stale_bases_in_event_loop(stale_bases, fetched_bases, report))
+        else:
+            for from_currency, payload in self.fetcher.fetch_payloads(stale_bases):
+                self.__upsert_payload(from_currency, payload, fetched_bases, report)
+        return report
+
+    async def __update_stale_bases_in_event_loop(self, stale_bases: list[str], fetched_bases: dict, report: RefreshReport):
+        async with self.__get_async_fetcher() as fetcher:
+            async for from_currency, payload in fetcher.fetch_payloads(stale_bases):
+                self.__upsert_payload(from_currency, payload, fetched_bases, report)
+
+    def __upsert_payload(self, from_currency: str, payload: dict, fetched_bases: dict, report: RefreshReport):
+        time_last_update = get_time_last_update(payload)
+        stored_last_update = fetched_bases.get(from_currency, (None, None))[0]
+        # the provider hasn't published new rates since the last fetch, only the times are recorded
+        unchanged = time_last_update is not None and time_last_update == stored_last_update
+        rates = () if unchanged else payload['rates'].items()
+
+        report.fetched_bases += 1
+        report.touched_rows += self.db.upsert_rates_of_base(
+            from_currency, rates, time_last_update, get_time_next_update(payload), time.time()
+        )
+
+    def __delete_direct_quotes(self):
+        if self.db.get_count_of_prepared_currencies():
+            self.db.delete_all_from_prepared_currencies()
+            self.db.vacuum()
 
     def __setup_multi_threading(self, list_of_currencies: list[str]):
         setattr(self, 'currencies_to_get_rates', list_of_currencies)
         setattr(self, 'done_records', 0)
-        setattr(self, 'pipeline', Queue(maxsize=10))
-        setattr(self, 'event', threading.Event())
+        setattr(self, 'total_records', len(list_of_currencies) * (len(list_of_currencies) - 1))
+        setattr(self, 'pipeline', RatePipeline(maxsize=10, batch_size=self.batch_size))
 
     def __update_pairs_in_prepared_currencies(self):
-        self.db.delete_all_from_prepared_currencies()
-        self.db.connect.commit()
+        """
+        Loads all pairs into the staging table, prepared_currencies stays readable meanwhile.
+        """
 
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            executor.submit(self.__get_rates_and_update_pipeline)
-            executor.submit(self.__put_rates_to_db)
+        self.db.create_staging_prepared_currencies()
 
-        self.menu.print_smth_successfully('Updated database')
+        with self.db.bulk_load(), ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [
+                executor.submit(self.__get_rates_and_update_pipeline),
+                executor.submit(self.__put_rates_to_db)
+            ]
+        for future in futures:
+            future.result()
 
     def __get_rates_and_update_pipeline(self):
-        while self.currencies_to_get_rates:
-            from_currency = self.currencies_to_get_rates.pop()
-            rates = self.api.get_rates_from_API(from_currency)
-            self.pipeline.put((from_currency, rates))
-        self.event.set()
+        try:
+            if self.use_asyncio:
+                asyncio.run(self.__get_rates_in_event_loop())
+            else:
+                for from_currency, rates in self.fetcher.fetch(self.currencies_to_get_rates):
+                    if not self.pipeline.put((from_currency, rates)):
+                        break
+        except BaseException as error:
+            self.pipeline.close(error)
+            raise
+        self.pipeline.close()
+
+    async def __get_rates_in_event_loop(self):
+        async with self.__get_async_fetcher() as fetcher:
+            async for from_currency, rates in fetcher.fetch(self.currencies_to_get_rates):
+                if not await asyncio.to_thread(self.pipeline.put, (from_currency, rates)):
+                    break
+
+    def __get_async_fetcher(self):
+        # aiohttp is only needed for this kind of refresh, keep it out of the start of the app
+        from converter.handlers.async_API import AsyncAPIHandler, AsyncRateFetcher
+
+        api = AsyncAPIHandler()
+        api.api_url = self.api.api_url
+        api.response_cache = self.api.response_cache
+        return AsyncRateFetcher(api, max_in_flight=self.max_workers, **self.fetcher_options)
 
     def __put_rates_to_db(self):
-        while not self.pipeline.empty() or not self.event.is_set():
-            result = self.pipeline.get() if not self.pipeline.empty() else None
-            if result is not None:
-                self.__put_pairs_to_db(result)
-
-    def __put_pairs_to_db(self, from_currency_and_results: tuple):
-        from_currency, rates = from_currency_and_results
-        for to_currency, rate in list(rates.items())[1:]:
-            tuple_to_insert = (from_currency, to_currency, rate)
-
-            self.db.insert_pair_in_prepared_currencies(tuple_to_insert)
-
-            self.done_records += 1
-            self.menu.progress_bar(self.done_records, 26082)
+        try:
+            for batch in self.pipeline.batches():
+                self.__put_pairs_to_db(batch)
+        except BaseException:
+            self.pipeline.cancel()
+            raise
+
+    def __put_pairs_to_db(self, batch: list[tuple]):
+        rows = (
+            (from_currency, to_currency, rate)
+            for from_currency, rates in batch
+            for to_currency, rate in rates.items()
+            if to_currency != from_currency
+        )
+
+        self.done_records += self.db.insert_pairs_in_staging_prepared_currencies(rows)
+        self.menu.progress_bar(self.done_records, self.total_records)
 
     def timestamp_when_database_was_last_time_updated(self):
         return self.backup.get_timestamp_from_backup()
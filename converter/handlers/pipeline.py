@@ -0,0 +1,111 @@
+import threading
+import time
+from dataclasses import dataclass
+from queue import Empty, Full, Queue
+from typing import Iterator
+
+
+@dataclass
+class PipelineMetrics:
+    """
+    Counters of a RatePipeline, filled while it works.
+    Queue depth is sampled on every put, idle time is the time the consumer was blocked waiting for items.
+    """
+
+    items: int = 0
+    batches: int = 0
+    max_queue_depth: int = 0
+    queue_depth_total: int = 0
+    consumer_idle_time: float = 0
+
+    @property
+    def mean_queue_depth(self) -> float:
+        return self.queue_depth_total / self.items if self.items else 0
+
+
+class RatePipeline:
+    """
+    Bounded queue between one producer and one consumer thread.
+
+    The producer calls put() for every item and close() when it's done or has failed,
+    the consumer iterates batches(), which blocks until items arrive and ends after close().
+    An error passed to close() is raised in the consumer, cancel() stops the producer.
+
+    Parameters
+    ----------
+    maxsize : int
+        maximum number of items waiting in the queue, put() blocks when it's full
+    batch_size : int
+        maximum number of items in one batch given to the consumer
+    """
+
+    __SENTINEL = object()
+    __PUT_TIMEOUT = 0.1
+
+    def __init__(self, maxsize: int = 10, batch_size: int = 1):
+        self.batch_size = batch_size
+        self.metrics = PipelineMetrics()
+        self.__queue = Queue(maxsize=maxsize)
+        self.__cancelled = threading.Event()
+        self.__error = None
+
+    def put(self, item) -> bool:
+        """
+        Puts item in the queue, waits while the queue is full.
+        Returns False if the consumer has cancelled the pipeline and the item wasn't put.
+        """
+
+        if not self.__put(item):
+            return False
+        depth = self.__queue.qsize()
+        self.metrics.items += 1
+        self.metrics.queue_depth_total += depth
+        self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, depth)
+        return True
+
+    def close(self, error: BaseException = None):
+        self.__error = error
+        self.__put(self.__SENTINEL)
+
+    def cancel(self):
+        self.__cancelled.set()
+        try:
+            while True:
+                self.__queue.get_nowait()
+        except Empty:
+            pass
+
+    def batches(self) -> Iterator[list]:
+        batch = []
+        while True:
+            item = self.__get()
+            if item is self.__SENTINEL:
+                break
+            batch.append(item)
+            if len(batch) == self.batch_size:
+                yield self.__count_batch(batch)
+                batch = []
+
+        if self.__error is not None:
+            raise self.__error
+        if batch:
+            yield self.__count_batch(batch)
+
+    def __put(self, item) -> bool:
+        while not self.__cancelled.is_set():
+            try:
+                self.__queue.put(item, timeout=self.__PUT_TIMEOUT)
+                return True
+            except Full:
+                continue
+        return False
+
+    def __get(self):
+        start = time.perf_counter()
+        item = self.__queue.get()
+        self.metrics.consumer_idle_time += time.perf_counter() - start
+        return item
+
+    def __count_batch(self, batch: list) -> list:
+        self.metrics.batches += 1
+        return batch
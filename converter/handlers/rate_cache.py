@@ -0,0 +1,75 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from types import MappingProxyType
+from typing import Callable, Mapping
+
+
+class RateCache:
+    """
+    In-memory cache of rates tables {currency code : rate}, one per base currency.
+
+    Entries live for ttl seconds, the least recently used entry is evicted when there are more than maxsize.
+    Concurrent misses of one key are deduplicated: the first caller loads the table,
+    the others wait for its result. Callers served without their own load are counted as hits.
+    Safe to share between threads.
+
+    Methods
+    -------
+    get(key, load)
+        Returns the cached table for key, calls load() to get it on a miss
+    clear()
+        Removes all entries
+    """
+
+    def __init__(self, ttl: float = 600, maxsize: int = 256, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.__clock = clock
+        self.__entries = OrderedDict()
+        self.__loading = {}
+        self.__lock = threading.Lock()
+
+    def get(self, key: str, load: Callable[[], dict]) -> Mapping[str, float]:
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and entry[0] > self.__clock():
+                self.__entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            future = self.__loading.get(key)
+            is_loader = future is None
+            if is_loader:
+                future = self.__loading[key] = Future()
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if is_loader:
+            self.__load(key, load, future)
+        return future.result()
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+
+    def __load(self, key: str, load: Callable[[], dict], future: Future):
+        try:
+            future.set_result(MappingProxyType(dict(load())))
+        except BaseException as error:
+            future.set_exception(error)
+
+        with self.__lock:
+            del self.__loading[key]
+            if future.exception() is None:
+                self.__store(key, future.result())
+
+    def __store(self, key: str, rates: Mapping[str, float]):
+        self.__entries[key] = (self.__clock() + self.ttl, rates)
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.maxsize:
+            self.__entries.popitem(last=False)
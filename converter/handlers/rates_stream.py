@@ -0,0 +1,80 @@
+"""
+Incremental parser of the "rates" object of exchangerate-api responses.
+"""
+
+import re
+from typing import Iterable, Iterator
+
+RATES_START = re.compile(rb'"rates"\s*:\s*\{')
+RATE = re.compile(rb'\s*"([^"\\]+)"\s*:\s*(-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)\s*([,}])')
+OBJECT_END = re.compile(rb'\s*}')
+MAX_RATE_LENGTH = 1024
+CHUNK_SIZE = 8192
+
+
+class RatesParser:
+    """
+    Parses the "rates" object of a JSON payload fed in chunks of bytes, other fields of the payload are skipped.
+    Only an unfinished rate is kept between chunks, so memory doesn't depend on the size of the payload.
+
+    Methods
+    -------
+    feed(chunk)
+        Returns (currency code, rate) of rates completed by the chunk, in order
+    close()
+        Checks that the whole object was parsed
+    """
+
+    def __init__(self):
+        self.buffer = b''
+        self.started = False
+        self.done = False
+
+    def feed(self, chunk: bytes) -> list[tuple[str, float]]:
+        if self.done:
+            return []
+        self.buffer += chunk
+        if not self.started:
+            start = RATES_START.search(self.buffer)
+            if not start:
+                # keep a tail long enough for '"rates" : {' split between chunks
+                self.buffer = self.buffer[-64:]
+                return []
+            self.started = True
+            self.buffer = self.buffer[start.end():]
+
+        rates = []
+        position = 0
+        while match := RATE.match(self.buffer, position):
+            position = match.end()
+            rates.append((match.group(1).decode(), float(match.group(2))))
+            if match.group(3) == b'}':
+                self.done = True
+                break
+        if position == 0 and OBJECT_END.match(self.buffer):
+            self.done = True
+
+        self.buffer = b'' if self.done else self.buffer[position:]
+        if len(self.buffer) > MAX_RATE_LENGTH:
+            raise ValueError(f'Unexpected rate: {self.buffer[:64]!r}')
+        return rates
+
+    def close(self):
+        if not self.started:
+            raise ValueError('No rates in the payload')
+        if not self.done:
+            raise ValueError(f'Unexpected end of rates: {self.buffer[:64]!r}')
+
+
+def iter_rates(chunks: Iterable[bytes]) -> Iterator[tuple[str, float]]:
+    """
+    Yields (currency code, rate) of the "rates" object of a JSON payload read in chunks, see RatesParser.
+    Raises ValueError if the payload ends before the end of the object or the object isn't {code: number}.
+    """
+
+    parser = RatesParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+        if parser.done:
+            return
+    parser.close()
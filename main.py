@@ -1,15 +1,16 @@
+import sys
 import time
 
 from converter.app.app import App
-from converter.app.menu import Menu
 from converter.core.exceptions import *
 
 
 def main():
-    menu = Menu()
     app = App()
+    menu = app.menu
     try:
-        app.set_up_directories_and_check_server_state()
+        app.set_up_directories()
+        app.start_checking_server_state()
         while True:
             menu.print_main_menu()
             input_num = menu.input_choice_main_menu()
@@ -40,6 +41,10 @@ def main():
 
 
 if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        from converter.app import cli
+
+        sys.exit(cli.main(sys.argv[1:]))
     main()
     time.sleep(3)
     exit()
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""
+Benchmark of filling prepared_currencies with the real 26,082 pairs derived from data/backup.json.
+
+Compares one INSERT and commit per row with executemany in one transaction per source currency
+and in one transaction for the whole refresh (both with WAL and synchronous=NORMAL).
+
+Run from the root of the repository:
+    python -m tests.benchmarks.bench_bulk_ingest
+"""
+
+import itertools
+import json
+import os
+import tempfile
+import time
+
+from converter.core.rate_snapshot import RateSnapshot
+from converter.db.db import DBHandler
+from converter.handlers.backup import PATH_TO_BACKUP
+
+ROWS_PER_ROW_COMMIT = 2000
+
+
+def get_rows() -> list[tuple[str, str, float]]:
+    with open(PATH_TO_BACKUP) as file:
+        base_rates = json.load(file)
+    base_rates.pop('timestamp', None)
+    return list(RateSnapshot(base_rates).iter_pairs())
+
+
+def prepare_db(tmp_dir: str, name: str) -> DBHandler:
+    db = DBHandler(os.path.join(tmp_dir, name))
+    db.create_tables()
+    return db
+
+
+def row_per_commit(db: DBHandler, rows: list) -> float:
+    rows = rows[:ROWS_PER_ROW_COMMIT]
+    start = time.perf_counter()
+    for row in rows:
+        db.insert_pair_in_prepared_currencies(row)
+    return len(rows) / (time.perf_counter() - start)
+
+
+def transaction_per_currency(db: DBHandler, rows: list) -> float:
+    start = time.perf_counter()
+    with db.bulk_load():
+        for _, group in itertools.groupby(rows, key=lambda row: row[0]):
+            db.insert_pairs_in_prepared_currencies(group)
+    return len(rows) / (time.perf_counter() - start)
+
+
+def transaction_per_refresh(db: DBHandler, rows: list) -> float:
+    start = time.perf_counter()
+    with db.bulk_load():
+        db.insert_pairs_in_prepared_currencies(rows)
+    return len(rows) / (time.perf_counter() - start)
+
+
+def main():
+    rows = get_rows()
+    print(f'{len(rows):,} rows')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, benchmark in [
+            ('Commit per row', row_per_commit),
+            ('Transaction per currency', transaction_per_currency),
+            ('Transaction per refresh', transaction_per_refresh),
+        ]:
+            db = prepare_db(tmp_dir, name.replace(' ', '_') + '.db')
+            print(f'{name + ":":<26}{benchmark(db, rows):>12,.0f} rows/s')
+            db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Benchmark of converting 1,000,000 random ledger lines with rates from data/backup.json.
+
+Compares a loop of CurrencyConverter.exchange-style scalar conversions (measured on a sample)
+with CurrencyConverter.convert_many in every rounding mode.
+
+Run from the root of the repository:
+    python -m tests.benchmarks.bench_convert_many
+"""
+
+import time
+
+import numpy as np
+
+from converter.core.currency_converter import CurrencyConverter
+from converter.core.currency_pair import CurrencyPair
+from tests.stub_api_server import get_backup_snapshot
+
+ROWS = 1_000_000
+SCALAR_SAMPLE = 20_000
+DECIMAL_SAMPLE = 100_000
+
+
+def main():
+    snapshot = get_backup_snapshot()
+    random = np.random.default_rng(0)
+    codes = np.array(snapshot.codes)
+    amounts = random.uniform(1, 10_000, ROWS).round(2)
+    from_codes = codes[random.integers(0, len(codes), ROWS)]
+    to_codes = codes[random.integers(0, len(codes), ROWS)]
+    converter = CurrencyConverter()
+
+    start = time.perf_counter()
+    for amount, from_currency, to_currency in zip(
+            amounts[:SCALAR_SAMPLE].tolist(), from_codes[:SCALAR_SAMPLE], to_codes[:SCALAR_SAMPLE]
+    ):
+        currency_pair = CurrencyPair(str(from_currency), str(to_currency), amount)
+        currency_pair.set_result(snapshot.get_rate(currency_pair.from_currency, currency_pair.to_currency))
+    scalar = SCALAR_SAMPLE / (time.perf_counter() - start)
+    print(f'{"Scalar loop:":<24}{scalar:>14,.0f} rows/s')
+
+    for rounding, rows in [('fast', ROWS), ('exact', ROWS), ('decimal', DECIMAL_SAMPLE)]:
+        start = time.perf_counter()
+        converter.convert_many(
+            amounts[:rows], from_codes[:rows], to_codes[:rows], snapshot=snapshot, rounding=rounding
+        )
+        speed = rows / (time.perf_counter() - start)
+        print(f'{"convert_many, " + rounding + ":":<24}{speed:>14,.0f} rows/s ({speed / scalar:,.0f}x)')
+
+
+if __name__ == '__main__':
+    main()
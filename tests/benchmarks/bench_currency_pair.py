@@ -0,0 +1,77 @@
+"""
+Benchmark of constructing CurrencyPair objects and of the file handles they keep open.
+
+"Before" imitates the old CurrencyPair, which inherited DBHandler and opened its own
+connection to the database in __post_init__. "After" is the plain CurrencyPair,
+with a DBHandler per pair looking up its rate through the connection shared by the thread.
+
+Run from the root of the repository:
+    python -m tests.benchmarks.bench_currency_pair
+"""
+
+import os
+import sqlite3
+import tempfile
+import time
+
+from converter.core.currency_pair import CurrencyPair
+from converter.db.db import DBHandler
+
+PAIRS = 2000
+
+
+def count_open_files() -> int:
+    try:
+        return len(os.listdir('/proc/self/fd'))
+    except FileNotFoundError:
+        return -1
+
+
+def construct_with_connection_per_pair(path_to_db: str) -> tuple[float, int]:
+    pairs = []
+    start = time.perf_counter()
+    for _ in range(PAIRS):
+        currency_pair = CurrencyPair('usa', 'cze', 10)
+        connect = sqlite3.connect(path_to_db)
+        pairs.append((currency_pair, connect, connect.cursor()))
+    elapsed = time.perf_counter() - start
+    open_files = count_open_files()
+
+    for _, connect, _ in pairs:
+        connect.close()
+    return PAIRS / elapsed, open_files
+
+
+def construct_plain_pairs(path_to_db: str) -> tuple[float, int]:
+    pairs = []
+    start = time.perf_counter()
+    for _ in range(PAIRS):
+        currency_pair = CurrencyPair('usa', 'cze', 10)
+        db = DBHandler(path_to_db)
+        currency_pair.set_result(
+            db.get_rate_from_db((currency_pair.from_currency, currency_pair.to_currency))
+        )
+        pairs.append(currency_pair)
+    elapsed = time.perf_counter() - start
+    return PAIRS / elapsed, count_open_files()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path_to_db = os.path.join(tmp_dir, 'rates.db')
+        db = DBHandler(path_to_db)
+        db.create_tables()
+        db.replace_base_rates({'USD': 1, 'CZK': 22.04})
+
+        files_at_start = count_open_files()
+        before, files_before = construct_with_connection_per_pair(path_to_db)
+        after, files_after = construct_plain_pairs(path_to_db)
+        db.close()
+
+    print(f'{PAIRS:,} pairs, {files_at_start} open files at start')
+    print(f'Connection per pair:  {before:>10,.0f} pairs/s, {files_before:>5} open files')
+    print(f'Plain pair + lookup:  {after:>10,.0f} pairs/s, {files_after:>5} open files')
+
+
+if __name__ == '__main__':
+    main()
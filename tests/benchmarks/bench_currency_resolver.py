@@ -0,0 +1,52 @@
+"""
+Micro-benchmark of resolving inputted currencies of CurrencyPair objects.
+
+Compares rebuilding the Trie for every pair (the old CurrencyPair.__post_init__ behaviour)
+with the shared CurrencyResolver.
+
+Run from the root of the repository:
+    python -m tests.benchmarks.bench_currency_resolver
+"""
+
+import time
+
+from converter.core.trie import get_currency_resolver, prepare_and_get_word_searcher
+
+INPUTS = [
+    ('usa', 'cze'), ('USD', 'EUR'), ('can', 'GBP'), ('pol', 'ukr'), ('CHF', 'jap'),
+]
+
+
+def pairs_per_second_with_trie_per_pair(n: int) -> float:
+    start = time.perf_counter()
+    for i in range(n):
+        from_currency, to_currency = INPUTS[i % len(INPUTS)]
+        word_searcher = prepare_and_get_word_searcher()
+        word_searcher.get_code(from_currency)
+        word_searcher.get_code(to_currency)
+    return n / (time.perf_counter() - start)
+
+
+def pairs_per_second_with_shared_resolver(n: int) -> float:
+    start = time.perf_counter()
+    for i in range(n):
+        from_currency, to_currency = INPUTS[i % len(INPUTS)]
+        resolver = get_currency_resolver()
+        resolver.get_code(from_currency)
+        resolver.get_code(to_currency)
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    get_currency_resolver()
+
+    before = pairs_per_second_with_trie_per_pair(200)
+    after = pairs_per_second_with_shared_resolver(200_000)
+
+    print(f'Trie per pair:   {before:>14,.0f} pairs/s')
+    print(f'Shared resolver: {after:>14,.0f} pairs/s')
+    print(f'Speed-up:        {after / before:>14,.0f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark of computing 100,000 card payments with double/triple conversions.
+
+Compares CurrencyConverterDoubleConversion.double_conversion, one payment at a time (measured on a sample),
+with double_conversion_many. The scalar path is measured with rates held in memory and with APIHandler
+reading from its warm in-memory cache (filled from the local stub server), the batch path with the first
+call on a snapshot and with a repeated one, whose payment table is already built.
+
+Run from the root of the repository:
+    python -m tests.benchmarks.bench_double_conversion_many
+"""
+
+import time
+
+import numpy as np
+
+from converter.core.currency_pair import CurrencyPair
+from converter.core.double_conversion import CurrencyConverterDoubleConversion
+from converter.handlers.API import APIHandler
+from tests.fakes import SnapshotAPI
+from tests.stub_api_server import StubAPIServer, get_backup_snapshot
+
+PAYMENTS = 100_000
+SCALAR_SAMPLE = 10_000
+
+
+def main():
+    snapshot = get_backup_snapshot()
+    random = np.random.default_rng(0)
+    codes = np.array(snapshot.codes)
+    from_codes = codes[random.integers(0, len(codes), PAYMENTS)]
+    amounts = random.integers(1, 1000, PAYMENTS).astype(float)
+    to_codes = codes[random.integers(0, len(codes), PAYMENTS)]
+    card_types = np.array(['MC', 'VISA'])[random.integers(0, 2, PAYMENTS)]
+
+    def scalar_payments_per_second(api) -> float:
+        converter = CurrencyConverterDoubleConversion()
+        converter.api = api
+        start = time.perf_counter()
+        for i in range(SCALAR_SAMPLE):
+            converter.currency_pair = CurrencyPair(
+                str(from_codes[i]), str(to_codes[i]), amounts[i], str(card_types[i])
+            )
+            converter.double_conversion()
+        return SCALAR_SAMPLE / (time.perf_counter() - start)
+
+    def batch_payments_per_second() -> float:
+        start = time.perf_counter()
+        CurrencyConverterDoubleConversion().double_conversion_many(
+            from_codes, amounts, to_codes, card_types, snapshot=snapshot
+        )
+        return PAYMENTS / (time.perf_counter() - start)
+
+    in_memory = scalar_payments_per_second(SnapshotAPI(snapshot))
+    with StubAPIServer() as server:
+        api = APIHandler()
+        api.api_url = server.url
+        api.response_cache = None
+        scalar_payments_per_second(api)
+        cached_api = scalar_payments_per_second(api)
+    first_batch = batch_payments_per_second()
+    batch = batch_payments_per_second()
+
+    print(f'Scalar, rates in memory:      {in_memory:>14,.0f} payments/s')
+    print(f'Scalar, APIHandler cache:     {cached_api:>14,.0f} payments/s')
+    print(f'double_conversion_many:       {first_batch:>14,.0f} payments/s (first call on the snapshot)')
+    print(f'double_conversion_many:       {batch:>14,.0f} payments/s '
+          f'({batch / in_memory:,.0f}x / {batch / cached_api:,.0f}x)')
+
+
+if __name__ == '__main__':
+    main()
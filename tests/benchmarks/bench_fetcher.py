@@ -0,0 +1,57 @@
+"""
+Benchmark of downloading rates of all 162 currencies from the local stub server.
+
+Every response of the stub is delayed to imitate the network, the refresh is repeated
+with a growing number of concurrent workers of RateFetcher and requests in flight of AsyncRateFetcher.
+
+Run from the root of the repository:
+    python -m tests.benchmarks.bench_fetcher
+"""
+
+import asyncio
+import time
+
+from converter.handlers.API import APIHandler
+from converter.handlers.async_API import AsyncAPIHandler, AsyncRateFetcher
+from converter.handlers.fetcher import RateFetcher
+from tests.stub_api_server import StubAPIServer
+
+LATENCY = 0.05
+
+
+def currencies_per_second(server: StubAPIServer, max_workers: int) -> float:
+    api = APIHandler()
+    api.api_url = server.url
+    api.response_cache = None
+    fetcher = RateFetcher(api, max_workers=max_workers)
+
+    start = time.perf_counter()
+    fetched = sum(1 for _ in fetcher.fetch(server.snapshot.codes))
+    return fetched / (time.perf_counter() - start)
+
+
+def currencies_per_second_in_event_loop(server: StubAPIServer, max_in_flight: int) -> float:
+    async def fetch() -> int:
+        api = AsyncAPIHandler()
+        api.api_url = server.url
+        api.response_cache = None
+        async with AsyncRateFetcher(api, max_in_flight=max_in_flight) as fetcher:
+            return sum([1 async for _ in fetcher.fetch(server.snapshot.codes)])
+
+    start = time.perf_counter()
+    fetched = asyncio.run(fetch())
+    return fetched / (time.perf_counter() - start)
+
+
+def main():
+    with StubAPIServer(latency=LATENCY) as server:
+        print(f'{len(server.snapshot)} currencies, {LATENCY * 1000:.0f} ms per response')
+        for max_workers in [1, 4, 8, 16, 32]:
+            print(f'{max_workers:>3} workers: {currencies_per_second(server, max_workers):>8,.1f} currencies/s')
+        for max_in_flight in [8, 32, 64, 162]:
+            print(f'{max_in_flight:>3} in flight: '
+                  f'{currencies_per_second_in_event_loop(server, max_in_flight):>8,.1f} currencies/s (asyncio)')
+
+
+if __name__ == '__main__':
+    main()
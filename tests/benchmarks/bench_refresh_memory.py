@@ -0,0 +1,70 @@
+"""
+Benchmark of peak memory of a refresh of all 26,082 direct quotes.
+
+The stub API server runs in a separate process, so tracemalloc only sees allocations of the refresh:
+downloads, parsing of responses, the pipeline and the writes to a database and to the default
+response cache in a temporary directory.
+
+Run from the root of the repository:
+    python -m tests.benchmarks.bench_refresh_memory
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+from converter.handlers import async_API  # imported before tracing, the import isn't part of a refresh
+from converter.handlers.main_handler import MainHandler
+
+STUB = '''
+import sys, time
+from tests.stub_api_server import StubAPIServer
+with StubAPIServer(latency=float(sys.argv[1])) as server:
+    print(server.url, flush=True)
+    time.sleep(3600)
+'''
+
+
+def measure(url: str, **options) -> tuple[float, float]:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        os.mkdir('data')
+        try:
+            handler = MainHandler(direct_quotes=True, **options)
+            handler.api.api_url = url
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            with redirect_stdout(open(os.devnull, 'w')):
+                handler.update_rates()
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            handler.db.close()
+        finally:
+            os.chdir(cwd)
+    return peak / 2 ** 20, elapsed
+
+
+def main():
+    stub = subprocess.Popen(
+        [sys.executable, '-c', STUB, '0.01'],
+        stdout=subprocess.PIPE, text=True, cwd=os.getcwd()
+    )
+    try:
+        url = stub.stdout.readline().strip()
+        for options in [{}, {'use_asyncio': True}]:
+            peak, elapsed = measure(url, **options)
+            name = 'asyncio' if options else 'threads'
+            print(f'{name:<8} peak {peak:>7.2f} MiB, {elapsed:.2f} s')
+    finally:
+        stub.kill()
+
+
+if __name__ == '__main__':
+    main()
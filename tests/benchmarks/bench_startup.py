@@ -0,0 +1,58 @@
+"""
+Benchmark of the time to the first prompt of the interactive app.
+
+Every run starts a fresh interpreter which runs main.main() and measures the time from the start of the process
+to the prompt of the main menu. The server is the stub API server with the given latency, running in this process.
+The child is pointed at the stub by the environment variable PLUTUS_API_URL and runs with the default
+response cache, so it starts exactly as the app does.
+
+Run from the root of the repository:
+    python -m tests.benchmarks.bench_startup
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from converter.handlers.API import API_URL_VARIABLE
+from tests.stub_api_server import StubAPIServer
+
+RUNS = 5
+PROMPT = b'Type your choice'
+CHILD = '''
+import main
+main.main()
+'''
+
+
+def measure(url: str) -> float:
+    start = time.perf_counter()
+    child = subprocess.Popen(
+        [sys.executable, '-c', CHILD],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, cwd=os.getcwd(),
+        env={**os.environ, API_URL_VARIABLE: url}
+    )
+    try:
+        output = b''
+        while PROMPT not in output:
+            chunk = child.stdout.read1(4096)
+            if not chunk:
+                raise RuntimeError(f'The app exited before the prompt: {output[-200:]!r}')
+            output += chunk
+        return time.perf_counter() - start
+    finally:
+        child.kill()
+        child.wait()
+
+
+def main():
+    for latency in [0, 0.2, 1]:
+        with StubAPIServer(latency=latency) as server:
+            times = [measure(server.url) for _ in range(RUNS)]
+        print(f'server latency {latency:>4.1f} s: first prompt in {statistics.median(times) * 1000:>7.1f} ms (median of {RUNS})')
+
+
+if __name__ == '__main__':
+    main()
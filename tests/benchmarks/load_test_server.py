@@ -0,0 +1,104 @@
+"""
+Load test of the HTTP service of quotes, reports latency percentiles and requests per second.
+
+Sends GET /convert and /pay requests from concurrent clients over keep-alive connections,
+and POST /convert/batch requests with --batch-size rows if it's given.
+Without --url a service is started in this process, with rates of data/backup.json.
+
+Run from the root of the repository:
+    python -m tests.benchmarks.load_test_server [--url http://127.0.0.1:8000] [--requests 20000] [--concurrency 16]
+"""
+
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+from converter.app.server import ConversionService, make_server
+from converter.core.double_conversion import CurrencyConverterDoubleConversion
+from tests.fakes import SnapshotAPI
+from tests.stub_api_server import get_backup_snapshot
+
+
+def start_local_service() -> str:
+    converter = CurrencyConverterDoubleConversion()
+    converter.api = SnapshotAPI(get_backup_snapshot())
+    service = ConversionService(converter)
+    service.start_refreshing()
+    server = make_server(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def get_requests(count: int, batch_size: int, seed: int = 0) -> list[tuple[str, str, bytes]]:
+    generator = random.Random(seed)
+    codes = list(get_backup_snapshot().codes)
+    requests = []
+    for i in range(count):
+        from_currency, to_currency = generator.choice(codes), generator.choice(codes)
+        if batch_size:
+            rows = [
+                {'amount': generator.randint(1, 1000), 'from': generator.choice(codes), 'to': generator.choice(codes)}
+                for _ in range(batch_size)
+            ]
+            requests.append(('POST', '/convert/batch', json.dumps(rows).encode()))
+        elif i % 2:
+            requests.append(('GET', f'/convert?amount={i}&from={from_currency}&to={to_currency}', None))
+        else:
+            card_type = generator.choice(['MC', 'VISA'])
+            requests.append(('GET', f'/pay?amount={i}&from={from_currency}&to={to_currency}&card_type={card_type}', None))
+    return requests
+
+
+def run_client(url: str, requests: list, latencies: list, errors: list):
+    address = urlsplit(url)
+    connection = http.client.HTTPConnection(address.hostname, address.port)
+    for method, path, body in requests:
+        start = time.perf_counter()
+        connection.request(method, path, body, {'Content-Type': 'application/json'} if body else {})
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        if response.status != 200:
+            errors.append(response.status)
+    connection.close()
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', help='running service, a local one is started by default')
+    parser.add_argument('--requests', type=int, default=20_000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--batch-size', type=int, default=0, help='rows of POST /convert/batch, GET requests if 0')
+    args = parser.parse_args()
+
+    url = args.url or start_local_service()
+    requests = get_requests(args.requests, args.batch_size)
+    latencies, errors = [], []
+    clients = [
+        threading.Thread(target=run_client, args=(url, requests[i::args.concurrency], latencies, errors))
+        for i in range(args.concurrency)
+    ]
+    start = time.perf_counter()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f'Requests:      {len(latencies):>10,} ({len(errors)} failed), {args.concurrency} clients')
+    print(f'Throughput:    {len(latencies) / elapsed:>10,.0f} requests/s')
+    print(f'Latency p50:   {percentile(latencies, 0.50) * 1000:>10.2f} ms')
+    print(f'Latency p99:   {percentile(latencies, 0.99) * 1000:>10.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,21 @@
+"""
+In-process stand-ins of the handlers, shared by tests and benchmarks.
+"""
+
+
+class SnapshotAPI:
+    """
+    Stand-in of APIHandler answering with rates of a snapshot
+    """
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.rates = {}
+
+    def get_rate_from_API(self, from_currency: str, to_currency: str) -> float:
+        return self.snapshot.get_rate(from_currency, to_currency)
+
+    def get_cached_rates_from_API(self, currency_code: str) -> dict:
+        if currency_code not in self.rates:
+            self.rates[currency_code] = self.snapshot.get_rates(currency_code)
+        return self.rates[currency_code]
@@ -0,0 +1,120 @@
+"""
+Local stand-in for the exchangerate-api v4 server, used to test and benchmark downloads offline.
+
+Serves GET /v4/latest/<CODE> with rates derived from data/backup.json.
+Responses carry an ETag, a request with a matching If-None-Match header is answered with 304.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from converter.core.rate_snapshot import RateSnapshot
+
+PATH_TO_BACKUP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'backup.json')
+
+
+def get_backup_snapshot() -> RateSnapshot:
+    with open(PATH_TO_BACKUP) as file:
+        base_rates = json.load(file)
+    timestamp = base_rates.pop('timestamp', 0)
+    return RateSnapshot(base_rates, timestamp=timestamp)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # the default backlog of 5 drops connections of many concurrent clients
+    request_queue_size = 256
+
+
+class StubAPIServer:
+    """
+    Context manager running the stub server in a background thread.
+
+    Parameters
+    ----------
+    latency : float
+        delay in seconds before every response
+    failures : int
+        number of first requests answered with 503
+    next_update_in : float
+        seconds from now sent as time_next_update of the payload
+    """
+
+    def __init__(self, latency: float = 0, failures: int = 0, next_update_in: float = 3600):
+        self.snapshot = get_backup_snapshot()
+        self.latency = latency
+        self.failures = failures
+        self.next_update_in = next_update_in
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.server = _Server(('127.0.0.1', 0), self.__make_handler())
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/v4/latest/'
+
+    def __enter__(self) -> 'StubAPIServer':
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get_payload(self, currency_code: str) -> dict:
+        return {
+            'base': currency_code,
+            'time_last_updated': int(self.snapshot.timestamp),
+            'time_next_update': int(time.time() + self.next_update_in),
+            'rates': self.snapshot.get_rates(currency_code)
+        }
+
+    def count_request(self) -> int:
+        with self.lock:
+            self.requests += 1
+            return self.requests
+
+    def __make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                number = stub.count_request()
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                currency_code = self.path.rstrip('/').rsplit('/', 1)[-1]
+                if number <= stub.failures:
+                    self.__respond(503, {'result': 'error'})
+                elif currency_code not in stub.snapshot:
+                    self.__respond(404, {'result': 'error', 'error-type': 'unsupported-code'})
+                else:
+                    self.__respond(200, stub.get_payload(currency_code), with_etag=True)
+
+            def __respond(self, status: int, payload: dict, with_etag: bool = False):
+                body = json.dumps(payload).encode()
+                if with_etag:
+                    etag = '"%s"' % hashlib.md5(json.dumps(payload['rates']).encode()).hexdigest()
+                    if self.headers.get('If-None-Match') == etag:
+                        status, body = 304, b''
+
+                self.send_response(status)
+                if with_etag:
+                    self.send_header('ETag', etag)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                try:
+                    self.end_headers()
+                    self.wfile.write(body)
+                except ConnectionError:
+                    # the client gave up waiting, as timeout tests do
+                    self.close_connection = True
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,83 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import types
+import unittest
+import unittest.mock
+
+from converter.app.app import App
+from converter.core.exceptions import NoSuchCurrencyException, ServerError
+from converter.db.db import DBHandler
+from converter.handlers.API import API_URL_VARIABLE, APIHandler
+from tests.stub_api_server import StubAPIServer
+
+
+class TestLazyStartup(unittest.TestCase):
+    def setUp(self) -> None:
+        self.api_url, self.response_cache = APIHandler.api_url, APIHandler.response_cache
+        APIHandler.response_cache = None
+
+    def tearDown(self) -> None:
+        APIHandler.api_url, APIHandler.response_cache = self.api_url, self.response_cache
+
+    def test_subsystems_are_created_on_first_use(self):
+        app = App()
+        self.assertEqual({'converter', 'handler', 'menu'} & set(vars(app)), set())
+        self.assertIs(app.converter, app.converter)
+        self.assertIn('converter', vars(app))
+
+    def test_server_state_is_checked_in_background(self):
+        with StubAPIServer(latency=0.2) as server:
+            APIHandler.api_url = server.url
+            app = App()
+            start = time.perf_counter()
+            app.start_checking_server_state()
+            self.assertLess(time.perf_counter() - start, 0.2)
+            app.wait_for_server_state()
+            self.assertEqual(server.requests, 1)
+
+    def test_error_of_the_check_is_raised_on_first_use_of_the_api(self):
+        with StubAPIServer(failures=1) as server:
+            APIHandler.api_url = server.url
+            app = App()
+            app.start_checking_server_state()
+            with self.assertRaises(ServerError):
+                app.wait_for_server_state()
+
+    def test_server_from_environment(self):
+        completed = subprocess.run(
+            [sys.executable, '-c', 'from converter.app.app import App; print(App().converter.api.api_url)'],
+            cwd=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+            env={**os.environ, API_URL_VARIABLE: 'http://127.0.0.1:1/v4/latest/'},
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        self.assertEqual(completed.stdout.strip(), 'http://127.0.0.1:1/v4/latest/')
+
+
+class TestShowSavedCurrencies(unittest.TestCase):
+    def test_pair_without_rate_is_reported_and_others_are_shown(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = DBHandler(os.path.join(tmp_dir, 'rates.db'))
+            db.create_tables()
+            db.replace_base_rates({'USD': 1, 'EUR': 0.5})
+            for pair in [('USD', 'EUR', 10), ('USD', 'GBP', 1), ('EUR', 'USD', 1)]:
+                db.insert_new_pair_in_saved_currencies(pair)
+
+            app = App()
+            app.handler = types.SimpleNamespace(db=db)
+            app.converter.path_to_db = db.get_path_to_db()
+            app.converter.switch_rate_source()
+            app.menu = unittest.mock.Mock()
+            app.show_saved_currencies()
+
+            shown = [call.args[0] for call in app.menu.print_exchange_result.call_args_list]
+            self.assertEqual([(pair.to_currency, pair.result) for pair in shown], [('EUR', 5), ('USD', 2)])
+            (error,), _ = app.menu.print_exception.call_args
+            self.assertIsInstance(error, NoSuchCurrencyException)
+            self.assertIn('GBP', str(error))
+            app.converter.db.close()
+            db.close()
@@ -0,0 +1,104 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from converter.core.exceptions import ServerError
+from converter.handlers.async_API import AsyncAPIHandler, AsyncRateFetcher
+from converter.handlers.http_cache import DiskResponseCache
+from tests.stub_api_server import StubAPIServer
+
+
+class TestAsyncAPIHandler(unittest.TestCase):
+    def get_api(self, server: StubAPIServer, response_cache: DiskResponseCache = None) -> AsyncAPIHandler:
+        api = AsyncAPIHandler()
+        api.api_url = server.url
+        api.response_cache = response_cache
+        return api
+
+    def test_same_surface_as_api_handler(self):
+        async def run(api: AsyncAPIHandler):
+            async with api:
+                await api.check_server_state()
+                return (
+                    await api.get_rate_from_API('EUR', 'CZK'),
+                    await api.get_list_of_currencies()
+                )
+
+        with StubAPIServer() as server:
+            rate, currencies = asyncio.run(run(self.get_api(server)))
+
+        self.assertAlmostEqual(rate, server.snapshot.get_rate('EUR', 'CZK'))
+        self.assertEqual(currencies, list(server.snapshot.codes))
+
+    def test_cached_response_is_revalidated(self):
+        async def run(api: AsyncAPIHandler):
+            async with api:
+                for _ in range(3):
+                    await api.get_rates_from_API('USD')
+
+        with tempfile.TemporaryDirectory() as tmp_dir, StubAPIServer(next_update_in=-1) as server:
+            asyncio.run(run(self.get_api(server, DiskResponseCache(tmp_dir, revalidate_after=-1))))
+            self.assertEqual(server.requests, 3)
+
+            asyncio.run(run(self.get_api(server, DiskResponseCache(tmp_dir))))
+            self.assertEqual(server.requests, 4)
+
+    def test_streamed_response_is_stored(self):
+        async def run(api: AsyncAPIHandler):
+            async with api:
+                return [rate async for rate in api.iter_rates_from_API('CZK')]
+
+        with tempfile.TemporaryDirectory() as tmp_dir, StubAPIServer() as server:
+            rates = asyncio.run(run(self.get_api(server, DiskResponseCache(tmp_dir))))
+            self.assertEqual(asyncio.run(run(self.get_api(server, DiskResponseCache(tmp_dir)))), rates)
+            self.assertEqual(server.requests, 1)
+            entry = DiskResponseCache(tmp_dir).get('CZK', server.url + 'CZK')
+
+        self.assertEqual(entry['payload']['rates'], dict(rates))
+
+    def test_unfinished_stream_is_not_stored(self):
+        async def run(api: AsyncAPIHandler):
+            async with api:
+                rates = api.iter_rates_from_API('CZK')
+                await anext(rates)
+                await rates.aclose()
+
+        with tempfile.TemporaryDirectory() as tmp_dir, StubAPIServer() as server:
+            asyncio.run(run(self.get_api(server, DiskResponseCache(tmp_dir))))
+            self.assertEqual(os.listdir(tmp_dir), [])
+
+
+class TestAsyncRateFetcher(unittest.TestCase):
+    def fetch(self, server: StubAPIServer, currencies, **options) -> dict:
+        async def run():
+            api = AsyncAPIHandler()
+            api.api_url = server.url
+            api.response_cache = None
+            async with AsyncRateFetcher(api, backoff=0.01, **options) as fetcher:
+                return {code: rates async for code, rates in fetcher.fetch(currencies)}
+
+        return asyncio.run(run())
+
+    def test_fetch_all_currencies(self):
+        with StubAPIServer() as server:
+            fetched = self.fetch(server, server.snapshot.codes, max_in_flight=16)
+
+        self.assertEqual(set(fetched), set(server.snapshot.codes))
+        self.assertAlmostEqual(fetched['EUR']['CZK'], server.snapshot.get_rate('EUR', 'CZK'))
+
+    def test_retry_after_failures(self):
+        with StubAPIServer(failures=2) as server:
+            self.assertIn('USD', self.fetch(server, ['USD'], retries=2))
+            self.assertEqual(server.requests, 3)
+
+    def test_server_error_after_retries(self):
+        with StubAPIServer(failures=10) as server:
+            with self.assertRaises(ServerError):
+                self.fetch(server, ['USD'], retries=1)
+            self.assertEqual(server.requests, 2)
+
+    def test_timeout(self):
+        with StubAPIServer(latency=0.5) as server:
+            with self.assertRaises(ServerError):
+                self.fetch(server, ['USD'], retries=0, timeout=0.05)
@@ -0,0 +1,141 @@
+import contextlib
+import io
+import itertools
+import json
+import os
+import tempfile
+import unittest
+
+from converter.app import cli
+from converter.core.currency_pair import CurrencyPair
+from converter.core.double_conversion import CurrencyConverterDoubleConversion
+from converter.db.db import DBHandler
+from converter.handlers.API import APIHandler
+from converter.handlers.http_cache import DiskResponseCache
+from tests.stub_api_server import StubAPIServer, get_backup_snapshot
+
+
+class TestConvertCommand(unittest.TestCase):
+    def setUp(self) -> None:
+        self.snapshot = get_backup_snapshot()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path_to_db = os.path.join(self.tmp_dir.name, 'rates.db')
+        self.db = DBHandler(self.path_to_db)
+        self.db.create_tables()
+        self.db.replace_base_rates(dict(zip(self.snapshot.codes, self.snapshot.rates)))
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.tmp_dir.cleanup()
+
+    def run_convert(self, name: str, content: str, *options: str) -> tuple[int, str, str]:
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, 'w') as file:
+            file.write(content)
+        output = os.path.join(self.tmp_dir.name, 'results')
+        errors = io.StringIO()
+        with contextlib.redirect_stderr(errors):
+            status = cli.main(['convert', path, '-o', output, '--source', 'db', '--db', self.path_to_db, *options])
+        with open(output) as file:
+            return status, file.read(), errors.getvalue()
+
+    def test_csv(self):
+        status, output, errors = self.run_convert(
+            'pairs.csv',
+            'amount,from,to,card_type\n100,USD,EUR,\n50,usa,CZK,visa\n',
+            '--chunk-size', '1'
+        )
+        self.assertEqual(status, 0)
+        self.assertEqual(errors, '')
+
+        header, exchange, payment = output.splitlines()
+        self.assertEqual(header, 'amount,from,to,card_type,result')
+        self.assertEqual(exchange, f'100.0,USD,EUR,,{CurrencyPair("USD", "EUR", 100).with_rate(self.snapshot.get_rate("USD", "EUR")).result}')
+        self.assertEqual(
+            float(payment.split(',')[-1]),
+            self.snapshot.payment_table().quote('USD', 'CZK', 50, 'VISA')
+        )
+
+    def test_jsonl_with_rejected_rows(self):
+        status, output, errors = self.run_convert(
+            'pairs.jsonl',
+            '{"amount": 1, "from": "EUR", "to": "USD"}\n'
+            '{"amount": 1, "from": "XXX", "to": "USD"}\n'
+            '\n'
+            '{"amount": 2, "from": "EUR", "to": "USD", "card_type": "AMEX"}\n'
+            '{"from": "EUR", "to": "USD"}\n'
+        )
+        self.assertEqual(status, 1)
+        self.assertEqual([json.loads(line)['from'] for line in output.splitlines()], ['EUR'])
+        self.assertEqual(len(errors.splitlines()), 3)
+        self.assertIn('row 2: unknown currency', errors)
+        self.assertIn('row 3: unknown card type', errors)
+        self.assertIn('row 4: missing amount', errors)
+
+    def test_invalid_json_line_is_rejected(self):
+        status, output, errors = self.run_convert(
+            'pairs.jsonl',
+            '{"amount": 1, "from": "EUR", "to": "USD"}\n'
+            '{"amount": 1, "from": "EUR",\n'
+            '{"amount": 3, "from": "USD", "to": "EUR"}\n'
+        )
+        self.assertEqual(status, 1)
+        self.assertEqual([json.loads(line)['amount'] for line in output.splitlines()], [1, 3])
+        self.assertEqual(len(errors.splitlines()), 1)
+        self.assertIn('row 2: invalid JSON', errors)
+
+    def test_missing_database(self):
+        errors = io.StringIO()
+        with contextlib.redirect_stderr(errors):
+            status = cli.main(['convert', '--source', 'db', '--db', os.path.join(self.tmp_dir.name, 'none.db')])
+        self.assertEqual(status, 1)
+        self.assertIn('database', errors.getvalue())
+
+    def test_rows_are_converted_lazily(self):
+        rows = itertools.cycle([{'amount': '10', 'from': 'EUR', 'to': 'USD', 'card_type': 'MC'}])
+        results = cli.convert_rows(CurrencyConverterDoubleConversion(), self.snapshot, rows, chunk_size=100)
+        self.assertEqual(len(list(itertools.islice(results, 250))), 250)
+
+
+class TestRefreshCommand(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+        self.path_to_db = os.path.join(self.tmp_dir.name, 'rates.db')
+        self.api_url, self.response_cache = APIHandler.api_url, APIHandler.response_cache
+
+    def tearDown(self) -> None:
+        APIHandler.api_url, APIHandler.response_cache = self.api_url, self.response_cache
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+
+    def run_refresh(self, *options: str) -> tuple[int, str]:
+        errors = io.StringIO()
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(errors):
+            status = cli.main(['refresh', '--db', self.path_to_db, *options])
+        return status, errors.getvalue()
+
+    def test_incremental_refresh_in_event_loop(self):
+        with StubAPIServer() as server:
+            APIHandler.api_url = server.url
+            APIHandler.response_cache = DiskResponseCache(os.path.join(self.tmp_dir.name, 'http_cache'))
+            first = self.run_refresh('--incremental', '--async', '--max-workers', '4')
+            second = self.run_refresh('--incremental')
+
+        count = len(server.snapshot.codes)
+        self.assertEqual(first, (0, f'plutus: downloaded {count} bases, skipped 0 fresh bases, '
+                                    f'wrote {count * (count - 1)} rates\n'))
+        self.assertEqual(second, (0, f'plutus: downloaded 0 bases, skipped {count} fresh bases, wrote 0 rates\n'))
+        db = DBHandler(self.path_to_db)
+        self.assertEqual(db.get_count_of_prepared_currencies(), count * (count - 1))
+        db.close()
+
+    def test_unavailable_server(self):
+        with StubAPIServer(failures=10) as server:
+            APIHandler.api_url = server.url
+            APIHandler.response_cache = None
+            status, errors = self.run_refresh()
+
+        self.assertEqual(status, 1)
+        self.assertIn('can\'t refresh rates', errors)
@@ -0,0 +1,134 @@
+import asyncio
+import os
+import random
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from converter.core.currency_pair import CurrencyPair
+from converter.core.double_conversion import CurrencyConverterDoubleConversion
+from converter.db.db import DBHandler
+from converter.handlers.API import APIHandler, get_rate_cache
+from tests.fakes import SnapshotAPI
+from tests.stub_api_server import StubAPIServer, get_backup_snapshot
+
+WORKERS = 16
+REQUESTS = 4000
+
+
+class TestConcurrentQuotes(unittest.TestCase):
+    '''
+    One converter serves many threads and asyncio tasks, results must not depend on the interleaving
+    '''
+
+    def setUp(self) -> None:
+        self.snapshot = get_backup_snapshot()
+        self.converter = CurrencyConverterDoubleConversion()
+        self.converter.api = SnapshotAPI(self.snapshot)
+
+        generator = random.Random(0)
+        codes = list(self.snapshot.codes)
+        self.pairs = [
+            CurrencyPair(
+                generator.choice(codes),
+                generator.choice(codes),
+                generator.choice([1, 15, 100, 2500.5]),
+                generator.choice(['MC', 'VISA'])
+            )
+            for _ in range(REQUESTS)
+        ]
+
+    def quote(self, pair: CurrencyPair) -> tuple[float, float]:
+        return self.converter.quote(pair).result, self.converter.quote_payment(pair).result
+
+    def assert_same_as_sequential(self, run):
+        expected = [self.quote(pair) for pair in self.pairs]
+        for _ in range(3):
+            self.assertEqual(run(), expected)
+        self.assertTrue(all(pair.result is None for pair in self.pairs))
+
+    def test_thread_pool(self):
+        def run():
+            with ThreadPoolExecutor(WORKERS) as executor:
+                return list(executor.map(self.quote, self.pairs))
+
+        self.assert_same_as_sequential(run)
+
+    def test_asyncio_tasks(self):
+        async def gather():
+            return await asyncio.gather(*(asyncio.to_thread(self.quote, pair) for pair in self.pairs))
+
+        self.assert_same_as_sequential(lambda: asyncio.run(gather()))
+
+    def test_thread_pool_with_rates_from_db(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.converter.path_to_db = os.path.join(tmp_dir, 'rates.db')
+            db = DBHandler(self.converter.path_to_db)
+            db.create_tables()
+            db.replace_base_rates(dict(zip(self.snapshot.codes, self.snapshot.rates)))
+            self.converter.switch_rate_source()
+
+            def run():
+                with ThreadPoolExecutor(WORKERS) as executor:
+                    return list(executor.map(self.quote, self.pairs[:500]))
+
+            try:
+                expected = [self.quote(pair) for pair in self.pairs[:500]]
+                self.assertEqual(run(), expected)
+            finally:
+                db.close()
+
+
+class TestQuoteMany(unittest.TestCase):
+    def setUp(self) -> None:
+        get_rate_cache().clear()
+
+    def tearDown(self) -> None:
+        get_rate_cache().clear()
+
+    def test_every_base_is_downloaded_once(self):
+        with StubAPIServer(latency=0.01) as server:
+            converter = CurrencyConverterDoubleConversion()
+            converter.api = APIHandler()
+            converter.api.api_url = server.url
+            converter.api.response_cache = None
+
+            bases = ['USD', 'EUR', 'CZK', 'GBP', 'JPY']
+            pairs = [CurrencyPair(bases[i % 5], server.snapshot.codes[i], i + 1) for i in range(50)]
+            progress = []
+            quoted = converter.quote_many(pairs, progress=lambda done, total: progress.append((done, total)))
+
+            self.assertEqual(server.requests, 5)
+            self.assertEqual(progress[-1], (5, 5))
+            self.assertEqual(quoted, [converter.quote(pair) for pair in pairs])
+            self.assertEqual([pair.result for pair in quoted], [converter.quote(pair).result for pair in pairs])
+            self.assertTrue(all(pair.result is None for pair in pairs))
+
+    def test_saved_pairs_from_database(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            converter = CurrencyConverterDoubleConversion()
+            converter.path_to_db = os.path.join(tmp_dir, 'rates.db')
+            converter.switch_rate_source()
+            converter.db.create_tables()
+            converter.db.replace_base_rates(dict(zip(get_backup_snapshot().codes, get_backup_snapshot().rates)))
+            converter.db.insert_pairs_in_prepared_currencies([('USD', 'EUR', 0.5)])
+
+            pairs = [CurrencyPair('USD', 'EUR', 10), CurrencyPair('EUR', 'CZK', 3), CurrencyPair('USD', 'GBP', 1)]
+            self.assertEqual(
+                [pair.result for pair in converter.quote_many(pairs)],
+                [converter.quote(pair).result for pair in pairs]
+            )
+            self.assertEqual(converter.quote_many(pairs)[0].result, 5)
+            converter.db.close()
+
+    def test_unknown_target_leaves_its_result_empty(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            converter = CurrencyConverterDoubleConversion()
+            converter.path_to_db = os.path.join(tmp_dir, 'rates.db')
+            converter.switch_rate_source()
+            converter.db.create_tables()
+            converter.db.replace_base_rates({'USD': 1, 'EUR': 0.5})
+
+            pairs = [CurrencyPair('USD', 'EUR', 10), CurrencyPair('USD', 'GBP', 1), CurrencyPair('EUR', 'USD', 1)]
+            self.assertEqual([pair.result for pair in converter.quote_many(pairs)], [5, None, 2])
+            converter.db.close()
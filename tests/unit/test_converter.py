@@ -1,7 +1,15 @@
 import unittest
+from decimal import Decimal
 
 from converter.core.currency_converter import CurrencyConverter
 from converter.core.currency_pair import CurrencyPair
+from converter.core.exceptions import NoSuchCurrencyException
+from converter.core.rate_snapshot import RateSnapshot
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
 
 
 class TestCurrencyConverter(unittest.TestCase):
@@ -30,3 +38,54 @@ class TestCurrencyConverter(unittest.TestCase):
         self.converter.switch_rate_source()
 
         self.assertTrue(self.converter.rates_are_from_db)
+
+
+class TestConvertMany(unittest.TestCase):
+    def setUp(self) -> None:
+        self.converter = CurrencyConverter()
+        self.snapshot = RateSnapshot({'USD': 1, 'CZK': 22.04, 'EUR': 0.914, 'UAH': 36.93})
+        self.amounts = [50, 1, 2.5, 100]
+        self.from_codes = ['EUR', 'USD', 'UAH', 'CZK']
+        self.to_codes = ['CZK', 'EUR', 'UAH', 'USD']
+
+    def get_scalar_results(self) -> list[float]:
+        results = []
+        for amount, from_currency, to_currency in zip(self.amounts, self.from_codes, self.to_codes):
+            currency_pair = CurrencyPair(from_currency, to_currency, amount)
+            currency_pair.set_result(self.snapshot.get_rate(from_currency, to_currency))
+            results.append(currency_pair.result)
+        return results
+
+    def test_exact_rounding_matches_exchange(self):
+        results = self.converter.convert_many(
+            self.amounts, self.from_codes, self.to_codes, snapshot=self.snapshot, rounding='exact'
+        )
+        self.assertEqual(results.tolist(), self.get_scalar_results())
+
+    def test_fast_rounding(self):
+        results = self.converter.convert_many(
+            self.amounts, self.from_codes, self.to_codes, snapshot=self.snapshot
+        )
+        for result, expected in zip(results, self.get_scalar_results()):
+            self.assertAlmostEqual(result, expected, 9)
+
+    def test_decimal_rounding(self):
+        results = self.converter.convert_many(
+            self.amounts, self.from_codes, self.to_codes, snapshot=self.snapshot, rounding='decimal'
+        )
+        self.assertEqual(results[0], Decimal('1205.68928'))
+        self.assertEqual(results[2], Decimal('2.50000'))
+
+    def test_unknown_currency(self):
+        with self.assertRaises(NoSuchCurrencyException):
+            self.converter.convert_many([1], ['USD'], ['XYZ'], snapshot=self.snapshot)
+
+    @unittest.skipIf(pd is None, 'pandas is not installed')
+    def test_data_frame(self):
+        data_frame = pd.DataFrame({
+            'amount': self.amounts,
+            'from_currency': self.from_codes,
+            'to_currency': self.to_codes
+        })
+        results = self.converter.convert_many(data_frame, snapshot=self.snapshot, rounding='exact')
+        self.assertEqual(results.tolist(), self.get_scalar_results())
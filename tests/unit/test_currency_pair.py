@@ -1,5 +1,7 @@
 import unittest
+import unittest.mock
 
+from converter.core.currency_converter import CurrencyConverter
 from converter.core.currency_pair import CurrencyPair
 
 
@@ -36,18 +38,43 @@ class TestCurrencyPair(unittest.TestCase):
 
         self.assertTrue(self.currency_pair.currencies_filled_out())
 
+    def test_set_result(self):
+        '''
+        Test that method set_result multiplies the rate by the amount and rounds the result
+        '''
+
+        currency_pair = CurrencyPair('USD', 'CZK', 3)
+        currency_pair.set_result(22.0412345678)
+        self.assertEqual(currency_pair.result, 66.12370)
+
+    def test_with_rate_keeps_resolved_codes(self):
+        '''
+        Test that with_rate copies the codes without resolving them again
+        '''
+
+        currency_pair = CurrencyPair('EFWE', 'usa', 2)
+        quoted = currency_pair.with_rate(1.5)
+        self.assertEqual((quoted.from_currency, quoted.to_currency, quoted.result), ('', 'USD', 3))
+        self.assertIsNone(currency_pair.result)
+
+        with unittest.mock.patch('converter.core.currency_pair.get_currency_resolver') as resolver:
+            self.currency_pair.with_rate(2)
+        resolver.assert_not_called()
+
     def test_result_from_api(self):
         '''
-        Test that method set_result_from_api sets a result of valid type
+        Test that a pair gets a result of valid type from the API
         '''
 
-        self.currency_pair.set_result_from_api()
+        CurrencyConverter().exchange(self.currency_pair)
         self.assertIsInstance(self.currency_pair.result, float)
 
     def test_result_from_db(self):
         '''
-        Test that method set_result_from_db sets a result of valid type
+        Test that a pair gets a result of valid type from the database
         '''
 
-        self.currency_pair.set_result_from_db()
+        converter = CurrencyConverter()
+        converter.switch_rate_source()
+        converter.exchange(self.currency_pair)
         self.assertIsInstance(self.currency_pair.result, float)
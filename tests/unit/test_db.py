@@ -0,0 +1,231 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from converter.db.db import MIGRATIONS, PAIRS_PER_STATEMENT, DBHandler
+
+
+class TestBulkLoad(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = DBHandler(os.path.join(self.tmp_dir.name, 'rates.db'))
+        self.db.create_tables()
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.tmp_dir.cleanup()
+
+    def get_modes(self) -> tuple:
+        return (
+            self.db.c.execute('PRAGMA journal_mode').fetchone()[0],
+            self.db.c.execute('PRAGMA synchronous').fetchone()[0]
+        )
+
+    def test_rows_inserted_in_one_load(self):
+        rows = [(from_currency, to_currency, 1.5) for from_currency in 'ABC' for to_currency in 'ABC'
+                if from_currency != to_currency]
+        with self.db.bulk_load():
+            self.assertEqual(self.db.insert_pairs_in_prepared_currencies(iter(rows)), len(rows))
+        self.assertEqual(self.db.c.execute('SELECT count(*) FROM prepared_currencies').fetchone()[0], len(rows))
+
+    def test_modes_restored_after_load(self):
+        modes = self.get_modes()
+        with self.db.bulk_load(journal_mode='memory', synchronous='off'):
+            self.assertEqual(self.get_modes(), ('memory', 0))
+        self.assertEqual(self.get_modes(), modes)
+
+    def test_modes_restored_after_error(self):
+        modes = self.get_modes()
+        with self.assertRaises(RuntimeError):
+            with self.db.bulk_load():
+                self.db.insert_pairs_in_prepared_currencies([('USD', 'EUR', 0.9)])
+                raise RuntimeError
+        self.assertEqual(self.get_modes(), modes)
+        with self.assertRaises(ValueError):
+            with self.db.bulk_load(journal_mode='fast'):
+                pass
+
+
+class TestStagingRefresh(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path_to_db = os.path.join(self.tmp_dir.name, 'rates.db')
+        self.db = DBHandler(self.path_to_db)
+        self.db.create_tables()
+        self.db.enable_write_ahead_log()
+        self.db.insert_pairs_in_prepared_currencies([('USD', 'EUR', 0.9), ('EUR', 'USD', 1.1)])
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.tmp_dir.cleanup()
+
+    def read_in_other_thread(self) -> tuple:
+        '''
+        Reads with a handler of another thread, which has its own connection
+        '''
+
+        def read():
+            reader = DBHandler(self.path_to_db)
+            try:
+                return (
+                    reader.get_rate_from_db(('USD', 'EUR')),
+                    reader.get_count_of_prepared_currencies(),
+                    reader.get_count_of_base_rates()
+                )
+            finally:
+                reader.close()
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(read).result()
+
+    def test_previous_rates_readable_until_swap(self):
+        '''
+        Test that a reader sees the complete previous table during a refresh and the new one after the swap
+        '''
+
+        self.db.create_staging_prepared_currencies()
+        with self.db.bulk_load():
+            self.db.insert_pairs_in_staging_prepared_currencies([('USD', 'EUR', 0.8)])
+            self.assertEqual(self.read_in_other_thread(), (0.9, 2, 0))
+
+        self.db.swap_in_staging_prepared_currencies({'USD': 1, 'EUR': 0.8})
+
+        self.assertEqual(self.read_in_other_thread(), (0.8, 1, 2))
+
+    def test_handlers_of_thread_share_connection(self):
+        self.assertIs(DBHandler(self.path_to_db).connect, self.db.connect)
+
+    def test_connection_closed_directly_is_reopened(self):
+        self.db.connect.close()
+        db = DBHandler(self.path_to_db)
+        self.assertIsNot(db.connect, self.db.connect)
+        self.assertEqual(db.get_rate_from_db(('USD', 'EUR')), 0.9)
+        self.db = db
+
+    def test_reader_not_blocked_by_writer(self):
+        '''
+        Test that a reader doesn't wait for an open write transaction
+        '''
+
+        self.db.create_staging_prepared_currencies()
+        self.db.c.execute('BEGIN IMMEDIATE')
+        self.db.c.execute('INSERT INTO prepared_currencies_staging (from_currency, to_currency, rate) '
+                          'VALUES (\'USD\', \'EUR\', 0.8)')
+
+        reader = sqlite3.connect(self.path_to_db, timeout=0)
+        rate = reader.execute(
+            'SELECT rate FROM prepared_currencies WHERE from_currency = \'USD\' AND to_currency = \'EUR\''
+        ).fetchone()[0]
+        self.assertEqual(rate, 0.9)
+        reader.close()
+        self.db.connect.rollback()
+
+
+class TestUpsertRatesOfBase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = DBHandler(os.path.join(self.tmp_dir.name, 'rates.db'))
+        self.db.create_tables()
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.tmp_dir.cleanup()
+
+    def test_only_changed_rates_are_written(self):
+        rates = [('EUR', 0.9), ('CZK', 23.0), ('USD', 1.0)]
+        self.assertEqual(self.db.upsert_rates_of_base('USD', rates, 100, 200, 150), 2)
+        self.assertEqual(self.db.upsert_rates_of_base('USD', rates, 100, 200, 160), 0)
+        self.assertEqual(self.db.upsert_rates_of_base('USD', [('EUR', 0.8), ('CZK', 23.0)], 300, 400, 350), 1)
+
+        self.assertEqual(self.db.get_rate_from_db(('USD', 'EUR')), 0.8)
+        self.assertEqual(self.db.get_fetched_bases(), {'USD': (300, 400)})
+
+
+class TestMigrations(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path_to_db = os.path.join(self.tmp_dir.name, 'rates.db')
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_database_before_versioning_is_migrated(self):
+        '''
+        Test that direct quotes of a database with the rowid table of prepared_currencies are kept
+        '''
+
+        old = sqlite3.connect(self.path_to_db)
+        old.execute('CREATE TABLE prepared_currencies (id INTEGER PRIMARY KEY, from_currency STRING, '
+                    'to_currency STRING, rate REAL, UNIQUE(from_currency, to_currency))')
+        old.executemany('INSERT INTO prepared_currencies (from_currency, to_currency, rate) VALUES (?, ?, ?)',
+                        [('USD', 'EUR', 0.9), ('EUR', 'USD', 1.1)])
+        old.commit()
+        old.close()
+
+        db = DBHandler(self.path_to_db)
+        try:
+            self.assertTrue(db.prepared_currencies_exist_and_complete())
+            self.assertEqual(db.c.execute('PRAGMA user_version').fetchone()[0], len(MIGRATIONS))
+            self.assertEqual(db.get_count_of_prepared_currencies(), 2)
+            self.assertEqual(db.get_rate_from_db(('EUR', 'USD')), 1.1)
+
+            plan = db.c.execute('EXPLAIN QUERY PLAN SELECT rate FROM prepared_currencies '
+                                'WHERE from_currency = \'USD\' AND to_currency = \'EUR\'').fetchall()
+            self.assertEqual(len(plan), 1)
+            self.assertIn('USING PRIMARY KEY (from_currency=? AND to_currency=?)', plan[0][-1])
+
+            db.create_tables()
+            self.assertEqual(db.get_count_of_prepared_currencies(), 2)
+        finally:
+            db.close()
+
+    def test_incomplete_direct_quotes(self):
+        db = DBHandler(self.path_to_db)
+        try:
+            db.create_tables()
+            db.insert_pairs_in_prepared_currencies([('USD', 'EUR', 0.9), ('EUR', 'USD', 1.1), ('USD', 'CZK', 23)])
+            self.assertFalse(db.prepared_currencies_exist_and_complete())
+            db.insert_pairs_in_prepared_currencies([('CZK', 'USD', 0.04), ('EUR', 'CZK', 25), ('CZK', 'EUR', 0.04)])
+            self.assertTrue(db.prepared_currencies_exist_and_complete())
+        finally:
+            db.close()
+
+
+class TestBulkRates(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = DBHandler(os.path.join(self.tmp_dir.name, 'rates.db'))
+        self.db.create_tables()
+        self.db.replace_base_rates({'USD': 1, 'EUR': 0.8, 'CZK': 20})
+        self.db.insert_pairs_in_prepared_currencies([('USD', 'EUR', 0.9)])
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.tmp_dir.cleanup()
+
+    def test_rates_of_pairs_in_input_order(self):
+        pairs = [('EUR', 'CZK'), ('USD', 'EUR'), ('XXX', 'USD'), ('EUR', 'CZK')]
+        self.assertEqual(self.db.get_rates_from_db(pairs), [25, 0.9, None, 25])
+        self.assertEqual(self.db.get_rates_from_db([]), [])
+
+        many = [('USD', 'EUR'), ('EUR', 'USD')] * 6000
+        self.assertEqual(
+            self.db.get_rates_from_db(many),
+            [self.db.get_rate_from_db(pair) for pair in many[:2]] * 6000
+        )
+
+    def test_pairs_per_statement_within_limit_of_variables(self):
+        self.assertEqual(self.db.get_pairs_per_statement(), PAIRS_PER_STATEMENT)
+
+        self.db.connect.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+        self.assertEqual(self.db.get_pairs_per_statement(), 333)
+        many = [('USD', 'EUR'), ('EUR', 'CZK')] * 1000
+        self.assertEqual(self.db.get_rates_from_db(many), [0.9, 25] * 1000)
+
+    def test_rates_of_base(self):
+        rates = self.db.get_rates_of_base_from_db('USD')
+        self.assertEqual(rates, {'USD': 1, 'EUR': 0.9, 'CZK': 20})
+        self.assertEqual(rates, {code: self.db.get_rate_from_db(('USD', code)) for code in rates})
+        self.assertEqual(self.db.get_rates_of_base_from_db('XXX'), {})
@@ -0,0 +1,116 @@
+import math
+import os
+import random
+import tempfile
+import unittest
+
+from converter.core.currency_pair import CurrencyPair
+from converter.core.double_conversion import CurrencyConverterDoubleConversion
+from converter.core.rate_snapshot import RateSnapshot
+from converter.core.trie import get_europe_currencies
+from tests.fakes import SnapshotAPI
+from tests.stub_api_server import get_backup_snapshot
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+
+def pay_by_routes_of_baseline(snapshot, from_currency: str, amount: float, to_currency: str, card_type: str) -> float:
+    '''
+    Routes of double_conversion as they were written before the PaymentTable, kept as an independent reference:
+    every hop exchanges 1 unit at a rate rounded as CurrencyPair rounds a result
+    '''
+
+    fee = 1.03 if card_type == 'VISA' else 1.02
+
+    def exchange(from_code: str, to_code: str) -> float:
+        return round(snapshot.get_rate(from_code, to_code), 5)
+
+    def divide_and_add_fee(divisor: float, dividend: float) -> float:
+        return (divisor / dividend) * fee
+
+    european = to_currency in get_europe_currencies()
+    if card_type == 'MC' and not european:
+        dc_from_eur = amount if from_currency == 'EUR' else divide_and_add_fee(amount, exchange('EUR', to_currency))
+        return divide_and_add_fee(dc_from_eur, exchange(from_currency, 'EUR'))
+
+    if card_type == 'MC':
+        return divide_and_add_fee(amount, exchange(from_currency, to_currency))
+
+    if european:
+        dc_from_eur = amount if to_currency == 'EUR' else divide_and_add_fee(amount, exchange('EUR', to_currency))
+        dc_from_usd = divide_and_add_fee(dc_from_eur, exchange('USD', 'EUR'))
+    else:
+        dc_from_usd = amount if to_currency == 'USD' else divide_and_add_fee(amount, exchange('USD', to_currency))
+    return dc_from_usd if from_currency == 'USD' else divide_and_add_fee(dc_from_usd, exchange(from_currency, 'USD'))
+
+
+class TestDoubleConversionMany(unittest.TestCase):
+    def setUp(self) -> None:
+        self.snapshot = get_backup_snapshot()
+        self.converter = CurrencyConverterDoubleConversion()
+        self.converter.api = SnapshotAPI(self.snapshot)
+
+        generator = random.Random(0)
+        codes = list(self.snapshot.codes)
+        self.payments = [
+            (from_currency, generator.choice([1, 15, 100, 2500.5]), to_currency, card_type)
+            for from_currency, to_currency, card_type in
+            [('EUR', 'USD', 'MC'), ('USD', 'EUR', 'VISA'), ('USD', 'USD', 'VISA'), ('EUR', 'EUR', 'MC')] +
+            [(generator.choice(codes), generator.choice(codes), generator.choice(['MC', 'VISA']))
+             for _ in range(2000)]
+        ]
+
+    def get_scalar_results(self) -> list[float]:
+        results = []
+        for from_currency, amount, to_currency, card_type in self.payments:
+            self.converter.currency_pair = CurrencyPair(from_currency, to_currency, amount, card_type)
+            self.converter.double_conversion()
+            results.append(self.converter.currency_pair.result)
+        return results
+
+    def test_results_equal_routes_of_baseline(self):
+        for (from_currency, amount, to_currency, card_type), result in zip(self.payments, self.get_scalar_results()):
+            expected = pay_by_routes_of_baseline(self.snapshot, from_currency, amount, to_currency, card_type)
+            self.assertTrue(
+                math.isclose(result, expected, rel_tol=1e-12),
+                f'{amount} {from_currency} -> {to_currency} by {card_type}: {result} != {expected}'
+            )
+
+    def test_batch_equals_scalar_path(self):
+        results = self.converter.double_conversion_many(*zip(*self.payments), snapshot=self.snapshot)
+        self.assertEqual(results.tolist(), self.get_scalar_results())
+
+    @unittest.skipIf(pd is None, 'pandas is not installed')
+    def test_batch_from_data_frame(self):
+        data_frame = pd.DataFrame(self.payments, columns=['from_currency', 'amount', 'to_currency', 'card_type'])
+        results = self.converter.double_conversion_many(data_frame, snapshot=self.snapshot)
+        self.assertEqual(results.tolist(), self.get_scalar_results())
+
+
+class TestDoubleConversionFromDatabase(unittest.TestCase):
+    def test_database_with_direct_quotes_only(self):
+        '''
+        Test that a database of an older version, without base rates, is quoted from its direct quotes against USD
+        '''
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            converter = CurrencyConverterDoubleConversion()
+            converter.path_to_db = os.path.join(tmp_dir, 'rates.db')
+            converter.switch_rate_source()
+            converter.db.create_tables()
+            snapshot = RateSnapshot({'USD': 1, 'EUR': 0.914, 'CZK': 22.04})
+            converter.db.insert_pairs_in_prepared_currencies(
+                (from_currency, to_currency, round(snapshot.get_rate(from_currency, to_currency), 3))
+                for from_currency in snapshot.codes
+                for to_currency in snapshot.codes
+                if from_currency != to_currency
+            )
+            self.assertTrue(converter.db.prepared_currencies_exist_and_complete())
+
+            converter.currency_pair = CurrencyPair('CZK', 'EUR', 100, 'VISA')
+            expected = CurrencyPair('CZK', 'EUR', 100, 'VISA')
+            self.assertEqual(converter.double_conversion(), converter.quote_payment(expected, snapshot).result)
+            converter.db.close()
@@ -0,0 +1,52 @@
+import time
+import unittest
+
+from converter.core.exceptions import ServerError
+from converter.handlers.API import APIHandler
+from converter.handlers.fetcher import RateFetcher, RateLimiter
+from tests.stub_api_server import StubAPIServer
+
+
+class TestRateFetcher(unittest.TestCase):
+    def get_fetcher(self, server: StubAPIServer, **options) -> RateFetcher:
+        api = APIHandler()
+        api.api_url = server.url
+        api.response_cache = None
+        return RateFetcher(api, backoff=0.01, **options)
+
+    def test_fetch_all_currencies(self):
+        with StubAPIServer() as server:
+            currencies = server.snapshot.codes
+            fetched = dict(self.get_fetcher(server).fetch(currencies))
+
+        self.assertEqual(set(fetched), set(currencies))
+        self.assertEqual(fetched['CZK']['CZK'], 1)
+        self.assertAlmostEqual(fetched['EUR']['CZK'], server.snapshot.get_rate('EUR', 'CZK'))
+
+    def test_retry_after_failures(self):
+        with StubAPIServer(failures=2) as server:
+            fetched = dict(self.get_fetcher(server, max_workers=1, retries=2).fetch(['USD']))
+            self.assertEqual(server.requests, 3)
+        self.assertIn('USD', fetched)
+
+    def test_server_error_after_retries(self):
+        with StubAPIServer(failures=10) as server:
+            fetcher = self.get_fetcher(server, max_workers=1, retries=1)
+            with self.assertRaises(ServerError):
+                dict(fetcher.fetch(['USD']))
+            self.assertEqual(server.requests, 2)
+
+    def test_timeout(self):
+        with StubAPIServer(latency=0.5) as server:
+            fetcher = self.get_fetcher(server, max_workers=1, retries=0, timeout=0.05)
+            with self.assertRaises(ServerError):
+                fetcher.fetch_one('USD')
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_requests_are_spaced(self):
+        rate_limiter = RateLimiter(requests_per_second=50)
+        start = time.monotonic()
+        for _ in range(6):
+            rate_limiter.wait()
+        self.assertGreaterEqual(time.monotonic() - start, 5 / 50)
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import time
+import unittest
+
+from converter.handlers.API import APIHandler
+from converter.handlers.http_cache import DiskResponseCache
+from tests.stub_api_server import StubAPIServer
+
+
+class TestDiskResponseCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.now = 0
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def get_api(self, server: StubAPIServer, clock=time.time) -> APIHandler:
+        api = APIHandler()
+        api.api_url = server.url
+        api.response_cache = DiskResponseCache(self.tmp_dir.name, clock=clock)
+        return api
+
+    def test_fresh_response_reused_by_new_handler(self):
+        '''
+        Test that another handler (as in a new invocation) doesn't ask the server while the response is fresh
+        '''
+
+        with StubAPIServer() as server:
+            first_api = self.get_api(server)
+            rates = first_api.get_rates_from_API('CZK')
+            first_api.get_rates_from_API('USD')
+
+            api = self.get_api(server)
+            api.check_server_state()
+            self.assertEqual(api.get_rates_from_API('CZK'), rates)
+            self.assertEqual(server.requests, 2)
+
+    def test_stale_response_revalidated(self):
+        with StubAPIServer(next_update_in=60) as server:
+            self.get_api(server).get_rates_from_API('EUR')
+
+            api = self.get_api(server, clock=lambda: self.now)
+            self.now = 2 ** 40
+            rates = api.get_rates_from_API('EUR')
+            entry = api.response_cache.get('EUR', server.url + 'EUR')
+            self.assertEqual(server.requests, 2)
+
+        self.assertEqual(rates['EUR'], 1)
+        self.assertEqual(entry['next_update'], self.now + api.response_cache.revalidate_after)
+
+    def test_response_of_another_server_ignored(self):
+        with StubAPIServer() as server, StubAPIServer() as another_server:
+            self.get_api(server).get_rates_from_API('USD')
+            self.get_api(another_server).get_rates_from_API('USD')
+            self.assertEqual(another_server.requests, 1)
+
+    def test_streamed_response_is_stored(self):
+        with StubAPIServer() as server:
+            api = self.get_api(server)
+            rates = list(api.iter_rates_from_API('EUR'))
+            entry = api.response_cache.get('EUR', server.url + 'EUR')
+
+            another_api = self.get_api(server)
+            self.assertEqual(list(another_api.iter_rates_from_API('EUR')), rates)
+            self.assertEqual(another_api.get_payload_from_API('EUR'), entry['payload'])
+            self.assertEqual(server.requests, 1)
+
+        self.assertEqual(entry['payload']['base'], 'EUR')
+        self.assertEqual(entry['payload']['rates'], dict(rates))
+        self.assertEqual(entry['next_update'], entry['payload']['time_next_update'])
+        self.assertTrue(entry['etag'])
+
+    def test_unfinished_stream_is_not_stored(self):
+        with StubAPIServer() as server:
+            rates = self.get_api(server).iter_rates_from_API('EUR')
+            next(rates)
+            rates.close()
+
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
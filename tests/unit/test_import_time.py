@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def import_times(module: str) -> dict[str, int]:
+    '''
+    Imports the module in a fresh interpreter with "python -X importtime".
+    Returns {imported module: cumulative import time in microseconds}.
+    '''
+
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+class TestImportTime(unittest.TestCase):
+    MAX_IMPORT_TIME_US = 1_000_000
+
+    def test_currency_pair_cold_start(self):
+        '''
+        Test that importing CurrencyPair doesn't pull pandas and stays within the cold start budget
+        '''
+
+        times = import_times('converter.core.currency_pair')
+        self.assertNotIn('pandas', times)
+        self.assertLess(times['converter.core.currency_pair'], self.MAX_IMPORT_TIME_US)
+
+    def test_currency_data_is_loaded_lazily(self):
+        '''
+        Test that the bundled currency tables are not read at import time
+        '''
+
+        completed = subprocess.run(
+            [
+                sys.executable, '-c',
+                'from converter.core import trie; '
+                'print(trie.get_currencies_short.cache_info().currsize, '
+                'trie.get_europe_currencies.cache_info().currsize)'
+            ],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        self.assertEqual(completed.stdout.split(), ['0', '0'])
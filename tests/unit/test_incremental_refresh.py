@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from converter.core.rate_snapshot import RateSnapshot
+from converter.db.db import DBHandler
+from converter.handlers.http_cache import DiskResponseCache
+from converter.handlers.main_handler import MainHandler
+from tests.stub_api_server import StubAPIServer
+
+
+class TestIncrementalRefresh(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+        os.mkdir('data')
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+
+    def refresh(self, server: StubAPIServer, **options):
+        handler = MainHandler(direct_quotes=True, incremental=True, max_workers=16, **options)
+        handler.api.api_url = server.url
+        # the stub publishes new rates right after a refresh, a response revalidated by it must not hide them
+        handler.api.response_cache = DiskResponseCache(revalidate_after=0)
+        try:
+            with redirect_stdout(StringIO()):
+                return handler.update_rates()
+        finally:
+            handler.db.close()
+
+    def test_fresh_bases_are_skipped(self):
+        with StubAPIServer() as server:
+            first = self.refresh(server)
+            second = self.refresh(server)
+
+        count = len(server.snapshot.codes)
+        self.assertEqual((first.fetched_bases, first.skipped_bases), (count, 0))
+        self.assertEqual(first.touched_rows, count * (count - 1))
+        self.assertEqual((second.fetched_bases, second.skipped_bases, second.touched_rows), (0, count, 0))
+
+    def test_only_changed_rates_are_written(self):
+        with StubAPIServer(next_update_in=-1) as server:
+            self.refresh(server)
+
+            # the provider publishes new rates, only the rates against EUR change
+            rates = dict(zip(server.snapshot.codes, server.snapshot.rates))
+            server.snapshot = RateSnapshot({**rates, 'EUR': rates['EUR'] * 1.01}, timestamp=server.snapshot.timestamp + 3600)
+            report = self.refresh(server, use_asyncio=True)
+
+        count = len(server.snapshot.codes)
+        self.assertEqual(report.fetched_bases, count)
+        self.assertEqual(report.touched_rows, 2 * (count - 1))
+
+    def test_unchanged_provider_update_is_not_written(self):
+        with StubAPIServer(next_update_in=-1) as server:
+            self.refresh(server)
+            report = self.refresh(server)
+
+        self.assertEqual(report.fetched_bases, len(server.snapshot.codes))
+        self.assertEqual(report.touched_rows, 0)
+
+    def test_rates_against_usd_are_downloaded_once(self):
+        with StubAPIServer(next_update_in=-1) as server:
+            report = self.refresh(server)
+
+        self.assertEqual(report.fetched_bases, len(server.snapshot.codes))
+        self.assertEqual(server.requests, len(server.snapshot.codes))
+
+    def test_currency_no_longer_listed_is_deleted(self):
+        with StubAPIServer(next_update_in=-1) as server:
+            self.refresh(server)
+
+            # the provider stops quoting CZK
+            rates = dict(zip(server.snapshot.codes, server.snapshot.rates))
+            del rates['CZK']
+            server.snapshot = RateSnapshot(rates, timestamp=server.snapshot.timestamp + 3600)
+            report = self.refresh(server)
+
+        count = len(server.snapshot.codes)
+        self.assertEqual(report.touched_rows, 2 * count)
+        db = DBHandler()
+        try:
+            self.assertNotIn('CZK', db.get_fetched_bases())
+            self.assertEqual(db.get_rates_from_db([('CZK', 'EUR'), ('EUR', 'CZK')]), [None, None])
+            self.assertEqual(db.get_count_of_prepared_currencies(), count * (count - 1))
+            complete, = db.c.execute(
+                "SELECT complete FROM table_metadata WHERE table_name = 'prepared_currencies'"
+            ).fetchone()
+            self.assertTrue(complete)
+        finally:
+            db.close()
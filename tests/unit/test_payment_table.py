@@ -0,0 +1,71 @@
+import unittest
+
+from converter.core.currency_pair import CurrencyPair
+from converter.core.double_conversion import CurrencyConverterDoubleConversion
+from converter.core.payment_table import CARD_TYPES
+from converter.core.rate_snapshot import RateSnapshot
+from tests.fakes import SnapshotAPI
+
+
+BASE_RATES = {'USD': 1, 'CZK': 22.04, 'EUR': 0.914, 'JPY': 149.5}
+
+
+class TestPaymentTable(unittest.TestCase):
+    def setUp(self) -> None:
+        self.snapshot = RateSnapshot(BASE_RATES)
+        self.table = self.snapshot.payment_table()
+
+    def hop(self, from_currency: str, to_currency: str) -> float:
+        return round(self.snapshot.get_rate(from_currency, to_currency), 5)
+
+    def test_mc_non_european_target_through_eur(self):
+        dc_from_eur = (1 / self.hop('EUR', 'JPY')) * 1.02
+        self.assertEqual(
+            self.table.get_multiplier('USD', 'JPY', 'MC'),
+            (dc_from_eur / self.hop('USD', 'EUR')) * 1.02
+        )
+
+    def test_mc_european_target_directly(self):
+        self.assertEqual(self.table.get_multiplier('EUR', 'CZK', 'MC'), (1 / self.hop('EUR', 'CZK')) * 1.02)
+
+    def test_visa_european_target_through_eur_and_usd(self):
+        dc_from_eur = (1 / self.hop('EUR', 'CZK')) * 1.03
+        dc_from_usd = (dc_from_eur / self.hop('USD', 'EUR')) * 1.03
+        self.assertEqual(
+            self.table.get_multiplier('JPY', 'CZK', 'VISA'),
+            (dc_from_usd / self.hop('JPY', 'USD')) * 1.03
+        )
+
+    def test_visa_non_european_target_through_usd(self):
+        self.assertEqual(self.table.get_multiplier('USD', 'JPY', 'VISA'), (1 / self.hop('USD', 'JPY')) * 1.03)
+
+    def test_quote_and_matrices(self):
+        multiplier = self.table.get_multiplier('CZK', 'JPY', 'VISA')
+        self.assertEqual(self.table.quote('CZK', 'JPY', 250, 'VISA'), 250 * multiplier)
+
+        matrices = self.table.matrices()
+        self.assertEqual(matrices.shape, (len(CARD_TYPES), 4, 4))
+        self.assertEqual(
+            matrices[CARD_TYPES.index('VISA'), self.snapshot.indices['CZK'], self.snapshot.indices['JPY']],
+            multiplier
+        )
+
+    def test_unknown_card_type(self):
+        for card_type in [None, 'AMEX', 'mc']:
+            with self.assertRaisesRegex(ValueError, 'Unknown card type'):
+                self.table.quote('USD', 'EUR', 100, card_type)
+
+    def test_table_is_built_once_per_snapshot(self):
+        self.assertIs(self.snapshot.payment_table(), self.table)
+
+    def test_converter_keeps_table_until_rates_change(self):
+        converter = CurrencyConverterDoubleConversion()
+        converter.api = SnapshotAPI(self.snapshot)
+        converter.currency_pair = CurrencyPair('USD', 'JPY', 100, 'VISA')
+        self.assertEqual(converter.double_conversion(), 100 * self.table.get_multiplier('USD', 'JPY', 'VISA'))
+
+        table = converter.get_payment_table()
+        self.assertIs(converter.get_payment_table(), table)
+
+        converter.api = SnapshotAPI(RateSnapshot({**BASE_RATES, 'JPY': 150.1}))
+        self.assertIsNot(converter.get_payment_table(), table)
@@ -0,0 +1,58 @@
+import threading
+import time
+import unittest
+
+from converter.core.exceptions import ServerError
+from converter.handlers.pipeline import RatePipeline
+
+
+class TestRatePipeline(unittest.TestCase):
+    def produce(self, pipeline: RatePipeline, items: list, error: Exception = None, delay: float = 0):
+        def producer():
+            for item in items:
+                time.sleep(delay)
+                pipeline.put(item)
+            pipeline.close(error)
+
+        thread = threading.Thread(target=producer)
+        thread.start()
+        return thread
+
+    def test_items_grouped_in_batches(self):
+        pipeline = RatePipeline(maxsize=2, batch_size=3)
+        thread = self.produce(pipeline, list(range(7)))
+
+        batches = list(pipeline.batches())
+        thread.join()
+
+        self.assertEqual(batches, [[0, 1, 2], [3, 4, 5], [6]])
+        self.assertEqual(pipeline.metrics.items, 7)
+        self.assertEqual(pipeline.metrics.batches, 3)
+        self.assertLessEqual(pipeline.metrics.max_queue_depth, 2)
+
+    def test_producer_error_raised_in_consumer(self):
+        pipeline = RatePipeline(batch_size=2)
+        thread = self.produce(pipeline, [1, 2, 3], error=ServerError())
+
+        with self.assertRaises(ServerError):
+            for _ in pipeline.batches():
+                pass
+        thread.join()
+
+    def test_consumer_waits_without_spinning(self):
+        '''
+        Test that the time the consumer waits for a slow producer is counted as idle time
+        '''
+
+        pipeline = RatePipeline()
+        thread = self.produce(pipeline, [1, 2], delay=0.05)
+
+        self.assertEqual(list(pipeline.batches()), [[1], [2]])
+        thread.join()
+        self.assertGreaterEqual(pipeline.metrics.consumer_idle_time, 0.09)
+
+    def test_cancel_stops_producer(self):
+        pipeline = RatePipeline(maxsize=1)
+        self.assertTrue(pipeline.put(1))
+        pipeline.cancel()
+        self.assertFalse(pipeline.put(2))
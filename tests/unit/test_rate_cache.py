@@ -0,0 +1,70 @@
+import threading
+import time
+import unittest
+
+from converter.core.exceptions import ServerError
+from converter.handlers.rate_cache import RateCache
+
+
+class TestRateCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.now = 0
+        self.loads = []
+        self.cache = RateCache(ttl=60, maxsize=2, clock=lambda: self.now)
+
+    def loader(self, currency_code: str):
+        def load():
+            self.loads.append(currency_code)
+            return {currency_code: 1, 'EUR': 0.9}
+        return load
+
+    def test_hit_within_ttl(self):
+        rates = self.cache.get('USD', self.loader('USD'))
+        self.assertIs(self.cache.get('USD', self.loader('USD')), rates)
+        self.assertEqual(self.loads, ['USD'])
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_miss_after_ttl(self):
+        self.cache.get('USD', self.loader('USD'))
+        self.now = 61
+        self.cache.get('USD', self.loader('USD'))
+        self.assertEqual(self.loads, ['USD', 'USD'])
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_least_recently_used_evicted(self):
+        self.cache.get('USD', self.loader('USD'))
+        self.cache.get('CZK', self.loader('CZK'))
+        self.cache.get('USD', self.loader('USD'))
+        self.cache.get('UAH', self.loader('UAH'))
+
+        self.cache.get('USD', self.loader('USD'))
+        self.cache.get('CZK', self.loader('CZK'))
+        self.assertEqual(self.loads, ['USD', 'CZK', 'UAH', 'CZK'])
+
+    def test_errors_not_cached(self):
+        def failing_load():
+            raise ServerError
+
+        with self.assertRaises(ServerError):
+            self.cache.get('USD', failing_load)
+        self.cache.get('USD', self.loader('USD'))
+        self.assertEqual(self.loads, ['USD'])
+
+    def test_concurrent_misses_load_once(self):
+        def slow_load():
+            time.sleep(0.05)
+            return self.loader('USD')()
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.cache.get('USD', slow_load)))
+            for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.loads, ['USD'])
+        self.assertEqual(len(results), 10)
+        self.assertEqual((self.cache.hits, self.cache.misses), (9, 1))
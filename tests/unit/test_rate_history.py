@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from converter.core.currency_converter import CurrencyConverter
+from converter.core.currency_pair import CurrencyPair
+from converter.core.exceptions import NoHistoricalRatesException
+from converter.core.rate_history import RateHistory
+from converter.core.rate_snapshot import RateSnapshot
+from converter.db.db import DBHandler
+
+
+class TestRateHistory(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path_to_db = os.path.join(self.tmp_dir.name, 'rates.db')
+        self.db = DBHandler(self.path_to_db)
+        self.db.create_tables()
+        self.history = RateHistory(self.path_to_db)
+        for day, eur in enumerate([0.9, 0.8, 0.7], start=1):
+            self.history.append(RateSnapshot({'USD': 1, 'EUR': eur, 'CZK': 23}, timestamp=day * 86400))
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.tmp_dir.cleanup()
+
+    def test_snapshot_is_stored_as_one_block(self):
+        snapshot = self.history.snapshot_as_of(86400)
+        self.assertEqual(snapshot.codes, ('USD', 'EUR', 'CZK'))
+        self.assertEqual(snapshot.rates, (1, 0.9, 23))
+        self.assertEqual(snapshot.timestamp, 86400)
+        self.assertFalse(self.history.append(RateSnapshot({'USD': 1}, timestamp=86400)))
+
+    def test_last_snapshot_before_the_moment(self):
+        self.assertEqual(self.history.snapshot_as_of(86400 * 2.5).get_rate('USD', 'EUR'), 0.8)
+        self.assertEqual(self.history.snapshot_as_of(86400 * 10).get_rate('USD', 'EUR'), 0.7)
+        with self.assertRaises(NoHistoricalRatesException):
+            self.history.snapshot_as_of(86400 - 1)
+
+    def test_newer_snapshots_are_loaded(self):
+        self.history.snapshot_as_of(86400 * 3)
+        self.history.append(RateSnapshot({'USD': 1, 'EUR': 0.6, 'CZK': 23}, timestamp=86400 * 4))
+        self.assertEqual(self.history.snapshot_as_of(86400 * 4).get_rate('USD', 'EUR'), 0.6)
+
+    def test_exchange_as_of(self):
+        converter = CurrencyConverter()
+        converter.path_to_db = self.path_to_db
+        pair = CurrencyPair('USD', 'EUR', 10)
+        converter.exchange(pair, as_of=datetime.fromtimestamp(86400 * 2))
+        self.assertEqual(pair.result, 8)
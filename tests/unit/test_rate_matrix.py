@@ -0,0 +1,112 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from converter.core import currency_converter
+from converter.core.currency_converter import CurrencyConverter
+from converter.core.double_conversion import CurrencyConverterDoubleConversion
+from converter.core.currency_pair import CurrencyPair
+from converter.core.exceptions import DatabaseNotExistError
+from converter.db.db import DBHandler
+from converter.db.rate_matrix import RateMatrix, export_rate_matrix, get_path_to_rate_matrix, write_rate_matrix
+from tests.stub_api_server import get_backup_snapshot
+
+
+class TestRateMatrix(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path_to_db = os.path.join(self.tmp_dir.name, 'rates.db')
+        self.snapshot = get_backup_snapshot()
+        self.db = DBHandler(self.path_to_db)
+        self.db.create_tables()
+        self.db.replace_base_rates(dict(zip(self.snapshot.codes, self.snapshot.rates)))
+        self.db.insert_pairs_in_prepared_currencies([('USD', 'EUR', 0.5)])
+        self.path = export_rate_matrix(self.db, timestamp=123)
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.tmp_dir.cleanup()
+
+    def test_same_rates_as_database(self):
+        matrix = RateMatrix(self.path)
+        self.assertEqual(self.path, get_path_to_rate_matrix(self.path_to_db))
+        self.assertEqual(matrix.codes, self.snapshot.codes)
+        self.assertEqual(matrix.timestamp, 123)
+        self.assertFalse(matrix.matrix.flags.writeable)
+
+        pairs = [(from_currency, to_currency) for from_currency in matrix.codes for to_currency in matrix.codes]
+        self.assertEqual([matrix.get_rate(*pair) for pair in pairs], self.db.get_rates_from_db(pairs))
+        self.assertEqual(matrix.get_rates('USD'), self.db.get_rates_of_base_from_db('USD'))
+        self.assertIsNone(matrix.get_rate('XXX', 'USD'))
+        matrix.close()
+
+    def test_not_a_matrix(self):
+        with open(self.path, 'wb') as file:
+            file.write(b'PLRM')
+        with self.assertRaises(DatabaseNotExistError):
+            RateMatrix(self.path)
+        with self.assertRaises(DatabaseNotExistError):
+            RateMatrix(self.path + '.missing')
+
+    def test_codes_that_do_not_fit(self):
+        for code in ['TOOLONGCODE', 'ČZK']:
+            with self.assertRaises(ValueError):
+                write_rate_matrix(self.path, ('USD', code), np.ones((2, 2)))
+        matrix = RateMatrix(self.path)
+        self.assertEqual(matrix.codes, self.snapshot.codes)
+        matrix.close()
+
+    def test_converter_backend(self):
+        converter = CurrencyConverter()
+        converter.path_to_db = self.path_to_db
+        converter.switch_rate_source()
+        pairs = [CurrencyPair('USD', 'EUR', 10), CurrencyPair('EUR', 'CZK', 3)]
+        from_sqlite = [converter.quote(pair) for pair in pairs]
+
+        converter.db_backend = 'mmap'
+        self.assertEqual([converter.quote(pair) for pair in pairs], from_sqlite)
+        self.assertEqual(converter.quote_many(pairs), from_sqlite)
+
+    def test_snapshot_and_batches_of_both_backends(self):
+        self.db.delete_all_from_prepared_currencies()
+        export_rate_matrix(self.db)
+        converter = CurrencyConverterDoubleConversion()
+        converter.path_to_db = self.path_to_db
+        converter.switch_rate_source()
+        codes = ['USD', 'EUR', 'CZK', 'JPY']
+        payments = [CurrencyPair(from_currency, to_currency, 100, 'VISA') for from_currency in codes for to_currency in codes]
+
+        def results():
+            snapshot = converter.get_rate_snapshot()
+            return (
+                (snapshot.codes, snapshot.rates),
+                converter.convert_many([100] * len(codes), codes, codes[::-1]).tolist(),
+                converter.double_conversion_many(codes, [100] * len(codes), codes[::-1], ['MC'] * len(codes)).tolist(),
+                [converter.quote_payment(pair).result for pair in payments]
+            )
+
+        from_sqlite = results()
+        converter.db_backend = 'mmap'
+        self.assertEqual(results(), from_sqlite)
+        self.assertIs(converter.get_rate_snapshot(), converter.get_rate_matrix().get_rate_snapshot())
+
+    def test_replaced_file_is_reopened(self):
+        converter = CurrencyConverter()
+        converter.path_to_db = self.path_to_db
+        converter.db_backend = 'mmap'
+        converter.switch_rate_source()
+        self.assertEqual(converter.quote(CurrencyPair('USD', 'EUR', 10)).result, 5)
+
+        self.db.insert_pairs_in_prepared_currencies([('EUR', 'USD', 3)])
+        self.db.c.execute('UPDATE prepared_currencies SET rate = 0.25')
+        self.db.connect.commit()
+        export_rate_matrix(self.db)
+
+        check_interval = currency_converter.MATRIX_CHECK_INTERVAL
+        currency_converter.MATRIX_CHECK_INTERVAL = 0
+        try:
+            self.assertEqual(converter.quote(CurrencyPair('USD', 'EUR', 10)).result, 2.5)
+        finally:
+            currency_converter.MATRIX_CHECK_INTERVAL = check_interval
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+
+from converter.core.rate_snapshot import RateSnapshot
+from converter.db.db import DBHandler
+
+
+BASE_RATES = {'USD': 1, 'CZK': 22.04, 'EUR': 0.914, 'UAH': 36.93}
+
+
+class TestRateSnapshot(unittest.TestCase):
+    def setUp(self) -> None:
+        self.snapshot = RateSnapshot(BASE_RATES)
+
+    def test_cross_rate(self):
+        self.assertEqual(self.snapshot.get_rate('USD', 'CZK'), 22.04)
+        self.assertAlmostEqual(self.snapshot.get_rate('EUR', 'CZK'), 22.04 / 0.914)
+        self.assertEqual(self.snapshot.get_rate('UAH', 'UAH'), 1)
+
+    def test_rates_of_another_currency(self):
+        rates = self.snapshot.get_rates('EUR')
+        self.assertEqual(list(rates)[0], 'EUR')
+        self.assertEqual(len(rates), len(BASE_RATES))
+        self.assertAlmostEqual(rates['USD'], 1 / 0.914)
+
+    def test_all_pairs(self):
+        pairs = list(self.snapshot.iter_pairs())
+        self.assertEqual(len(pairs), 4 * 3)
+        self.assertNotIn(('USD', 'USD', 1.0), pairs)
+
+    def test_matrix(self):
+        matrix = self.snapshot.matrix()
+        self.assertEqual(matrix.shape, (4, 4))
+        for from_currency, to_currency, rate in self.snapshot.iter_pairs():
+            self.assertAlmostEqual(
+                matrix[self.snapshot.indices[from_currency], self.snapshot.indices[to_currency]],
+                rate
+            )
+
+
+class TestBaseRatesInDB(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = DBHandler(os.path.join(self.tmp_dir.name, 'rates.db'))
+        self.db.create_tables()
+        self.db.replace_base_rates(BASE_RATES)
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.tmp_dir.cleanup()
+
+    def test_rate_derived_from_base_rates(self):
+        self.assertAlmostEqual(self.db.get_rate_from_db(('EUR', 'CZK')), 22.04 / 0.914)
+        self.assertEqual(self.db.get_rate_snapshot().get_rate('USD', 'UAH'), 36.93)
+
+    def test_direct_quote_is_preferred(self):
+        self.db.insert_pair_in_prepared_currencies(('EUR', 'CZK', 24.05))
+        self.assertEqual(self.db.get_rate_from_db(('EUR', 'CZK')), 24.05)
@@ -0,0 +1,33 @@
+import json
+import unittest
+
+from converter.handlers.rates_stream import RatesParser, iter_rates
+from tests.stub_api_server import get_backup_snapshot
+
+
+class TestRatesStream(unittest.TestCase):
+    def setUp(self) -> None:
+        self.payload = {'base': 'EUR', 'rates': get_backup_snapshot().get_rates('EUR'), 'time_next_update': 0}
+        self.body = json.dumps(self.payload, indent=1).encode()
+
+    def test_rates_split_between_chunks(self):
+        for size in [1, 7, 64, len(self.body)]:
+            chunks = [self.body[i:i + size] for i in range(0, len(self.body), size)]
+            self.assertEqual(list(iter_rates(chunks)), list(self.payload['rates'].items()))
+
+    def test_rest_of_payload_is_not_read(self):
+        chunks = iter([b'{"rates": {"EUR": 1, "USD": 1.09}', b', "time_next_update": '])
+        self.assertEqual(list(iter_rates(chunks)), [('EUR', 1.0), ('USD', 1.09)])
+        self.assertEqual(list(chunks), [b', "time_next_update": '])
+
+    def test_invalid_payloads(self):
+        for body in [b'{"result": "error"}', b'{"rates": {"EUR": 1, "USD"', b'{"rates": {"EUR": null}}']:
+            with self.assertRaises(ValueError):
+                list(iter_rates([body]))
+
+    def test_memory_of_parser_is_bounded(self):
+        parser = RatesParser()
+        parser.feed(b'{"rates": {')
+        for _ in range(1000):
+            parser.feed(b'"EUR": 1.5, ')
+            self.assertLess(len(parser.buffer), 16)
@@ -0,0 +1,74 @@
+import http.client
+import json
+import threading
+import time
+import unittest
+
+from converter.app.server import ConversionService, make_server
+from converter.core.double_conversion import CurrencyConverterDoubleConversion
+from converter.core.rate_snapshot import RateSnapshot
+from tests.fakes import SnapshotAPI
+from tests.stub_api_server import get_backup_snapshot
+
+
+class TestConversionService(unittest.TestCase):
+    def setUp(self) -> None:
+        self.snapshot = get_backup_snapshot()
+        self.converter = CurrencyConverterDoubleConversion()
+        self.converter.api = SnapshotAPI(self.snapshot)
+        self.service = ConversionService(self.converter, refresh_interval=0.05)
+        self.service.start_refreshing()
+        self.server = make_server(self.service, port=0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.connection = http.client.HTTPConnection('127.0.0.1', self.server.server_address[1])
+
+    def tearDown(self) -> None:
+        self.connection.close()
+        self.service.stop_refreshing()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def request(self, method: str, path: str, payload=None) -> tuple[int, dict]:
+        body = json.dumps(payload).encode() if payload is not None else None
+        self.connection.request(method, path, body)
+        response = self.connection.getresponse()
+        return response.status, json.loads(response.read())
+
+    def test_convert(self):
+        status, payload = self.request('GET', '/convert?amount=100&from=USD&to=EUR')
+        self.assertEqual(status, 200)
+        self.assertEqual(payload['result'], round(self.snapshot.get_rate('USD', 'EUR') * 100, 5))
+
+    def test_pay(self):
+        status, payload = self.request('GET', '/pay?amount=50&from=usa&to=CZK&card_type=visa')
+        self.assertEqual(status, 200)
+        self.assertEqual(payload['from'], 'USD')
+        self.assertEqual(payload['result'], self.snapshot.payment_table().quote('USD', 'CZK', 50, 'VISA'))
+
+        status, payload = self.request('GET', '/pay?amount=50&from=USD&to=CZK')
+        self.assertEqual(status, 400)
+        self.assertEqual(payload['error'], 'missing card_type')
+
+    def test_batch(self):
+        status, payload = self.request('POST', '/convert/batch', [
+            {'amount': 1, 'from': 'EUR', 'to': 'USD'},
+            {'amount': 1, 'from': 'XXX', 'to': 'USD'},
+            {'amount': 2, 'from': 'EUR', 'to': 'USD', 'card_type': 'MC'}
+        ])
+        self.assertEqual(status, 200)
+        results = payload['results']
+        self.assertEqual(results[0]['result'], round(self.snapshot.get_rate('EUR', 'USD'), 5))
+        self.assertIn('unknown currency', results[1]['error'])
+        self.assertEqual(results[2]['result'], self.snapshot.payment_table().quote('EUR', 'USD', 2, 'MC'))
+
+    def test_errors(self):
+        self.assertEqual(self.request('GET', '/convert?amount=abc&from=USD&to=EUR')[0], 400)
+        self.assertEqual(self.request('GET', '/unknown')[0], 404)
+        self.assertEqual(self.request('POST', '/convert/batch', {'amount': 1})[0], 400)
+
+    def test_background_refresh(self):
+        self.converter.api = SnapshotAPI(RateSnapshot({**dict(zip(self.snapshot.codes, self.snapshot.rates)), 'EUR': 2}))
+        deadline = time.monotonic() + 5
+        while self.service.snapshot.get_rate('USD', 'EUR') != 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.request('GET', '/convert?amount=3&from=USD&to=EUR')[1]['result'], 6)
@@ -0,0 +1,30 @@
+import unittest
+
+from converter.core.trie import CurrencyResolver, Trie
+
+
+class TestCurrencyResolver(unittest.TestCase):
+    def setUp(self) -> None:
+        self.word_searcher = Trie()
+        for country, code in [('czech republic', 'CZK'), ('canada', 'CAD'), ('usa', 'USD')]:
+            self.word_searcher.add_word(country)
+            self.word_searcher.add_word(code)
+            self.word_searcher.currencies_dict[country] = code
+        self.resolver = CurrencyResolver(self.word_searcher)
+
+    def test_resolver_matches_trie(self):
+        '''
+        Test that the resolver returns the same code as the trie for every prefix and for unknown input
+        '''
+
+        words = ['czech republic', 'canada', 'usa', 'CZK', 'CAD', 'USD', 'EFWE', 'xyz']
+        for word in words:
+            for i in range(len(word) + 1):
+                prefix = word[:i]
+                self.assertEqual(self.resolver.get_code(prefix), self.word_searcher.get_code(prefix))
+
+    def test_resolving_codes_and_countries(self):
+        self.assertEqual(self.resolver.get_code('USD'), 'USD')
+        self.assertEqual(self.resolver.get_code('cze'), 'CZK')
+        self.assertEqual(self.resolver.get_code('can'), 'CAD')
+        self.assertEqual(self.resolver.get_code('XCSDF'), '')